@@ -1,15 +1,38 @@
 import streamlit as st
-import json
-import pandas as pd
 from pathlib import Path
 import difflib
-import unicodedata
 import copy
-import plotly.graph_objects as go  # zobrazeni grafu
-import plotly.express as px        # volitelny
 import re
 from datetime import datetime
-import subprocess
+import os
+import time
+import uuid
+
+import diagnostics
+import gitcat
+import gitqueue
+import jobs
+import logs
+import memory_report
+import storage
+import textnorm
+from core import (
+    SCENARIO_FILTER_COLUMNS,
+    SCENARIO_TABLE_COLUMNS,
+    action_metadata,
+    automatic_complexity,
+    build_effective_steps,
+    build_overrides_from_effective,
+    build_scenario_table,
+    build_stored_test_name,
+    display_test_name,
+    filter_scenario_rows,
+    load_action_metadata,
+    scenario_page_rows,
+    scenario_table_page,
+    scenario_step_fields,
+)
+import watcher
 
 
 # define base directory as the location of this script. This is
@@ -17,12 +40,26 @@ import subprocess
 # working directory changes during execution.
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
-PROJECTS_PATH = DATA_DIR / "projects.json"
-KROKY_PATH = DATA_DIR / "kroky.json"
+PROJECTS_DIR = DATA_DIR / "projects"  # one shard per project + manifest.json
+PROJECTS_MANIFEST = storage.manifest_path(PROJECTS_DIR)
+KROKY_DIR = DATA_DIR / "kroky"  # one file per action + index.json
+KROKY_INDEX = storage.catalogue_index_path(KROKY_DIR)
 KROKY_CUSTOM_PATH = DATA_DIR / "kroky_custom.json"  # fallback file for custom actions
 
 # ensure data directory exists as early as possible
 DATA_DIR.mkdir(exist_ok=True)
+# creates the project store, migrating an older single projects.json
+storage.ensure_project_store(PROJECTS_DIR)
+# creates the action catalogue, migrating an older single kroky.json
+storage.ensure_catalogue(KROKY_DIR)
+
+# one watcher per process - drops the shared parsed copies when a data file
+# changes on disk (git pull, scripts, other sessions)
+data_watcher = watcher.get_watcher([PROJECTS_MANIFEST, KROKY_INDEX, KROKY_CUSTOM_PATH])
+# one git worker per process - commits and pushes queued files in the background
+gitqueue.start_worker()
+DATA_CHANGE_NOTIFY_SECONDS = 5
+EXPORT_POLL_SECONDS = 1
 
 
 st.set_page_config(
@@ -32,6 +69,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ---------- DIAGNOSTICS ----------
+# Stage timings are recorded for every rerun, the panel itself stays hidden
+# unless the URL has ?diagnostics=1 or TESTOOL_DIAGNOSTICS=1 is set
+DIAGNOSTICS_ENABLED = os.environ.get("TESTOOL_DIAGNOSTICS") == "1" or st.query_params.get("diagnostics") == "1"
+if "diagnostics_session" not in st.session_state:
+    st.session_state.diagnostics_session = uuid.uuid4().hex[:8]
+diagnostics.start_rerun(st.session_state.diagnostics_session, st.session_state.pop("diagnostics_profile", None))
+
+# structured logger, debug records only with TESTOOL_LOG_LEVEL=DEBUG (see logs.py)
+log = logs.get_logger("app", session=st.session_state.diagnostics_session)
+
 # ---------- GLOBAL THEME ----------
 st.markdown("""
 <style>
@@ -206,19 +254,28 @@ hr {
 # cwd point to a temporary location. We need to know the original workspace
 # path so that data files are stored persistently.
 import sys
-print(f"[INIT] cwd={Path.cwd()}")
-print(f"[INIT] __file__={__file__}")
-print(f"[INIT] sys.argv={sys.argv}")
-print(f"[INIT] argv[0] resolved={Path(sys.argv[0]).resolve()}")
+log.debug(
+    "Script paths",
+    cwd=str(Path.cwd()),
+    file=__file__,
+    argv=sys.argv,
+    argv0_resolved=str(Path(sys.argv[0]).resolve()),
+)
 
 
 # ---------- POMOCNÉ FUNKCE ----------
 def load_json(filepath):
     """Safe JSON loading"""
     try:
-        if filepath.exists():
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return storage.read_json(filepath)
+    except Exception as e:
+        st.error(f"Error loading {filepath}: {e}")
+    return {}
+
+def load_json_cached(filepath):
+    """Shared parsed copy of filepath (read-only!), refreshed by the data watcher"""
+    try:
+        return storage.load_json_cached(filepath)
     except Exception as e:
         st.error(f"Error loading {filepath}: {e}")
     return {}
@@ -226,9 +283,7 @@ def load_json(filepath):
 def save_json(filepath, data):
     """Safe JSON saving"""
     try:
-        filepath.parent.mkdir(exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        storage.write_json_atomic(filepath, data)
         return True
     except Exception as e:
         st.error(f"Error saving {filepath}: {e}")
@@ -240,7 +295,8 @@ def normalize_override_entry(entry):
     if not isinstance(entry, dict):
         return entry
 
-    normalized = copy.deepcopy(entry)
+    with diagnostics.timed("deepcopy"):
+        normalized = copy.deepcopy(entry)
 
     if "description" in normalized and isinstance(normalized["description"], str):
         normalized["description"] = normalized["description"].strip()
@@ -252,23 +308,10 @@ def load_json_from_git_head(path_str: str):
     """
     Load file content from last git commit (HEAD).
     If file does not exist in HEAD yet, return {}.
+    Served by the long-lived git cat-file reader - the result is shared, read only.
     """
     try:
-        repo_root = Path.cwd()
-        rel_path = str(Path(path_str).resolve().relative_to(repo_root.resolve()))
-
-        result = subprocess.run(
-            ["git", "show", f"HEAD:{rel_path}"],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-
-        if result.returncode != 0 or not result.stdout.strip():
-            return {}
-
-        return json.loads(result.stdout)
-
+        return gitcat.get_reader().read_json("HEAD", Path(path_str).resolve()) or {}
     except Exception:
         return {}
 
@@ -296,234 +339,192 @@ def count_git_pending_override_changes(current_custom_data: dict, custom_path: s
     return len(changed_keys), changed_keys
 
 
-def save_and_update_projects(data):
-    """Uloží projekty do souboru a aktualizuje session_state"""
+def commit_projects(*operations):
+    """
+    Uloží změny projektů a aktualizuje session_state.
+    Operations are replayed on the latest saved projects, so scenarios saved
+    meanwhile by other sessions are never overwritten. Only the shards of the
+    changed projects are rewritten.
+    """
     # use fixed workspace path; not cwd, because Streamlit may run
     # from a temp directory
-    projects_path = PROJECTS_PATH
-    success = save_json(projects_path, data)
-    if success:
-        st.session_state.projects = copy.deepcopy(data)
-    return success
+    return _save_projects(
+        lambda revisions: storage.commit_project_operations(PROJECTS_DIR, operations, revisions),
+        len(operations),
+    )
+
+
+def restore_archived_projects(*names):
+    """commit_projects of storage.restore_projects - archived projects back to the store"""
+    return _save_projects(
+        lambda revisions: storage.restore_projects(PROJECTS_DIR, names, revisions),
+        len(names),
+    )
+
+
+def _save_projects(save, operation_count):
+    """save(base_revisions) -> (projects, merged); conflicts and errors are shown, False on failure"""
+    started = time.perf_counter()
+    try:
+        data, merged = save(st.session_state.get("project_revisions", {}))
+    except storage.ConflictError as e:
+        log.info("Project commit conflict", project=st.session_state.get("selected_project"), error=str(e))
+        reload_projects_from_disk()
+        st.session_state.commit_conflict = str(e)
+        return False
+    except Exception as e:
+        log.exception("Project commit failed", project=st.session_state.get("selected_project"))
+        st.error(f"Error saving {PROJECTS_DIR}: {e}")
+        return False
 
-def normalize_action_payload(action_data):
-    """Return canonical action structure."""
-    if isinstance(action_data, dict):
-        return {
-            "description": action_data.get("description", "").strip(),
-            "steps": copy.deepcopy(action_data.get("steps", []))
-        }
-    elif isinstance(action_data, list):
-        return {
-            "description": "",
-            "steps": copy.deepcopy(action_data)
-        }
-    return {"description": "", "steps": []}
+    log.debug(
+        "Projects committed",
+        project=st.session_state.get("selected_project"),
+        operations=operation_count,
+        merged=merged,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+    st.session_state.projects = data
+    st.session_state.project_revisions = storage.project_revisions(data)
+    mark_data_seen(PROJECTS_MANIFEST)
+    if merged:
+        st.toast("🔀 Merged with changes saved by another session", icon="🔀")
+    return True
 
 
-def action_payload_equal(a, b):
-    return normalize_action_payload(a) == normalize_action_payload(b)
+def mark_data_seen(*paths):
+    """Our own save must not look like an external change to this session"""
+    for path in paths:
+        data_watcher.check(path)
+    versions = data_watcher.versions()
+    for path in paths:
+        st.session_state.data_versions[str(path)] = versions[str(path)]
 
 
+def reload_projects_from_disk():
+    # shared process-level snapshot, every change goes through commit_projects;
+    # only the manifest is read here, a project is loaded when it is opened
+    data = storage.load_projects(PROJECTS_DIR)
+    st.session_state.projects = data
+    st.session_state.project_revisions = storage.project_revisions(data)
+
 def load_base_steps():
-    data = load_json(KROKY_PATH)
-    return data if isinstance(data, dict) else {}
+    """Base catalogue - names and summaries from the index, actions loaded on access"""
+    try:
+        return storage.load_catalogue(KROKY_DIR)
+    except Exception as e:
+        st.error(f"Error loading {KROKY_INDEX}: {e}")
+    return {}
 
 
 def load_custom_overrides():
-    data = load_json(KROKY_CUSTOM_PATH)
+    data = load_json_cached(KROKY_CUSTOM_PATH)
     return data if isinstance(data, dict) else {}
 
 
 def load_effective_steps():
-    """Base kroky.json + overrides from kroky_custom.json"""
-    base_steps = load_base_steps()
-    overrides = load_custom_overrides()
-    effective = copy.deepcopy(base_steps)
+    """
+    Base catalogue + overrides from kroky_custom.json.
+    Built once per version of the index and the overrides and shared by all
+    sessions (read-only); action files are loaded only when used.
+    """
+    try:
+        return storage.cached_derivation(
+            "effective_steps",
+            [KROKY_INDEX, KROKY_CUSTOM_PATH],
+            lambda index, custom: build_effective_steps(storage.CatalogueView(KROKY_DIR, index), custom),
+        )
+    except Exception as e:
+        st.error(f"Error loading actions: {e}")
+    return {}
 
-    for action_name, override_data in overrides.items():
-        if not isinstance(override_data, dict):
-            continue
 
-        status = override_data.get("_status")
+def scenario_table(project_name):
+    """
+    Columnar table of the Test Cases list - built once per saved revision of
+    the project (its shard) and shared by all sessions (read-only).
+    """
+    return storage.cached_derivation(
+        f"scenario_table.{project_name}",
+        [st.session_state.projects.shard_path(project_name)],
+        build_scenario_table,
+    )
 
-        if status == "deleted":
-            effective.pop(action_name, None)
-        elif status in ("added", "modified"):
-            effective[action_name] = {
-                "description": override_data.get("description", "").strip(),
-                "steps": copy.deepcopy(override_data.get("steps", []))
-            }
 
-    return effective
+def page_testcase_options(table, rows, scenarios):
+    """{label: (position, scenario)} of the list rows - labels come from the cached table"""
+    return {
+        f"{table['Order'][i]:03d} - {table['Test Name'][i]}": (table["Order"][i], scenarios[i])
+        for i in rows
+        if i < len(scenarios)
+    }
 
 
-def build_overrides_from_effective(base_steps, effective_steps):
+def get_action_metadata(action_name):
     """
-    Compare current effective state with immutable base and produce override-only kroky_custom.json.
+    Step count, automatic complexity and checksum of an action as this session
+    sees it - precomputed once per catalogue version, unsaved edits on the fly.
     """
-    overrides = {}
-
-    all_action_names = sorted(set(base_steps.keys()) | set(effective_steps.keys()), key=str.lower)
-
-    for action_name in all_action_names:
-        in_base = action_name in base_steps
-        in_effective = action_name in effective_steps
-
-        if in_base and not in_effective:
-            overrides[action_name] = {"_status": "deleted"}
-            continue
-
-        if not in_base and in_effective:
-            payload = normalize_action_payload(effective_steps[action_name])
-            overrides[action_name] = {
-                "_status": "added",
-                "description": payload["description"],
-                "steps": payload["steps"]
-            }
-            continue
-
-        if in_base and in_effective:
-            base_payload = normalize_action_payload(base_steps[action_name])
-            eff_payload = normalize_action_payload(effective_steps[action_name])
-
-            if base_payload != eff_payload:
-                overrides[action_name] = {
-                    "_status": "modified",
-                    "description": eff_payload["description"],
-                    "steps": eff_payload["steps"]
-                }
-
-    return dict(sorted(overrides.items(), key=lambda kv: kv[0].lower()))
+    pending = st.session_state.pending_action_edits
+    if action_name in pending:
+        return action_metadata(pending[action_name]) if pending[action_name] is not None else None
+    try:
+        metadata = load_action_metadata(KROKY_DIR, KROKY_CUSTOM_PATH)
+    except Exception as e:
+        st.error(f"Error loading actions: {e}")
+        metadata = {}
+    if action_name in metadata:
+        return metadata[action_name]
+    action_data = st.session_state.steps_data.get(action_name)
+    return action_metadata(action_data) if action_data is not None else None
 
 
-def save_ui_overrides(effective_steps):
+def save_ui_overrides(action_changes):
     """
     Save only UI changes to kroky_custom.json.
-    kroky.json remains untouched.
+    The base catalogue remains untouched.
+    action_changes ({action: payload, None = deleted}) join the session's pending
+    edits and are applied on top of the current files under the file lock, so
+    actions edited by other sessions are kept. On failure they stay pending.
     """
-    base_steps = load_base_steps()
-    overrides = build_overrides_from_effective(base_steps, effective_steps)
+    st.session_state.pending_action_edits.update(action_changes)
+
+    try:
+        with storage.file_lock(KROKY_CUSTOM_PATH):
+            base_steps = storage.load_catalogue(KROKY_DIR)
+            disk_effective = build_effective_steps(base_steps, storage.read_json(KROKY_CUSTOM_PATH))
+            effective_steps = storage.apply_action_changes(disk_effective, st.session_state.pending_action_edits)
+            overrides = build_overrides_from_effective(base_steps, effective_steps)
 
-    success = save_json(KROKY_CUSTOM_PATH, overrides)
+            success = save_json(KROKY_CUSTOM_PATH, overrides)
+    except Exception as e:
+        st.error(f"Error loading actions: {e}")
+        success = False
 
     if success:
-        refreshed_effective = load_effective_steps()
-        st.session_state.steps_data = copy.deepcopy(refreshed_effective)
-        st.session_state.edit_steps_data = copy.deepcopy(refreshed_effective)
+        mark_data_seen(KROKY_CUSTOM_PATH)
+        st.session_state.pending_action_edits = {}
+        st.session_state.steps_data = load_effective_steps()
         st.toast("✅ UI overrides saved to kroky_custom.json", icon="💾")
     else:
         st.error("❌ Failed to save UI overrides.")
 
     return success
-	
-    
-def clean_tc_name(name: str) -> str:
-    """
-    Odstraní části 'UNKNOWN' z názvu ticketu a opraví duplicitní podtržítka.
-    """
-    if not name or not isinstance(name, str):
-        return name
-    
-    parts = name.split('_')
-    cleaned_parts = [p for p in parts if p != 'UNKNOWN']
-    result = '_'.join(cleaned_parts)
-    
-    # Opravit případné duplicitní podtržítka
-    while '__' in result:
-        result = result.replace('__', '_')
-    
-    # Odebrat podtržítka na začátku/konci
-    result = result.strip('_')
-    
-    return result
-
-def extract_channel(text: str) -> str:
-    """Extract channel from text"""
-    t = text.lower()
-    if "shop" in t:
-        return "SHOP"
-    if "il" in t:
-        return "IL"
-    return "UNKNOWN"
-
-def extract_segment(text: str) -> str:
-    """Extract segment from text"""
-    t = text.lower()
-    if "b2c" in t:
-        return "B2C"
-    if "b2b" in t:
-        return "B2B"
-    return "UNKNOWN"
-
-def extract_technology(text: str) -> str:
-    """Extract technology from text"""
-    t = text.lower()
-    if "hlas" in t or "voice" in t:
-        return "HLAS"
-    if "fwa" in t and "bisi" in t:
-        return "FWA_BISI"
-    if "fwa" in t and "bi" in t:
-        return "FWA_BI"
-    for key in ["dsl", "fiber", "cable"]:
-        if key in t:
-            return key.upper()
-    if "fwa" in t:
-        return "FWA"
-    return "UNKNOWN"
-
-def analyze_scenarios(scenarios: list):
-    """Count scenarios by segment -> channel -> action"""
-    segment_data = {"B2C": {"SHOP": {}, "IL": {}}, "B2B": {"SHOP": {}, "IL": {}}}
-
-    for scenario in scenarios:
-        segment = scenario.get("segment", "UNKNOWN")
-        channel = scenario.get("kanal", "UNKNOWN")
-        action = scenario.get("akce", "UNKNOWN")
-
-        if segment not in segment_data:
-            segment_data[segment] = {}
-
-        if channel not in segment_data[segment]:
-            segment_data[segment][channel] = {}
-
-        if action not in segment_data[segment][channel]:
-            segment_data[segment][channel][action] = 0
-
-        segment_data[segment][channel][action] += 1
-
-    return segment_data
-
-def remove_diacritics(text):
-    """Remove diacritics from text"""
-    if not text:
-        return text
-    normalized = unicodedata.normalize('NFKD', text)
-    return ''.join(c for c in normalized if not unicodedata.combining(c))
-
-def update_scenarios_with_action_steps(projects_data: dict, steps_data: dict, action_name: str):
-    """
-    Update all scenarios that use a specific action with the latest steps from kroky.json
-    Propagates changes to all test cases that use this action
-    """
-    updated_count = 0
-    for project_key, project_data in projects_data.items():
-        if not isinstance(project_data, dict) or "scenarios" not in project_data:
-            continue
-        
-        for scenario in project_data.get("scenarios", []):
-            if scenario.get("akce") == action_name:
-                # Get updated steps from kroky.json
-                if action_name in steps_data:
-                    action_data = steps_data[action_name]
-                    if isinstance(action_data, dict) and "steps" in action_data:
-                        scenario["kroky"] = copy.deepcopy(action_data["steps"])
-                        updated_count += 1
-                    elif isinstance(action_data, list):
-                        scenario["kroky"] = copy.deepcopy(action_data)
-                        updated_count += 1
-    
-    return updated_count
+
+
+def count_scenarios_with_action(projects_data: dict, action_name: str) -> int:
+    affected_count = 0
+    for project_name in projects_data:
+        try:
+            project_data = projects_data[project_name]
+        except storage.ConflictError:
+            continue  # deleted by another session meanwhile
+        if isinstance(project_data, dict) and "scenarios" in project_data:
+            for scenario in project_data["scenarios"]:
+                if scenario.get("akce") == action_name:
+                    affected_count += 1
+    return affected_count
 
 
 def render_metric_card(title: str, value: int):
@@ -548,11 +549,134 @@ def render_section_intro(title: str, subtitle: str):
     st.markdown(f"<div class='tt-muted'>{subtitle}</div>", unsafe_allow_html=True)
 
 
+def render_diagnostics_panel():
+    """Stage timings of recent reruns of this session, JSONL export and one-off profiling"""
+    session = st.session_state.diagnostics_session
+    with st.expander("🩺 Diagnostics", expanded=False):
+        runs = diagnostics.history(session)
+        if runs:
+            last = runs[-1]
+            st.write(f"**Last rerun:** {last['total'] * 1000:.0f} ms" + ("" if last["complete"] else " (ended early)"))
+            stage_rows = [
+                {"stage": stage, "count": stats["count"], "ms": round(stats["seconds"] * 1000, 2)}
+                for stage, stats in sorted(last["stages"].items(), key=lambda kv: -kv[1]["seconds"])
+            ]
+            if stage_rows:
+                st.dataframe(stage_rows, hide_index=True, use_container_width=True)
+            for counter, value in last["counters"].items():
+                st.caption(f"{counter}: {value}")
+            st.caption("Recent reruns (ms): " + ", ".join(f"{run['total'] * 1000:.0f}" for run in runs[-10:]))
+        else:
+            st.caption("No finished rerun recorded yet.")
+
+        st.download_button(
+            "⬇️ Export reruns (JSONL)",
+            data=diagnostics.to_jsonl(runs),
+            file_name=f"diagnostics_{session}.jsonl",
+            mime="application/jsonl",
+            use_container_width=True,
+        )
+
+        profiler = st.selectbox("Profiler", options=diagnostics.available_profilers(), key="diagnostics_profiler")
+        if st.button("⏱️ Profile next rerun", use_container_width=True):
+            st.session_state.diagnostics_profile = profiler
+            st.rerun()
+        profiled = [run for run in runs if "profile" in run]
+        if profiled:
+            st.caption(f"Profile of rerun at {profiled[-1]['ts']}")
+            st.code(profiled[-1]["profile"], language=None)
+
+        with st.popover("Process totals"):
+            process_totals = diagnostics.totals()
+            for stage, stats in sorted(process_totals["stages"].items()):
+                st.caption(f"{stage}: {stats['count']}× {stats['seconds'] * 1000:.0f} ms")
+            for counter, value in sorted(process_totals["counters"].items()):
+                st.caption(f"{counter}: {value}")
+            text_cache = textnorm.cache_info()
+            st.caption(f"text cache: {text_cache.hits} hits, {text_cache.misses} misses, "
+                       f"{text_cache.currsize}/{text_cache.maxsize} entries")
+
+
+@st.fragment(run_every=EXPORT_POLL_SECONDS)
+def render_export_progress(job_id: str):
+    """Polls a running export job; a full rerun shows the result once it finishes"""
+    job = jobs.status(job_id)
+    if job is None or job["status"] in jobs.FINISHED:
+        st.rerun()
+    total = max(job["scenarios_total"], 1)
+    label = "Queued..." if job["status"] == jobs.QUEUED else (
+        f"Exporting {job['scenarios_done']}/{job['scenarios_total']} test cases, {job['rows_written']} rows"
+    )
+    st.progress(job["scenarios_done"] / total, text=label)
+    if st.button("✖️ Cancel export", key=f"cancel_export_{job_id}"):
+        jobs.cancel(job_id)
+
+
+def render_export_job(project_name: str):
+    """Progress, result or error of this session's last export job for project_name"""
+    job_id = st.session_state.get("export_job") or st.query_params.get("export_job")
+    job = jobs.status(job_id) if job_id else None
+    if job is None:
+        if "export_job" in st.query_params:
+            del st.query_params["export_job"]
+        return
+    st.session_state.export_job = job_id
+    if job["project"] != project_name:
+        return
+
+    if job["status"] in (jobs.QUEUED, jobs.RUNNING):
+        render_export_progress(job_id)
+    elif job["status"] == jobs.DONE:
+        output = jobs.result(job_id)
+        if output is None:
+            st.warning("Test cases have no steps to export.")
+        else:
+            safe_name = project_name.replace(" ", "_").replace("/", "_").replace("\\", "_")
+            st.success("Export successful. File is ready for download.")
+            st.download_button(
+                "⬇️ Download Excel file",
+                data=output,
+                file_name=f"testcases_{safe_name}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=False
+            )
+    elif job["status"] == jobs.CANCELLED:
+        st.info("Export cancelled.")
+    else:
+        st.error(f"Export failed: {job['error']}")
+
+
+@st.fragment(run_every=DATA_CHANGE_NOTIFY_SECONDS)
+def render_git_queue_status():
+    """Files waiting for the background git commit/push and its last error"""
+    state = gitqueue.status()
+    if state["pending"] or state["worker_active"]:
+        st.caption(f"📤 git: {len(state['pending'])} queued, {state['state']}")
+    elif state["unpushed"]:
+        st.caption("📤 git: committed, waiting for push")
+    if state["last_error"]:
+        st.caption(f"⚠️ git {state['state']} ({state['last_attempt']}): {state['last_error'][:200]}")
+    elif state["last_push"]:
+        st.caption(f"✅ git: last push {state['last_push']}")
+
+
+@st.fragment(run_every=DATA_CHANGE_NOTIFY_SECONDS)
+def render_data_change_notifier():
+    """Cheap periodic check while the page is idle - tells the user about external edits"""
+    versions = data_watcher.versions()
+    if versions == st.session_state.get("data_change_notified", st.session_state.data_versions):
+        return
+    st.session_state.data_change_notified = versions
+    changed = ", ".join(p.name for p in data_watcher.changed_since(st.session_state.data_versions))
+    if changed:
+        st.toast(f"📂 {changed} changed on disk - reloaded on your next action", icon="📂")
+
+
 # ---------- HLAVNÍ APLIKACE ----------
 # Top nav handles title + tabs, žáden repeating headings zde
 
 # ---------- SIDEBAR ----------
-# paths (BASE_DIR, DATA_DIR, PROJECTS_PATH, KROKY_PATH, KROKY_CUSTOM_PATH)
+# paths (BASE_DIR, DATA_DIR, PROJECTS_DIR, KROKY_DIR, KROKY_CUSTOM_PATH)
 # are defined at the top of the module. We rely on those constants rather
 # than recalculating them here, ensuring the workspace location is always
 
@@ -561,19 +685,10 @@ def render_section_intro(title: str, subtitle: str):
 
 # (DATA_DIR already created by module-level code.)
 
-# Načtení dat
-projects = load_json(PROJECTS_PATH)
-steps_data = load_effective_steps()
-
-
-# Zajistíme, aby se prázdné soubory inicializovaly s minimem dat
-if not projects or projects == {}:
-    projects = {}
-    save_json(PROJECTS_PATH, projects)
-
-if not steps_data or steps_data == {}:
-    steps_data = {}
-    save_json(KROKY_PATH, steps_data)
+# Načtení dat - parsed once per process and shared, re-read only after
+# the watcher reports a change
+if 'data_versions' not in st.session_state:
+    st.session_state.data_versions = data_watcher.versions()
 
 # Session state initialization:
 # IMPORTANT: We initialize ONLY on first run (no 'in st.session_state'),
@@ -581,23 +696,47 @@ if not steps_data or steps_data == {}:
 # This allows temporary changes (new actions) to persist within the session
 # until the app is fully restarted.
 if 'projects' not in st.session_state:
-    st.session_state.projects = copy.deepcopy(projects)
+    reload_projects_from_disk()
 
 if 'selected_project' not in st.session_state:
     st.session_state.selected_project = None
 
 if 'steps_data' not in st.session_state:
-    st.session_state.steps_data = copy.deepcopy(steps_data)
-    print(f"[DEBUG] INIT: steps_data first initialization from disk")
+    st.session_state.steps_data = load_effective_steps()
+    log.debug("steps_data first initialization from disk", actions=len(st.session_state.steps_data))
+
+# Per-session overlay: action edits not yet saved to kroky_custom.json
+if 'pending_action_edits' not in st.session_state:
+    st.session_state.pending_action_edits = {}
+
+# Lazy refresh: pick up files changed outside this session since its last run
+changed_paths = data_watcher.changed_since(st.session_state.data_versions)
+if changed_paths:
+    with diagnostics.timed("session.refresh"):
+        st.session_state.data_versions = data_watcher.versions()
+        if PROJECTS_MANIFEST in changed_paths:
+            reload_projects_from_disk()
+        if KROKY_INDEX in changed_paths or KROKY_CUSTOM_PATH in changed_paths:
+            st.session_state.steps_data = load_effective_steps()
 
 # Initialize selected tab
 if 'selected_tab' not in st.session_state:
     st.session_state.selected_tab = 'build'
 
+# Project may have been renamed/deleted by another session (see commit_projects)
+if st.session_state.selected_project not in st.session_state.projects:
+    st.session_state.selected_project = None
+
 # ---------- SIDEBAR: LOGO + PROJECT MANAGEMENT ----------
 with st.sidebar:    
     st.subheader("📁 Project")
 
+    render_data_change_notifier()
+
+    if st.session_state.get("commit_conflict"):
+        st.warning(f"⚠️ {st.session_state.commit_conflict} Your view was reloaded, please try again.")
+        st.session_state.commit_conflict = None
+
     project_names = list(st.session_state.projects.keys())
     selected = st.selectbox(
         "Select Project",
@@ -611,14 +750,9 @@ with st.sidebar:
     if st.button("✅ Create Project", use_container_width=True):
         if new_project.strip():
             if new_project.strip() not in st.session_state.projects:
-                st.session_state.projects[new_project] = {
-                    "next_id": 1,
-                    "subject": r"UAT2\Antosova\\",
-                    "scenarios": []
-                }
-                save_and_update_projects(st.session_state.projects)
-                st.session_state.selected_project = new_project
-                st.success("Project created.")
+                if commit_projects(storage.op_create_project(new_project, r"UAT2\Antosova\\")):
+                    st.session_state.selected_project = new_project
+                    st.success("Project created.")
                 st.rerun()
             else:
                 st.error("Project already exists.")
@@ -644,11 +778,9 @@ with st.sidebar:
             elif new_name in st.session_state.projects:
                 st.error("A project with this name already exists.")
             else:
-                st.session_state.projects[new_name] = st.session_state.projects[current_project]
-                del st.session_state.projects[current_project]
-                save_and_update_projects(st.session_state.projects)
-                st.session_state.selected_project = new_name
-                st.success("Project renamed.")
+                if commit_projects(storage.op_rename_project(current_project, new_name)):
+                    st.session_state.selected_project = new_name
+                    st.success("Project renamed.")
                 st.rerun()
 
         # Delete project (two-step)
@@ -664,8 +796,7 @@ with st.sidebar:
 
             with col_yes:
                 if st.button("Yes, delete", use_container_width=True):
-                    del st.session_state.projects[current_project]
-                    save_and_update_projects(st.session_state.projects)
+                    commit_projects(storage.op_delete_project(current_project))
                     st.session_state.selected_project = None
                     st.session_state.project_to_delete = None
                     st.success("Project deleted.")
@@ -675,26 +806,78 @@ with st.sidebar:
                 if st.button("Cancel", use_container_width=True):
                     st.session_state.project_to_delete = None
 
+        # Archive project (two-step) - it stays searchable and restorable below
+        if "project_to_archive" not in st.session_state:
+            st.session_state.project_to_archive = None
+
+        if st.button("🗄️ Archive project", use_container_width=True):
+            st.session_state.project_to_archive = current_project
+
+        if st.session_state.project_to_archive == current_project:
+            st.warning(f'Move "{current_project}" to the archive? It will not be loaded until restored.')
+            col_yes, col_no = st.columns(2)
+
+            with col_yes:
+                if st.button("Yes, archive", use_container_width=True):
+                    if commit_projects(storage.op_archive_project(PROJECTS_DIR, current_project)):
+                        st.session_state.selected_project = None
+                        st.success("Project archived.")
+                    st.session_state.project_to_archive = None
+                    st.rerun()
+
+            with col_no:
+                if st.button("Cancel", key="cancel_archive", use_container_width=True):
+                    st.session_state.project_to_archive = None
+
         # Subject settings
         st.markdown("---")
         st.subheader("📨 Subject Settings")
 
-        subject_val = st.session_state.projects[current_project].get("subject", "")
+        subject_val = st.session_state.projects.summary(current_project).get("subject", "")
         subject_input = st.text_input("Subject", value=subject_val)
 
         col_save, col_delete = st.columns(2)
 
         with col_save:
             if st.button("💾 Save subject", use_container_width=True):
-                st.session_state.projects[current_project]["subject"] = subject_input.strip()
-                save_and_update_projects(st.session_state.projects)
-                st.success("Subject updated.")
+                subject_new = subject_input.strip()
+                if commit_projects(storage.op_update_project(current_project, lambda p: p.update(subject=subject_new))):
+                    st.success("Subject updated.")
 
         with col_delete:
             if st.button("🧹 Delete subject", use_container_width=True):
-                st.session_state.projects[current_project]["subject"] = ""
-                save_and_update_projects(st.session_state.projects)
-                st.success("Subject cleared.")
+                if commit_projects(storage.op_update_project(current_project, lambda p: p.update(subject=""))):
+                    st.success("Subject cleared.")
+
+    st.markdown("---")
+    with st.expander("🗄️ Archived projects", expanded=False):
+        # only the small archive index is read, the projects stay compressed on disk
+        archive_query = st.text_input("Search archive", placeholder="name or subject")
+        archived = storage.search_archive(PROJECTS_DIR, archive_query)
+        if not archived:
+            st.caption("No archived projects found.")
+        for name, entry in archived[:20]:
+            st.caption(f"{name} · {entry.get('scenario_count', 0)} scenarios · archived {entry.get('archived', '')[:10]}")
+            if st.button("♻️ Restore", key=f"restore_{name}", use_container_width=True):
+                if restore_archived_projects(name):
+                    st.session_state.selected_project = name
+                    st.success("Project restored.")
+                st.rerun()
+        if len(archived) > 20:
+            st.caption(f"… and {len(archived) - 20} more, refine the search.")
+
+    with st.expander("🧠 Memory", expanded=False):
+        if st.button("Measure session memory", use_container_width=True):
+            shared_bytes, session_rows = memory_report.session_footprint(
+                st.session_state.items(), storage.shared_objects()
+            )
+            st.write(f"**This session:** {memory_report.format_bytes(sum(size for _, size in session_rows))}")
+            st.write(f"**Shared data (all sessions):** {memory_report.format_bytes(shared_bytes)}")
+            for key, size in session_rows[:10]:
+                st.caption(f"{key}: {memory_report.format_bytes(size)}")
+
+    if DIAGNOSTICS_ENABLED:
+        render_diagnostics_panel()
 
 # ---------- MAIN CONTENT: STICKY TOP NAV ----------
 if 'selected_tab' not in st.session_state:
@@ -746,16 +929,27 @@ st.markdown("---")
 if selected_tab == "build":
     project_name = st.session_state.selected_project
     if project_name is None:
-        project_data = {"subject": "", "scenarios": [], "next_id": 1}
+        project_data = {"subject": "", "scenarios": []}
         project_exists = False
     else:
-        project_data = st.session_state.projects[project_name]
+        try:
+            project_data = st.session_state.projects[project_name]
+        except storage.ConflictError as e:
+            log.info("Stale project view", project=project_name, error=str(e))
+            reload_projects_from_disk()
+            if project_name in st.session_state.projects:
+                # listed by the current manifest too - the file itself is missing
+                log.error("Project file missing", project=project_name)
+                st.error(f"❌ The file of project '{project_name}' is missing from {PROJECTS_DIR}.")
+                st.stop()
+            st.session_state.commit_conflict = str(e)
+            st.rerun()
         project_exists = True
 
     testcases = project_data.get("scenarios", [])
     testcase_count = len(testcases)
-    b2b_count = sum(1 for tc in testcases if tc.get("segment") == "B2B")
-    b2c_count = sum(1 for tc in testcases if tc.get("segment") == "B2C")
+    # overview, chart and list all read the cached columnar table of the saved revision
+    table = scenario_table(project_name) if testcases else None
 
     if not project_exists:
         st.markdown("<div class='tt-note'>Select or create a project in the sidebar to work with test cases.</div>", unsafe_allow_html=True)
@@ -772,7 +966,7 @@ if selected_tab == "build":
         st.subheader("📋 Actions by Segment")
 
         if testcases:
-            nested_segment_data = analyze_scenarios(testcases)
+            nested_segment_data = table["_by_segment"]
             segment_columns = st.columns(2)
             segment_config = [
                 ("B2C", "👥", segment_columns[0]),
@@ -813,18 +1007,17 @@ if selected_tab == "build":
         if testcase_count > 0:
             complexity_order = ["1-Giant", "2-Huge", "3-Big", "4-Medium", "5-Low"]
             complexity_counts = {label: 0 for label in complexity_order}
-            for tc in testcases:
-                value = tc.get("complexity", "UNKNOWN")
-                if value in complexity_counts:
-                    complexity_counts[value] += 1
-                else:
-                    complexity_counts[value] = complexity_counts.get(value, 0) + 1
+            for value, count in table["_complexity_counts"].items():
+                complexity_counts[value] = complexity_counts.get(value, 0) + count
 
             filtered_items = [(label, count) for label, count in complexity_counts.items() if count > 0]
             labels = [label.split('-', 1)[1] if '-' in label else label for label, _ in filtered_items]
             values = [count for _, count in filtered_items]
             colors = ["#ff4fbf", "#8b5cf6", "#35d6ff", "#22c55e", "#f59e0b"][:len(values)]
 
+            # plotly is heavy, import only when the chart is rendered
+            import plotly.graph_objects as go  # zobrazeni grafu
+
             fig_complexity = go.Figure(data=[go.Pie(
                 labels=labels,
                 values=values,
@@ -858,95 +1051,73 @@ if selected_tab == "build":
             render_empty_panel("No test cases yet", height=360)
     st.markdown("---")
     st.markdown("### 💾 Export Test Cases")
-    st.write("Generate clean, renumbered & diacritics-free test cases Excel file.")
+    st.write("Generate clean, numbered & diacritics-free test cases Excel file.")
     export_button = st.button("💾 Export Test Cases to Excel", use_container_width=False, disabled=(not project_exists or not testcases))
 
     if export_button:
-        project_data = st.session_state.projects[project_name]
-        project_data["scenarios"] = sorted(project_data["scenarios"], key=lambda x: x.get("order_no", 0))
-
-        for i, tc in enumerate(project_data["scenarios"], start=1):
-            tc["order_no"] = i
-            channel = tc["kanal"]
-            segment = tc["segment"]
-            technology = extract_technology(tc["veta"])
-            sentence = tc["veta"].strip()
-            prefix = "_".join(p for p in [f"{i:03d}", channel, segment, technology] if p and p != "UNKNOWN")
-            tc["test_name"] = clean_tc_name(f"{prefix}_{sentence.capitalize()}")
-
-        save_and_update_projects(st.session_state.projects)
-
-        rows = []
-        for tc in project_data["scenarios"]:
-            for i, step in enumerate(tc.get("kroky", []), start=1):
-                rows.append({
-                    "Project": project_name,
-                    "Subject": project_data.get("subject", ""),
-                    "System/Application": "Siebel_CZ",
-                    "Description": f"Segment: {tc['segment']}\nChannel: {tc['kanal']}\nAction: {tc['akce']}",
-                    "Type": "Manual",
-                    "Test Phase": "4-User Acceptance",
-                    "Test: Test Phase": "4-User Acceptance",
-                    "Test Priority": tc["priority"],
-                    "Test Complexity": tc["complexity"],
-                    "Test Name": remove_diacritics(tc["test_name"]),
-                    "Step Name (Design Steps)": str(i),
-                    "Description (Design Steps)": remove_diacritics(step.get("description", "")),
-                    "Expected (Design Steps)": remove_diacritics(step.get("expected", ""))
-                })
-
-        df = pd.DataFrame(rows)
-        import io
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Test Cases")
-        output.seek(0)
-
-        safe_name = project_name.replace(" ", "_").replace("/", "_").replace("\\", "_")
-        st.success("Export successful. File is ready for download.")
-        st.download_button(
-            "⬇️ Download Excel file",
-            data=output.getvalue(),
-            file_name=f"testcases_{safe_name}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=False
+        # numbering is derived from the position, nothing to rewrite before export;
+        # the job runs in the background, its id in the URL survives a refresh
+        job_id = jobs.submit_export(
+            project_name, st.session_state.projects, text_filter=textnorm.remove_diacritics, default_subject=""
         )
+        st.session_state.export_job = job_id
+        st.query_params["export_job"] = job_id
+
+    render_export_job(project_name)
     st.markdown("---")
     st.subheader("📋 Test Cases List")
-    if project_data.get("scenarios"):
-        df_data = []
-        for tc in project_data["scenarios"]:
-            df_data.append({
-                "Order": tc.get("order_no"),
-                "Test Name": tc.get("test_name"),
-                "Action": tc.get("akce"),
-                "Segment": tc.get("segment"),
-                "Channel": tc.get("kanal"),
-                "Priority": tc.get("priority"),
-                "Complexity": tc.get("complexity"),
-                "Steps": len(tc.get("kroky", [])) if "kroky" in tc else 0
-            })
-
-        df = pd.DataFrame(df_data)
-        if not df.empty:
-            df = df.sort_values(by="Order", ascending=True)
-
-        st.dataframe(
-            df,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Order": st.column_config.NumberColumn("No.", width="small"),
-                "Test Name": st.column_config.TextColumn("Test Name", width="large"),
-                "Action": st.column_config.TextColumn("Action", width="medium"),
-                "Segment": st.column_config.TextColumn("Segment", width="small"),
-                "Channel": st.column_config.TextColumn("Channel", width="small"),
-                "Priority": st.column_config.TextColumn("Priority", width="small"),
-                "Complexity": st.column_config.TextColumn("Complexity", width="small"),
-                "Steps": st.column_config.NumberColumn("Steps", width="small")
-            }
-        )
+    if table is not None:
+        # filtered, sorted and paged here - only the visible page goes to the browser
+        text_query = st.text_input("Search test cases", key=f"tc_search_{project_name}", placeholder="name, action or sentence")
+        filters = {}
+        for filter_col, column in zip(st.columns(len(SCENARIO_FILTER_COLUMNS)), SCENARIO_FILTER_COLUMNS):
+            with filter_col:
+                filters[column] = st.multiselect(column, options=table["_options"][column], key=f"tc_filter_{column}_{project_name}")
+
+        col_sort, col_order, col_size = st.columns([2, 1, 1])
+        with col_sort:
+            sort_by = st.selectbox("Sort by", options=SCENARIO_TABLE_COLUMNS, key="tc_sort_by")
+        with col_order:
+            descending = st.checkbox("Descending", key="tc_sort_desc")
+        with col_size:
+            page_size = st.selectbox("Rows per page", options=[25, 50, 100, 250], index=1, key="tc_page_size")
+
+        rows = filter_scenario_rows(table, filters, text_query, sort_by, descending)
+        page_count = max(1, (len(rows) + page_size - 1) // page_size)
+        list_signature = (project_name, text_query, tuple(map(tuple, filters.values())), sort_by, descending, page_size)
+        if st.session_state.get("tc_list_signature") != list_signature:
+            st.session_state.tc_list_signature = list_signature
+            st.session_state.tc_page = 1
+        st.session_state.tc_page = min(st.session_state.get("tc_page", 1), page_count)
+        # the edit and delete selectors below offer the same rows
+        visible_rows = scenario_page_rows(rows, st.session_state.tc_page, page_size)
+
+        if rows:
+            st.dataframe(
+                scenario_table_page(table, rows, st.session_state.tc_page, page_size),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Order": st.column_config.NumberColumn("No.", width="small"),
+                    "Test Name": st.column_config.TextColumn("Test Name", width="large"),
+                    "Action": st.column_config.TextColumn("Action", width="medium"),
+                    "Segment": st.column_config.TextColumn("Segment", width="small"),
+                    "Channel": st.column_config.TextColumn("Channel", width="small"),
+                    "Priority": st.column_config.TextColumn("Priority", width="small"),
+                    "Complexity": st.column_config.TextColumn("Complexity", width="small"),
+                    "Steps": st.column_config.NumberColumn("Steps", width="small")
+                }
+            )
+        else:
+            st.info("No test cases match the filters.")
+
+        col_page, col_count = st.columns([1, 3])
+        with col_page:
+            st.number_input("Page", min_value=1, max_value=page_count, step=1, key="tc_page")
+        with col_count:
+            st.caption(f"{len(rows)} of {len(table['Order'])} test cases · page {st.session_state.tc_page} of {page_count}")
     else:
+        visible_rows = []
         st.info("No test cases yet. Add your first test case below.")
     st.markdown("---")
     st.subheader("➕ Add New Test Case")
@@ -967,6 +1138,7 @@ if selected_tab == "build":
 
         PRIORITY_MAP_VALUES = ["1-High", "2-Medium", "3-Low"]
         COMPLEXITY_MAP_VALUES = ["1-Giant", "2-Huge", "3-Big", "4-Medium", "5-Low"]
+        COMPLEXITY_AUTO = "Auto (by steps)"
         SEGMENT_OPTIONS = ["B2C", "B2B"]
         KANAL_OPTIONS = ["SHOP", "IL"]
 
@@ -974,7 +1146,7 @@ if selected_tab == "build":
         with col_priority:
             priority = st.selectbox("Priority", options=PRIORITY_MAP_VALUES, index=1)
         with col_complexity:
-            complexity = st.selectbox("Complexity", options=COMPLEXITY_MAP_VALUES, index=3)
+            complexity = st.selectbox("Complexity", options=[COMPLEXITY_AUTO] + COMPLEXITY_MAP_VALUES, index=0)
         with col_segment:
             segment = st.selectbox("Segment", options=SEGMENT_OPTIONS, index=0)
         with col_kanal:
@@ -986,54 +1158,50 @@ if selected_tab == "build":
             elif not action:
                 st.error("Select an action.")
             else:
-                order = project_data["next_id"]
-                technology = extract_technology(sentence)
-                prefix_parts = [f"{order:03d}", kanal, segment, technology]
-                filtered_parts = [p for p in prefix_parts if p and p != "UNKNOWN"]
-                prefix = "_".join(filtered_parts)
-                test_name = clean_tc_name(f"{prefix}_{sentence.strip().capitalize()}")
-
                 kroky_pro_akci = []
                 if action in st.session_state.steps_data:
                     action_data = st.session_state.steps_data[action]
-                    if isinstance(action_data, dict) and "steps" in action_data:
-                        kroky_pro_akci = copy.deepcopy(action_data["steps"])
-                    elif isinstance(action_data, list):
-                        kroky_pro_akci = copy.deepcopy(action_data)
+                    with diagnostics.timed("deepcopy"):
+                        if isinstance(action_data, dict) and "steps" in action_data:
+                            kroky_pro_akci = copy.deepcopy(action_data["steps"])
+                        elif isinstance(action_data, list):
+                            kroky_pro_akci = copy.deepcopy(action_data)
 
+                metadata = get_action_metadata(action)
                 new_testcase = {
-                    "order_no": order,
-                    "test_name": test_name,
+                    "test_name": build_stored_test_name(sentence, kanal, segment),
                     "akce": action,
                     "segment": segment,
                     "kanal": kanal,
                     "priority": priority,
-                    "complexity": complexity,
+                    "complexity": automatic_complexity(metadata) if complexity == COMPLEXITY_AUTO else complexity,
                     "veta": sentence.strip(),
-                    "kroky": kroky_pro_akci
+                    **scenario_step_fields(kroky_pro_akci, metadata),
                 }
 
-                project_data["next_id"] += 1
-                project_data["scenarios"].append(new_testcase)
-                save_and_update_projects(st.session_state.projects)
-                st.success(f"✅ Test case added: {test_name}")
+                if commit_projects(storage.op_add_scenario(project_name, new_testcase)):
+                    # another session may have added test cases meanwhile, number comes from the saved position
+                    saved_scenarios = st.session_state.projects[project_name]["scenarios"]
+                    st.success(f"✅ Test case added: {display_test_name(len(saved_scenarios), saved_scenarios[-1])}")
                 st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
 
     with st.expander("✏️ Edit Existing Test Case", expanded=False):
-        if project_data["scenarios"]:
-            testcase_options = {f"{tc['order_no']:03d} - {tc['test_name']}": tc for tc in project_data["scenarios"]}
+        if visible_rows:
+            # the current page of the list - search, filter or page there to reach others
+            testcase_options = page_testcase_options(table, visible_rows, project_data.get("scenarios", []))
+            st.caption("Test cases on the current page of the list above.")
             selected_testcase_key = st.selectbox("Select Test Case to Edit", options=list(testcase_options.keys()), index=0, key="edit_testcase_select")
 
             if selected_testcase_key:
-                testcase_to_edit = testcase_options[selected_testcase_key]
-                if "edit_sentence_value" not in st.session_state or st.session_state.get("edit_sentence_tc") != testcase_to_edit["order_no"]:
+                edit_position, testcase_to_edit = testcase_options[selected_testcase_key]
+                if "edit_sentence_value" not in st.session_state or st.session_state.get("edit_sentence_tc") != edit_position:
                     st.session_state.edit_sentence_value = testcase_to_edit["veta"]
-                    st.session_state.edit_sentence_tc = testcase_to_edit["order_no"]
+                    st.session_state.edit_sentence_tc = edit_position
 
                 with st.form("edit_testcase_form"):
-                    st.write(f"**Currently editing:** {testcase_to_edit['test_name']}")
-                    sentence = st.text_area("Requirement Sentence", value=st.session_state.edit_sentence_value, height=100, key=f"edit_sentence_{testcase_to_edit['order_no']}")
+                    st.write(f"**Currently editing:** {display_test_name(edit_position, testcase_to_edit)}")
+                    sentence = st.text_area("Requirement Sentence", value=st.session_state.edit_sentence_value, height=100, key=f"edit_sentence_{edit_position}")
                     action = st.selectbox("Action (from kroky.json)", options=action_list, index=action_list.index(testcase_to_edit["akce"]) if testcase_to_edit["akce"] in action_list else 0, key="edit_action")
 
                     SEGMENT_OPTIONS = ["B2C", "B2B"]
@@ -1055,26 +1223,19 @@ if selected_tab == "build":
                         elif not action:
                             st.error("Select an action.")
                         else:
-                            order = testcase_to_edit["order_no"]
-                            technology = extract_technology(sentence)
-                            prefix_parts = [f"{order:03d}", kanal, segment, technology]
-                            filtered_parts = [p for p in prefix_parts if p and p != "UNKNOWN"]
-                            prefix = "_".join(filtered_parts)
-                            while '__' in prefix:
-                                prefix = prefix.replace('__', '_')
-                            prefix = prefix.strip('_')
-                            new_test_name = clean_tc_name(f"{prefix}_{sentence.strip().capitalize()}")
+                            new_test_name = build_stored_test_name(sentence, kanal, segment)
 
                             kroky_pro_akci = []
                             if action in st.session_state.steps_data:
                                 action_data = st.session_state.steps_data[action]
-                                if isinstance(action_data, dict) and "steps" in action_data:
-                                    kroky_pro_akci = copy.deepcopy(action_data["steps"])
-                                elif isinstance(action_data, list):
-                                    kroky_pro_akci = copy.deepcopy(action_data)
+                                with diagnostics.timed("deepcopy"):
+                                    if isinstance(action_data, dict) and "steps" in action_data:
+                                        kroky_pro_akci = copy.deepcopy(action_data["steps"])
+                                    elif isinstance(action_data, list):
+                                        kroky_pro_akci = copy.deepcopy(action_data)
 
                             st.session_state.edit_sentence_value = sentence.strip()
-                            testcase_to_edit.update({
+                            changes = {
                                 "test_name": new_test_name,
                                 "akce": action,
                                 "segment": segment,
@@ -1082,36 +1243,30 @@ if selected_tab == "build":
                                 "priority": priority,
                                 "complexity": complexity,
                                 "veta": sentence.strip(),
-                                "kroky": kroky_pro_akci
-                            })
+                                **scenario_step_fields(kroky_pro_akci, get_action_metadata(action)),
+                            }
 
-                            save_and_update_projects(st.session_state.projects)
-                            st.success(f"✅ Test case updated: {new_test_name}")
+                            if commit_projects(storage.op_update_scenario(project_name, testcase_to_edit, changes, edit_position)):
+                                st.success(f"✅ Test case updated: {display_test_name(edit_position, changes)}")
                             st.rerun()
+        elif table is not None:
+            st.info("No test cases match the list filters.")
         else:
             st.info("No test cases available to edit. Add a test case first.")
 
     with st.expander("🗑️ Delete Test Case", expanded=False):
-        if project_data["scenarios"]:
-            delete_options = [f"{tc['order_no']:03d} - {tc['test_name']}" for tc in project_data["scenarios"]]
-            testcase_to_delete = st.selectbox("Select Test Case to Delete", options=delete_options, index=0, key="delete_testcase_select")
+        if visible_rows:
+            delete_options = page_testcase_options(table, visible_rows, project_data.get("scenarios", []))
+            st.caption("Test cases on the current page of the list above.")
+            testcase_to_delete = st.selectbox("Select Test Case to Delete", options=list(delete_options), index=0, key="delete_testcase_select")
 
             if st.button("⚠️ Delete Selected Test Case", type="secondary"):
-                index_to_delete = delete_options.index(testcase_to_delete)
-                deleted_tc = project_data["scenarios"].pop(index_to_delete)
-                for idx, tc in enumerate(project_data["scenarios"], start=1):
-                    tc["order_no"] = idx
-                    if tc["test_name"].startswith(f"{idx-1:03d}_"):
-                        tc["test_name"] = f"{idx:03d}_" + tc["test_name"][4:]
-                    elif "_" in tc["test_name"]:
-                        parts = tc["test_name"].split("_", 1)
-                        if len(parts[0]) == 3 and parts[0].isdigit():
-                            tc["test_name"] = f"{idx:03d}_" + parts[1]
-
-                project_data["next_id"] = len(project_data["scenarios"]) + 1
-                save_and_update_projects(st.session_state.projects)
-                st.success(f"🗑️ Test case deleted: {deleted_tc['test_name']}")
+                delete_position, deleted_tc = delete_options[testcase_to_delete]
+                if commit_projects(storage.op_delete_scenario(project_name, deleted_tc, delete_position)):
+                    st.success(f"🗑️ Test case deleted: {display_test_name(delete_position, deleted_tc)}")
                 st.rerun()
+        elif table is not None:
+            st.info("No test cases match the list filters.")
         else:
             st.info("No test cases available to delete.")
 
@@ -1119,27 +1274,11 @@ if selected_tab == "build":
 if selected_tab == "edit":
     # 🔧 Edit Actions & Steps
     
-    # Load current data from disk to ensure we always have the latest
-    disk_steps = load_effective_steps()
-    
-    # Initialize edit_steps_data: combine disk data with any session state data
-    # This handles the case where session_state was reset on F5 refresh
-    if "edit_steps_data" not in st.session_state:
-        # First visit to this page (no prior session state)
-        st.session_state.edit_steps_data = copy.deepcopy(disk_steps)
-        print(f"[DEBUG] INIT edit_steps_data: Created from disk. Keys: {sorted(st.session_state.edit_steps_data.keys())[:3]}...")
-    else:
-        # Session state exists - merge disk data with session data
-        # Preserve any new actions that user added but not yet saved
-        print(f"[DEBUG] RESTORE edit_steps_data from session")
-        print(f"[DEBUG]   Session has ({len(st.session_state.edit_steps_data)}): {sorted(st.session_state.edit_steps_data.keys())[:3]}...")
-        print(f"[DEBUG]   Disk has ({len(disk_steps)}): {sorted(disk_steps.keys())[:3]}...")
-        # Keep any actions from session that are not on disk (new unsaved actions)
-        for action_name, action_data in st.session_state.edit_steps_data.items():
-            # Don't overwrite session data with disk data - keep the session version
-            # This preserves new actions user added
-            if action_name not in disk_steps:
-                print(f"[DEBUG]   Keeping unsaved action from session: {action_name}")
+    # Actions as this session sees them: the shared effective set (refreshed by
+    # the data watcher) plus the session's own unsaved edits, usually none
+    edit_steps_data = storage.apply_action_changes(st.session_state.steps_data, st.session_state.pending_action_edits)
+    if st.session_state.pending_action_edits:
+        log.debug("Unsaved action edits in session", actions=sorted(st.session_state.pending_action_edits))
     
     if "editing_action" not in st.session_state:
         st.session_state.editing_action = None
@@ -1159,16 +1298,20 @@ if selected_tab == "edit":
         KROKY_CUSTOM_PATH
     )
 
-    print(f"[DEBUG] EDIT_ACTIONS_PAGE base_count: {base_count}")
-    print(f"[DEBUG] EDIT_ACTIONS_PAGE custom_count: {custom_count}")
-    print(f"[DEBUG] EDIT_ACTIONS_PAGE pending_count: {pending_count}")
-    print(f"[DEBUG] EDIT_ACTIONS_PAGE pending_keys: {pending_keys}")
+    log.debug(
+        "Edit actions page",
+        project=st.session_state.selected_project,
+        base_count=base_count,
+        custom_count=custom_count,
+        pending_count=pending_count,
+        pending_keys=pending_keys,
+    )
 
 
     with left:
         st.text_area(
             "All actions:",
-            value="\n".join(sorted(st.session_state.edit_steps_data.keys())),
+            value="\n".join(sorted(edit_steps_data.keys())),
             height=150,
             disabled=True
         )
@@ -1180,6 +1323,9 @@ if selected_tab == "edit":
         st.write(f"**Actions in kroky.json:** {base_count}")
         st.write(f"**Actions in kroky_custom.json:** {custom_count}")
         st.write(f"**Pending changes:** {pending_count}")
+        if pending_count and st.button("📤 Commit & push overrides", key="queue_overrides_push"):
+            gitqueue.enqueue(KROKY_CUSTOM_PATH, f"Update action overrides ({pending_count} actions)")
+        render_git_queue_status()
     
     # the initialization and controls above already handle everything;
     # drop the duplicated commit/count/debugging section to keep UI clean.
@@ -1261,13 +1407,12 @@ if selected_tab == "edit":
                     else:
                         # Save to kroky.json IMMEDIATELY before page refresh
                         action_key = action_name.strip()
-                        st.session_state.edit_steps_data[action_key] = {
-                            "description": action_desc.strip(),
-                            "steps": st.session_state.new_steps.copy()
-                        }
                         # CRITICAL: Save to disk BEFORE st.rerun()
                         # This ensures data persists even if session_state resets
-                        save_ui_overrides(st.session_state.edit_steps_data)
+                        save_ui_overrides({action_key: {
+                            "description": action_desc.strip(),
+                            "steps": st.session_state.new_steps.copy()
+                        }})
                         
                         st.success(f"✅ Action '{action_name}' saved to UI overrides!")
                         st.session_state.new_action = False
@@ -1285,12 +1430,12 @@ if selected_tab == "edit":
     # ---------- EXISTING ACTIONS LIST ----------
     st.subheader("📝 Existing Actions")
     
-    if st.session_state.edit_steps_data:
-        for action in sorted(st.session_state.edit_steps_data.keys()):
-            content = st.session_state.edit_steps_data[action]
-            description = content.get("description", "No description") if isinstance(content, dict) else "No description"
-            steps = content.get("steps", []) if isinstance(content, dict) else content
-            step_count = len(steps)
+    if edit_steps_data:
+        for action in sorted(edit_steps_data.keys()):
+            # description from the index, the action itself is loaded only for editing
+            description = storage.summary_of(edit_steps_data, action)["description"] or "No description"
+            metadata = get_action_metadata(action)
+            step_count = metadata["step_count"] if metadata else 0
             
             col_action, col_edit, col_delete = st.columns([3, 1, 1])
             
@@ -1312,12 +1457,7 @@ if selected_tab == "edit":
             # Delete confirmation
             if st.session_state.get("delete_action") == action:
                 # Count scenarios using this action
-                affected_count = 0
-                for project_data in st.session_state.projects.values():
-                    if isinstance(project_data, dict) and "scenarios" in project_data:
-                        for scenario in project_data["scenarios"]:
-                            if scenario.get("akce") == action:
-                                affected_count += 1
+                affected_count = count_scenarios_with_action(st.session_state.projects, action)
                 
                 if affected_count > 0:
                     st.warning(f"⚠️ {affected_count} test case(s) use this action! Deleting will remove their steps.")
@@ -1327,17 +1467,11 @@ if selected_tab == "edit":
                 with col_confirm:
                     if st.button("Yes, delete", key=f"confirm_del_{action}"):
                         # Remove action from kroky.json
-                        del st.session_state.edit_steps_data[action]
                         # use helper to persist steps data
-                        save_ui_overrides(st.session_state.edit_steps_data)
+                        save_ui_overrides({action: None})
                         
                         # Clear steps from all affected scenarios
-                        for project_data in st.session_state.projects.values():
-                            if isinstance(project_data, dict) and "scenarios" in project_data:
-                                for scenario in project_data["scenarios"]:
-                                    if scenario.get("akce") == action:
-                                        scenario["kroky"] = []
-                        save_and_update_projects(st.session_state.projects)
+                        commit_projects(storage.op_update_scenarios_by_action(action, lambda scenario: scenario.update(scenario_step_fields([]))))
                         
                         st.success(f"✅ Action '{action}' updated in UI overrides!")
                         if affected_count > 0:
@@ -1354,7 +1488,7 @@ if selected_tab == "edit":
     # ---------- EDIT EXISTING ACTION ----------
     if st.session_state.editing_action:
         action = st.session_state.editing_action
-        content = st.session_state.edit_steps_data.get(action, {})
+        content = edit_steps_data.get(action, {})
         description = content.get("description", "") if isinstance(content, dict) else ""
         steps = content.get("steps", []) if isinstance(content, dict) else content
         
@@ -1423,16 +1557,20 @@ if selected_tab == "edit":
                     elif not st.session_state[f"edit_steps_{action}"]:
                         st.error("Action must have at least one step")
                     else:
-                        st.session_state.edit_steps_data[action] = {
+                        # helper updates file and session_state
+                        save_ui_overrides({action: {
                             "description": new_desc.strip(),
                             "steps": st.session_state[f"edit_steps_{action}"].copy()
-                        }
-                        # helper updates file and session_state
-                        save_ui_overrides(st.session_state.edit_steps_data)
+                        }})
                         
                         # 🔄 Propagate changes to all scenarios using this action
-                        updated = update_scenarios_with_action_steps(st.session_state.projects, st.session_state.steps_data, action)
-                        save_and_update_projects(st.session_state.projects)
+                        action_steps = st.session_state.steps_data.get(action, {})
+                        action_steps = action_steps.get("steps", []) if isinstance(action_steps, dict) else action_steps
+                        metadata = get_action_metadata(action)
+                        commit_projects(storage.op_update_scenarios_by_action(
+                            action, lambda scenario: scenario.update(scenario_step_fields(copy.deepcopy(action_steps), metadata))
+                        ))
+                        updated = count_scenarios_with_action(st.session_state.projects, action)
                         
                         st.success(f"✅ Action '{action}' deleted from UI overrides!")
                         if updated > 0:
@@ -1488,8 +1626,8 @@ if selected_tab == "text":
     col_buttons = st.columns([1, 1, 1, 4])
 
     def remove_diacritics_action():
-        st.session_state.text1_area = remove_diacritics(st.session_state.get('text1_area', ''))
-        st.session_state.text2_area = remove_diacritics(st.session_state.get('text2_area', ''))
+        st.session_state.text1_area = textnorm.remove_diacritics(st.session_state.get('text1_area', ''))
+        st.session_state.text2_area = textnorm.remove_diacritics(st.session_state.get('text2_area', ''))
         st.session_state.comparator_message = '✅ Diacritics removed from both texts'
 
     def reset_action():
@@ -1550,10 +1688,11 @@ if selected_tab == "text":
                 return f'<span style="background-color: #ff4444; color: white; font-weight: bold; padding: 1px 3px; border-radius: 3px;">{displayed}</span>'
 
             def highlight_differences(text1: str, text2: str, side: str) -> str:
-                sm = difflib.SequenceMatcher(None, text1, text2)
+                with diagnostics.timed("diff"):
+                    opcodes = difflib.SequenceMatcher(None, text1, text2).get_opcodes()
                 html = ''
 
-                for tag, i1, i2, j1, j2 in sm.get_opcodes():
+                for tag, i1, i2, j1, j2 in opcodes:
                     if side == 'left':
                         if tag == 'equal':
                             html += format_segment(text1, i1, i2, False)
@@ -1609,10 +1748,11 @@ if selected_tab == "text":
                     unsafe_allow_html=True
                 )
             
-            sm = difflib.SequenceMatcher(None, text1, text2)
-            matches = sum(block.size for block in sm.get_matching_blocks())
-            total = max(len(text1), len(text2)) if max(len(text1), len(text2)) > 0 else 1
-            similarity = sm.ratio() * 100
+            with diagnostics.timed("diff"):
+                sm = difflib.SequenceMatcher(None, text1, text2)
+                matches = sum(block.size for block in sm.get_matching_blocks())
+                total = max(len(text1), len(text2)) if max(len(text1), len(text2)) > 0 else 1
+                similarity = sm.ratio() * 100
             
             st.markdown("---")
             st.subheader("📈 Similarity Analysis")
@@ -1640,4 +1780,8 @@ if selected_tab == "text":
                 st.error(f"Texts are very different ({similarity:.1f}% match)")
             
         else:
-            st.warning("Please enter text in both fields to compare.")
\ No newline at end of file
+            st.warning("Please enter text in both fields to compare.")
+
+finished_run = diagnostics.finish_rerun()
+if DIAGNOSTICS_ENABLED and finished_run and "profile" in finished_run:
+    st.rerun()  # show the captured profile right away
@@ -0,0 +1,203 @@
+"""
+Benchmark of the core pipeline on synthetic data.
+
+    python -m benchmarks.bench_core --sizes small medium --repeat 5 --importtime --output bench.json
+
+Every size preset from benchmarks.synthetic.SIZES gets its own temporary data
+directory. Results are printed as a table and optionally written as JSON that
+benchmarks.compare can diff against an earlier run.
+"""
+import argparse
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import compress
+import core
+import pipeline
+import storage
+from benchmarks import synthetic
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """Run func `repeat` times, setup() (untimed) before each run feeds its arguments"""
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "runs": repeat,
+    }
+
+
+def bench_size(name: str, size: dict, repeat: int) -> dict:
+    """All core benchmarks for one dataset size, {benchmark: stats}"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as tmp:
+        paths = synthetic.write_dataset(Path(tmp), **size)
+        base_steps = core.load_json(paths["kroky"])
+        overrides = core.load_json(paths["kroky_custom"])
+        projects = core.load_json(paths["projects"])
+        effective = core.build_effective_steps(base_steps, overrides)
+        scenarios = [s for p in projects.values() for s in p["scenarios"]]
+        sentences = [s["veta"] for s in scenarios[:500]]
+        first_project = next(iter(projects))
+        action = next(iter(effective))
+        out_path = Path(tmp) / "projects_out.json"
+
+        results["load_json.projects"] = measure(lambda: core.load_json(paths["projects"]), repeat)
+        results["load_json.kroky"] = measure(lambda: core.load_json(paths["kroky"]), repeat)
+        # the app and the CLI read the per-action catalogue migrated from kroky.json
+        catalogue_dir = paths["kroky"].with_suffix("")
+        storage.ensure_catalogue(catalogue_dir)
+        results["save_json.projects"] = measure(lambda: core.save_json(out_path, projects), repeat)
+        results["load_effective_steps"] = measure(
+            lambda: core.load_effective_steps(catalogue_dir, paths["kroky_custom"]), repeat
+        )
+        results["build_overrides_from_effective"] = measure(
+            lambda: core.build_overrides_from_effective(base_steps, effective), repeat
+        )
+        results["detect_action"] = measure(
+            lambda: [core.detect_action(sentence, effective) for sentence in sentences], repeat
+        )
+        results["build_test_name"] = measure(
+            lambda: [core.build_test_name(idx, sentence) for idx, sentence in enumerate(sentences, 1)], repeat
+        )
+        results["pipeline.iter_scenarios"] = measure(
+            lambda: list(pipeline.iter_scenarios(sentences, effective, mode="serial")), repeat
+        )
+        results["analyze_scenarios"] = measure(lambda: core.analyze_scenarios(scenarios), repeat)
+        # Test Cases list: the table is built once per revision, filtering and paging run on every rerun
+        results["scenario_table.build"] = measure(lambda: core.build_scenario_table(projects[first_project]), repeat)
+        table = core.build_scenario_table(projects[first_project])
+        results["scenario_table.filter_page"] = measure(
+            lambda: core.scenario_table_page(
+                table, core.filter_scenario_rows(table, {"Segment": ["B2C"]}, "shop", "Steps", True), 1, 50
+            ),
+            repeat,
+        )
+        results["update_scenarios_with_action_steps"] = measure(
+            core.update_scenarios_with_action_steps,
+            repeat,
+            setup=lambda: (copy.deepcopy(projects), effective, action),
+        )
+        results["export_to_excel"] = measure(
+            lambda: core.export_to_excel(first_project, projects, use_cache=False), repeat
+        )
+
+        # size / load time of the projects file per compression (TESTOOL_COMPRESSION)
+        for codec in compress.available():
+            packed_path = Path(tmp) / f"projects_packed.json{compress.SUFFIXES[codec]}"
+            results[f"write_json.{codec}"] = measure(
+                lambda: storage.write_json_atomic(packed_path, projects, codec), repeat
+            )
+            results[f"read_json.{codec}"] = {
+                **measure(lambda: storage.read_json(packed_path), repeat),
+                "bytes": packed_path.stat().st_size,
+            }
+
+        # cold start (empty process caches): every project and action, JSON vs warm-start snapshots
+        store_dir = Path(tmp) / "projects"
+        storage.ensure_project_store(store_dir)
+
+        def cold_start():
+            loaded = storage.load_projects(store_dir)
+            for project_name in loaded:
+                loaded[project_name]
+            steps = core.load_effective_steps(catalogue_dir, paths["kroky_custom"])
+            for action_name in steps:
+                steps[action_name]
+            core.load_action_metadata(catalogue_dir, paths["kroky_custom"])
+
+        snapshot_enabled = storage.SNAPSHOT_ENABLED
+        try:
+            storage.SNAPSHOT_ENABLED = False
+            results["startup.json"] = measure(cold_start, repeat, setup=cold_caches)
+            storage.SNAPSHOT_ENABLED = True
+            cold_caches()
+            cold_start()  # writes the snapshots
+            results["startup.snapshot"] = measure(cold_start, repeat, setup=cold_caches)
+        finally:
+            storage.SNAPSHOT_ENABLED = snapshot_enabled
+    return results
+
+
+def cold_caches() -> tuple:
+    """setup for measure - the state of a freshly started process"""
+    storage.invalidate_cache()
+    return ()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(sizes, repeat: int, importtime: bool = False) -> dict:
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "sizes": {},
+    }
+    for name in sizes:
+        size = synthetic.SIZES[name]
+        report["sizes"][name] = {"params": size, "results": bench_size(name, size, repeat)}
+    if importtime:
+        from benchmarks import importtime as importtime_bench
+
+        report["sizes"]["importtime"] = importtime_bench.run(repeat=repeat)
+    return report
+
+
+def print_report(report: dict):
+    for name, entry in report["sizes"].items():
+        params = ", ".join(f"{key}={value}" for key, value in entry["params"].items())
+        print(f"\n== {name} ({params})")
+        print(f"{'benchmark':<40} {'min ms':>10} {'median ms':>10} {'size KB':>10}")
+        if name == "importtime":
+            print("(cold import in a fresh interpreter)")
+        for bench, stats in entry["results"].items():
+            size = f"{stats['bytes'] / 1024:>10.0f}" if "bytes" in stats else ""
+            print(f"{bench:<40} {stats['min'] * 1000:>10.2f} {stats['median'] * 1000:>10.2f} {size}".rstrip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the core pipeline on synthetic data")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(synthetic.SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="also report cold import times")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.importtime)
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
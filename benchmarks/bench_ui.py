@@ -0,0 +1,288 @@
+"""
+Headless render benchmark of app.py using Streamlit's AppTest.
+
+    python -m benchmarks.bench_ui --sizes small medium --output bench_ui.json
+
+For every size preset the application modules are copied into a temporary
+directory next to a synthetic data/ folder, and a worker process scripts the
+common interactions (select project, add test case, switch tabs, edit action,
+export, compare texts). Each interaction records the wall time of every rerun
+(plus, for the export, the wait for the background job to finish) and the
+number of data file reads and writes it caused.
+"""
+import argparse
+import builtins
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import synthetic
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RERUN_TIMEOUT = 600
+
+
+# ---------- DISK I/O COUNTING ----------
+class IOCounter:
+    """
+    Data file reads (the storage layer's file.reads counter - every JSON or
+    snapshot read goes through it) and replaces/opens for writing under data_dir
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = str(Path(data_dir).resolve())
+        self.writes = 0
+        self._reads_base = 0
+
+    @property
+    def reads(self) -> int:
+        import diagnostics  # the copy's modules (cwd), like storage in worker()
+        return diagnostics.totals()["counters"].get("file.reads", 0) - self._reads_base
+
+    def _is_data_file(self, path) -> bool:
+        if isinstance(path, int):
+            return False
+        path = os.path.abspath(os.fspath(path))
+        return path.startswith(self.data_dir) and not path.endswith(".lock")
+
+    def snapshot(self) -> tuple:
+        return self.reads, self.writes
+
+    @contextmanager
+    def installed(self):
+        original_open = builtins.open
+        original_replace = os.replace
+        self._reads_base += self.reads
+
+        def counting_open(file, mode="r", *args, **kwargs):
+            if self._is_data_file(file) and any(flag in mode for flag in "wax+"):
+                self.writes += 1
+            return original_open(file, mode, *args, **kwargs)
+
+        def counting_replace(src, dst, *args, **kwargs):
+            if self._is_data_file(dst):
+                self.writes += 1
+            return original_replace(src, dst, *args, **kwargs)
+
+        builtins.open = counting_open
+        os.replace = counting_replace
+        try:
+            yield self
+        finally:
+            builtins.open = original_open
+            os.replace = original_replace
+
+
+# ---------- INTERACTIONS ----------
+def button_by_label(at, label):
+    labels = [button.label for button in at.button]
+    return at.button[labels.index(label)]
+
+
+class Recorder:
+    """Wraps AppTest._run (behind at.run() and element.run()) to time each rerun"""
+
+    def __init__(self, at, counter: IOCounter):
+        self.at = at
+        self.counter = counter
+        self.results = {}
+
+    @contextmanager
+    def interaction(self, name: str):
+        reruns = []
+        self.waits = []
+        reads, writes = self.counter.snapshot()
+        original_run = self.at._run
+
+        def timed_run(*args, **kwargs):
+            start = time.perf_counter()
+            result = original_run(*args, **kwargs)
+            reruns.append(time.perf_counter() - start)
+            return result
+
+        self.at._run = timed_run
+        try:
+            yield self.at
+        finally:
+            self.at._run = original_run
+        if self.at.exception:
+            raise RuntimeError(f"{name}: {self.at.exception[0].value}")
+        self.results[name] = {
+            "reruns": reruns,
+            "wall": sum(reruns) + sum(self.waits),
+            "reads": self.counter.reads - reads,
+            "writes": self.counter.writes - writes,
+        }
+
+
+    def wait_until(self, done, interval: float = 0.05):
+        """Polls done() between reruns; the wait counts toward the interaction's wall time"""
+        start = time.perf_counter()
+        while not done():
+            if time.perf_counter() - start > RERUN_TIMEOUT:
+                raise TimeoutError(f"still waiting after {RERUN_TIMEOUT} s")
+            time.sleep(interval)
+        self.waits.append(time.perf_counter() - start)
+
+
+def export_finished(at) -> bool:
+    """The session's export job has finished (jobs runs in this process)"""
+    import jobs  # the copy's modules (cwd)
+
+    job = jobs.status(at.session_state["export_job"])
+    if job is not None and job["status"] in (jobs.FAILED, jobs.CANCELLED):
+        raise RuntimeError(f"export: job {job['status']}: {job['error']}")
+    return job is None or job["status"] == jobs.DONE
+
+
+def run_interactions(app_path: Path, project: str, action: str, counter: IOCounter) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(app_path), default_timeout=RERUN_TIMEOUT)
+    recorder = Recorder(at, counter)
+
+    with recorder.interaction("initial_load") as at:
+        at.run()
+    with recorder.interaction("select_project") as at:
+        at.selectbox(key="project_select").select(project).run()
+    with recorder.interaction("add_test_case") as at:
+        sentence = next(area for area in at.text_area if area.label == "Requirement Sentence")
+        sentence.input(f"B2C SHOP dsl benchmark {action.lower()}")
+        button_by_label(at, "➕ Add Test Case").click().run()
+    with recorder.interaction("switch_to_actions") as at:
+        at.button(key="nav_edit").click().run()
+    with recorder.interaction("edit_action") as at:
+        at.button(key=f"edit_{action}").click().run()
+        at.text_input(key=f"desc_{action}").input("benchmark description")
+        button_by_label(at, "💾 Save Changes").click().run()
+    with recorder.interaction("switch_to_test_cases") as at:
+        at.button(key="nav_build").click().run()
+    with recorder.interaction("export") as at:
+        button_by_label(at, "💾 Export Test Cases to Excel").click().run()
+        # the click only queues the job - time it until the workbook is ready to download
+        recorder.wait_until(lambda: export_finished(at))
+        at.run()
+    with recorder.interaction("compare_texts") as at:
+        at.button(key="nav_text").click().run()
+        at.text_area(key="text1_area").input("Aktivace služby DSL pro zákazníka")
+        at.text_area(key="text2_area").input("Aktivace sluzby FIBER pro zakaznika")
+        button_by_label(at, "🔍 **Compare**").click().run()
+    return recorder.results
+
+
+def worker(size_name: str, repeat: int, output: Path):
+    """Runs inside the prepared copy (cwd) - one fresh AppTest session per repeat"""
+    app_dir = Path.cwd()
+    data_dir = app_dir / "data"
+    import storage  # the copy's modules (cwd)
+
+    # migrate the synthetic projects.json and kroky.json up front, not inside the first measured run
+    projects = storage.load_projects(data_dir / "projects")
+    steps = storage.load_catalogue(data_dir / "kroky")
+    project = next(iter(projects))
+    action = next(iter(steps))
+
+    runs = []
+    counter = IOCounter(data_dir)
+    with counter.installed():
+        for _ in range(repeat):
+            runs.append(run_interactions(app_dir / "app.py", project, action, counter))
+    output.write_text(json.dumps({"size": size_name, "runs": runs}), encoding="utf-8")
+
+
+# ---------- DRIVER ----------
+def prepare_copy(target: Path, size: dict):
+    """Application modules + synthetic data/ in target"""
+    for module in REPO_DIR.glob("*.py"):
+        shutil.copy2(module, target / module.name)
+    shutil.copytree(REPO_DIR / "benchmarks", target / "benchmarks", ignore=shutil.ignore_patterns("__pycache__"))
+    synthetic.write_dataset(target / "data", **size)
+
+
+def summarize(runs: list) -> dict:
+    """Median over repeats per interaction - the first run also pays the cold start"""
+    summary = {}
+    for name in runs[0]:
+        entries = [run[name] for run in runs]
+        summary[name] = {
+            "median": statistics.median(entry["wall"] for entry in entries),
+            "wall_first": entries[0]["wall"],
+            "reruns": len(entries[0]["reruns"]),
+            "rerun_max": max(max(entry["reruns"]) for entry in entries),
+            "reads": entries[-1]["reads"],
+            "writes": entries[-1]["writes"],
+            "reads_first": entries[0]["reads"],
+        }
+    return summary
+
+
+def bench_size(name: str, size: dict, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"bench_ui_{name}_") as tmp:
+        tmp = Path(tmp)
+        prepare_copy(tmp, size)
+        output = tmp / "result.json"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ui", "--worker", name,
+             "--repeat", str(repeat), "--output", str(output)],
+            cwd=tmp, check=True, stdout=subprocess.DEVNULL,
+        )
+        runs = json.loads(output.read_text(encoding="utf-8"))["runs"]
+    return summarize(runs)
+
+
+def print_report(report: dict):
+    for name, entry in report["sizes"].items():
+        params = ", ".join(f"{key}={value}" for key, value in entry["params"].items())
+        print(f"\n== {name} ({params})")
+        print(f"{'interaction':<24} {'median ms':>10} {'first ms':>10} {'reruns':>7} {'reads':>6} {'writes':>7}")
+        for interaction, stats in entry["results"].items():
+            print(
+                f"{interaction:<24} {stats['median'] * 1000:>10.1f} {stats['wall_first'] * 1000:>10.1f} "
+                f"{stats['reruns']:>7} {stats['reads']:>6} {stats['writes']:>7}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app.py reruns with Streamlit AppTest")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(synthetic.SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker(args.worker, args.repeat, Path(args.output))
+        return 0
+
+    from benchmarks.bench_core import git_revision
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for name in args.sizes:
+        size = synthetic.SIZES[name]
+        report["sizes"][name] = {"params": size, "results": bench_size(name, size, args.repeat)}
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Compare two bench_core or bench_ui JSON results.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+
+Exits with 1 when a benchmark's median got slower than the threshold (20 % by default).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Rows (size, benchmark, baseline median, current median, ratio, regressed)"""
+    rows = []
+    for size, entry in current.get("sizes", {}).items():
+        base_entry = baseline.get("sizes", {}).get(size)
+        if not base_entry:
+            continue
+        for bench, stats in entry["results"].items():
+            base_stats = base_entry["results"].get(bench)
+            if not base_stats or not base_stats["median"]:
+                continue
+            ratio = stats["median"] / base_stats["median"]
+            rows.append((size, bench, base_stats["median"], stats["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20 %%")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    rows = compare(baseline, current, args.threshold)
+
+    print(f"baseline {baseline.get('git_revision', '?')} -> current {current.get('git_revision', '?')}")
+    print(f"{'size':<8} {'benchmark':<40} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for size, bench, base, now, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{size:<8} {bench:<40} {base * 1000:>10.2f} {now * 1000:>10.2f} {ratio:>7.2f}{flag}")
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
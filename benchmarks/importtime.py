@@ -0,0 +1,107 @@
+"""
+Import-time report based on python -X importtime.
+
+    python -m benchmarks.importtime --repeat 3
+
+Imports each target in a fresh interpreter (cold start) and reports the
+cumulative import time of the target and its heaviest dependencies. app.py is
+imported from a temporary copy next to synthetic data (Streamlit bare mode).
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import synthetic
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TARGETS = ["storage", "core", "main_script", "app"]
+HEAVIEST = 8
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output, children before parents"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def direct_imports(modules: list, target: str) -> list:
+    """[(module, cumulative_us)] imported directly by target"""
+    idx = next(i for i, entry in enumerate(modules) if entry[0] == target)
+    target_depth = modules[idx][3]
+    children = []
+    for name, _, cumulative, depth in reversed(modules[:idx]):
+        if depth <= target_depth:
+            break
+        if depth == target_depth + 1:
+            children.append((name, cumulative))
+    return children
+
+
+def import_once(target: str, cwd: Path) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_target(target: str, repeat: int, cwd: Path) -> dict:
+    runs = [import_once(target, cwd) for _ in range(repeat)]
+    totals = [next(entry[2] for entry in run if entry[0] == target) / 1e6 for run in runs]
+    # heaviest direct imports in the fastest run
+    best = runs[totals.index(min(totals))]
+    heaviest = sorted(
+        ((name, cumulative / 1e6) for name, cumulative in direct_imports(best, target)),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:HEAVIEST]
+    return {
+        "min": min(totals),
+        "median": statistics.median(totals),
+        "max": max(totals),
+        "runs": repeat,
+        "heaviest": [{"module": name, "seconds": seconds} for name, seconds in heaviest],
+    }
+
+
+def run(targets=TARGETS, repeat: int = 3) -> dict:
+    """Results in the bench_core layout, {"params": ..., "results": {target: stats}}"""
+    from benchmarks.bench_ui import prepare_copy
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_import_") as tmp:
+        prepare_copy(Path(tmp), synthetic.SIZES["small"])
+        for target in targets:
+            results[target] = measure_target(target, repeat, Path(tmp))
+    return {"params": {"targets": len(targets)}, "results": results}
+
+
+def print_report(entry: dict):
+    for target, stats in entry["results"].items():
+        print(f"\n{target}: {stats['min'] * 1000:.0f} ms (median {stats['median'] * 1000:.0f} ms)")
+        for item in stats["heaviest"]:
+            print(f"    {item['module']:<32} {item['seconds'] * 1000:>8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold import time of the entry points")
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    print_report(run(args.targets, args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import random
+from pathlib import Path
+
+import storage
+
+SEGMENTS = ["B2C", "B2B"]
+CHANNELS = ["SHOP", "IL"]
+TECHNOLOGIES = ["DSL", "FIBER", "CABLE", "FWA", "BI", "HLAS"]
+PRIORITIES = ["1-High", "2-Medium", "3-Low"]
+COMPLEXITIES = ["1-Giant", "2-Huge", "3-Big", "4-Medium", "5-Low"]
+WORDS = [
+    "zakaznik", "objednavka", "sluzba", "aktivace", "zmena", "tarifu", "kosik",
+    "adresa", "pripojka", "modem", "smlouva", "faktura", "overeni", "dokonceni",
+]
+
+# Named sizes: actions x steps per action, projects x scenarios per project
+SIZES = {
+    "small": {"actions": 20, "steps": 8, "projects": 5, "scenarios": 20},
+    "medium": {"actions": 100, "steps": 15, "projects": 20, "scenarios": 100},
+    "large": {"actions": 400, "steps": 25, "projects": 50, "scenarios": 400},
+}
+
+
+def _phrase(rng, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def action_name(idx: int) -> str:
+    return f"Akce {idx:04d} - {TECHNOLOGIES[idx % len(TECHNOLOGIES)]}"
+
+
+def generate_steps(actions: int, steps: int, seed: int = 0) -> dict:
+    """kroky.json with `actions` actions of `steps` steps each"""
+    rng = random.Random(seed)
+    return {
+        action_name(idx): {
+            "description": _phrase(rng, 8),
+            "steps": [
+                {"description": _phrase(rng, 12), "expected": _phrase(rng, 6)}
+                for _ in range(steps)
+            ],
+        }
+        for idx in range(actions)
+    }
+
+
+def generate_overrides(steps_data: dict, share: float = 0.1, seed: int = 0) -> dict:
+    """kroky_custom.json editing, deleting and adding roughly `share` of the actions"""
+    rng = random.Random(seed + 1)
+    names = list(steps_data)
+    picked = rng.sample(names, max(1, int(len(names) * share)))
+    overrides = {}
+    for idx, name in enumerate(picked):
+        if idx % 3 == 0:
+            overrides[name] = {"_status": "deleted"}
+        else:
+            payload = dict(steps_data[name])
+            payload["description"] = _phrase(rng, 8)
+            overrides[name] = {"_status": "modified", **payload}
+    for idx in range(max(1, len(picked) // 3)):
+        overrides[f"Nova akce {idx:03d}"] = {
+            "_status": "added",
+            "description": _phrase(rng, 8),
+            "steps": [{"description": _phrase(rng, 12), "expected": _phrase(rng, 6)}],
+        }
+    return overrides
+
+
+def generate_sentence(rng, action: str) -> str:
+    return (
+        f"{rng.choice(SEGMENTS)} {rng.choice(CHANNELS)} {rng.choice(TECHNOLOGIES).lower()} "
+        f"{_phrase(rng, 4)} {action.lower()}"
+    )
+
+
+def generate_projects(projects: int, scenarios: int, steps_data: dict, seed: int = 0) -> dict:
+    """projects.json with `projects` projects of `scenarios` scenarios using actions from steps_data"""
+    rng = random.Random(seed + 2)
+    actions = list(steps_data)
+    data = {}
+    for p_idx in range(projects):
+        project_scenarios = []
+        for _ in range(scenarios):
+            action = rng.choice(actions)
+            sentence = generate_sentence(rng, action)
+            project_scenarios.append({
+                "test_name": f"{rng.choice(CHANNELS)}_{rng.choice(SEGMENTS)}_{sentence.capitalize()}",
+                "akce": action,
+                "segment": rng.choice(SEGMENTS),
+                "kanal": rng.choice(CHANNELS),
+                "priority": rng.choice(PRIORITIES),
+                "complexity": rng.choice(COMPLEXITIES),
+                "veta": sentence,
+                "kroky": [dict(step) for step in steps_data[action]["steps"]],
+            })
+        data[f"PRJ-{p_idx:04d} - synthetic"] = {
+            "subject": "UAT2\\Synthetic\\",
+            "scenarios": project_scenarios,
+            "revision": 1,
+        }
+    return data
+
+
+def write_dataset(data_dir, actions: int, steps: int, projects: int, scenarios: int, seed: int = 0) -> dict:
+    """
+    Write kroky.json, kroky_custom.json and projects.json into data_dir.
+    Returns {"kroky": path, "kroky_custom": path, "projects": path}.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    steps_data = generate_steps(actions, steps, seed)
+    paths = {
+        "kroky": data_dir / "kroky.json",
+        "kroky_custom": data_dir / "kroky_custom.json",
+        "projects": data_dir / "projects.json",
+    }
+    storage.write_json_atomic(paths["kroky"], steps_data)
+    storage.write_json_atomic(paths["kroky_custom"], generate_overrides(steps_data, seed=seed))
+    storage.write_json_atomic(paths["projects"], generate_projects(projects, scenarios, steps_data, seed))
+    return paths
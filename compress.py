@@ -0,0 +1,152 @@
+"""
+gzip / zstd compression of data and archive files, detected by magic bytes.
+
+    payload = compress.encode(raw, compress.GZIP)
+    raw = compress.decode(payload)            # plain bytes pass through
+    with compress.open_read(path) as f: ...   # decompressed binary stream
+
+Readers never look at the file name, so a plain, gzip and zstd file are
+read the same way. zstd needs the zstandard package (or Python 3.14's
+compression.zstd); gzip is always available.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import logs
+
+try:
+    from compression import zstd as _stdlib_zstd  # Python 3.14+
+except ImportError:
+    _stdlib_zstd = None
+try:
+    import zstandard
+except ImportError:  # zstandard is optional - zstd falls back to gzip for writing
+    zstandard = None
+
+log = logs.get_logger("compress")
+
+NONE, GZIP, ZSTD = "none", "gzip", "zstd"
+CODECS = (NONE, GZIP, ZSTD)
+SUFFIXES = {NONE: "", GZIP: ".gz", ZSTD: ".zst"}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+class CompressionError(Exception):
+    """A compressed file cannot be read here (codec not installed)"""
+
+
+def zstd_available() -> bool:
+    return _stdlib_zstd is not None or zstandard is not None
+
+
+def available() -> list:
+    """Codecs that can be written here"""
+    return [codec for codec in CODECS if codec != ZSTD or zstd_available()]
+
+
+def configured(codec: str) -> str:
+    """Validated codec name; zstd without a zstd module falls back to gzip"""
+    codec = (codec or NONE).lower()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression '{codec}', expected one of {', '.join(CODECS)}")
+    if codec == ZSTD and not zstd_available():
+        log.warning("zstd is not installed, compressing with gzip instead")
+        return GZIP
+    return codec
+
+
+# Compression of the project shards and retired data files (TESTOOL_COMPRESSION)
+DATA_COMPRESSION = configured(os.environ.get("TESTOOL_COMPRESSION", NONE))
+
+
+def detect(head: bytes) -> str:
+    """Codec of content starting with head"""
+    if head.startswith(GZIP_MAGIC):
+        return GZIP
+    if head.startswith(ZSTD_MAGIC):
+        return ZSTD
+    return NONE
+
+
+def _require_zstd():
+    if not zstd_available():
+        raise CompressionError("The file is zstd-compressed - install the zstandard package to read it")
+
+
+def encode(payload: bytes, codec: str) -> bytes:
+    if codec == GZIP:
+        # mtime=0 - the same content always gives the same bytes
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == ZSTD:
+        _require_zstd()
+        if _stdlib_zstd is not None:
+            return _stdlib_zstd.compress(payload, level=ZSTD_LEVEL)
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return payload
+
+
+def decode(raw: bytes) -> bytes:
+    codec = detect(raw[:4])
+    if codec == GZIP:
+        return gzip.decompress(raw)
+    if codec == ZSTD:
+        _require_zstd()
+        if _stdlib_zstd is not None:
+            return _stdlib_zstd.decompress(raw)
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+
+def open_read(filepath):
+    """Binary file object of the decompressed content - for streaming large files"""
+    with open(filepath, "rb") as f:
+        codec = detect(f.read(4))
+    if codec == GZIP:
+        return gzip.open(filepath, "rb")
+    if codec == ZSTD:
+        _require_zstd()
+        if _stdlib_zstd is not None:
+            return _stdlib_zstd.open(filepath, "rb")
+        return zstandard.ZstdDecompressor().stream_reader(open(filepath, "rb"), closefd=True)
+    return open(filepath, "rb")
+
+
+def _open_write(filepath, codec: str):
+    if codec == GZIP:
+        return gzip.GzipFile(filepath, "wb", compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == ZSTD:
+        _require_zstd()
+        if _stdlib_zstd is not None:
+            return _stdlib_zstd.open(filepath, "wb", level=ZSTD_LEVEL)
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(filepath, "wb"), closefd=True)
+    return open(filepath, "wb")
+
+
+def compress_file(source, codec: str, target=None) -> Path:
+    """
+    Streamed copy of source compressed with codec (default target: source +
+    suffix), then source is removed. Returns the target path.
+    """
+    source = Path(source)
+    target = Path(target) if target else source.with_name(source.name + SUFFIXES[codec])
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        with open_read(source) as src, _open_write(tmp_name, codec) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if target != source:
+        source.unlink()
+    return target
@@ -1,18 +1,30 @@
-import json
 import re
-import pandas as pd
 from pathlib import Path
 import copy
 from datetime import datetime
-import unicodedata
+
+import export_cache
+import logs
+import storage
+from textnorm import clean_tc_name, fold_diacritics
+from diagnostics import instrument, timed
+
+log = logs.get_logger("core")
 
 # ---------- PATHS ----------
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 EXPORTS_DIR = BASE_DIR / "exports"
 
-KROKY_PATH = DATA_DIR / "kroky.json"
-PROJECTS_PATH = DATA_DIR / "projects.json"
+# one file per action + index.json; kroky.json is the older single-file
+# catalogue, migrated automatically on first use
+KROKY_DIR = DATA_DIR / "kroky"
+KROKY_PATH = storage.legacy_catalogue_path(KROKY_DIR)
+KROKY_CUSTOM_PATH = DATA_DIR / "kroky_custom.json"
+# one shard per project + manifest.json; projects.json is the older
+# single-file format, migrated automatically on first use
+PROJECTS_DIR = DATA_DIR / "projects"
+PROJECTS_PATH = storage.legacy_projects_path(PROJECTS_DIR)
 
 # Create directories if they don't exist
 DATA_DIR.mkdir(exist_ok=True)
@@ -22,6 +34,7 @@ EXPORTS_DIR.mkdir(exist_ok=True)
 SYSTEM_APPLICATION = "Siebel_CZ"
 TEST_TYPE = "Manual"
 TEST_PHASE = "4-User Acceptance"
+DEFAULT_SUBJECT = "UAT2\\Antosova\\"
 
 PRIORITY_MAP = {
     "1": "1-High",
@@ -41,25 +54,29 @@ COMPLEXITY_MAP = {
 def load_json(filepath):
     """Safe JSON loading"""
     try:
-        if filepath.exists():
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return storage.read_json(filepath)
     except Exception as e:
-        print(f"Error loading {filepath}: {e}")
+        log.error("Error loading JSON", path=str(filepath), error=str(e))
     return {}
 
+def load_projects(store_dir=PROJECTS_DIR):
+    """{name: project} - only the manifest is read, each project on first access"""
+    return storage.load_projects(store_dir)
+
 def save_json(filepath, data):
     """Safe JSON saving"""
     try:
-        filepath.parent.mkdir(exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        storage.write_json_atomic(filepath, data)
         return True
     except Exception as e:
-        print(f"Error saving {filepath}: {e}")
+        log.error("Error saving JSON", path=str(filepath), error=str(e))
         return False
 
 # ---------- TEXT PROCESSING ----------
+# Shared by the Streamlit app and the CLI (main_script.py);
+# the text normalization helpers live in textnorm
+_BI_WORD_RE = re.compile(r"\bbi\b")
+
 def extract_channel(text: str) -> str:
     """Extract channel from text"""
     t = text.lower()
@@ -85,7 +102,7 @@ def extract_technology(text: str) -> str:
         return "HLAS"
     if "fwa" in t and "bisi" in t:
         return "FWA_BISI"
-    if "fwa" in t and re.search(r"\bbi\b", t):
+    if "fwa" in t and _BI_WORD_RE.search(t):
         return "FWA_BI"
     for key in ["dsl", "fiber", "cable"]:
         if key in t:
@@ -101,25 +118,47 @@ def parse_veta(text: str):
     technologie = extract_technology(text)
     return segment, kanal, technologie
 
-def normalize_text(text):
-    """Normalize text for filenames"""
-    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
-    return text.replace(" ", "_").replace("__", "_")
-
 # ---------- TEST CASE GENERATION ----------
-def build_test_name(order: int, sentence: str) -> str:
-    """Build test case name from order and sentence"""
+# Older data has the order number baked into test_name (and an order_no field)
+LEGACY_ORDER_PREFIX_RE = re.compile(r"^\d{3}_")
+
+def build_base_test_name(sentence: str) -> str:
+    """Build test case name without the order prefix (stored in projects.json)"""
     channel = extract_channel(sentence)
     segment = extract_segment(sentence)
     technology = extract_technology(sentence)
     
-    prefix = f"{order:03d}_{channel}_{segment}_{technology}"
+    prefix = f"{channel}_{segment}_{technology}"
     return f"{prefix}_{sentence.strip().capitalize()}"
 
-def detect_action(text: str, steps_data: dict) -> str:
-    """Detect action from text"""
+def build_stored_test_name(sentence: str, kanal: str, segment: str) -> str:
+    """
+    Test name for a test case entered in the app, where channel and segment are
+    chosen explicitly - UNKNOWN parts are left out, no order prefix.
+    """
+    technology = extract_technology(sentence)
+    prefix = "_".join(p for p in [kanal, segment, technology] if p and p != "UNKNOWN")
+    return clean_tc_name(f"{prefix}_{sentence.strip().capitalize()}")
+
+def build_test_name(order: int, sentence: str) -> str:
+    """Build test case name from order and sentence"""
+    return f"{order:03d}_{build_base_test_name(sentence)}"
+
+def stored_test_name(scenario: dict) -> str:
+    """Test name without the order prefix, also for scenarios saved by older versions"""
+    name = scenario.get("test_name", "")
+    if "order_no" in scenario:
+        return LEGACY_ORDER_PREFIX_RE.sub("", name, count=1)
+    return name
+
+def display_test_name(position: int, scenario: dict) -> str:
+    """Name shown and exported - the number always follows the position in the project"""
+    return f"{position:03d}_{stored_test_name(scenario)}"
+
+def detect_action(text: str, steps_data) -> str:
+    """Detect action from text (steps_data: the catalogue or just its action names)"""
     t = text.lower()
-    for action in steps_data.keys():
+    for action in steps_data:
         if action.lower() in t:
             return action
     return None
@@ -128,138 +167,450 @@ def get_steps_from_action(action: str, steps_data: dict):
     """Get steps for specific action (with deep copy)"""
     if action in steps_data:
         action_data = steps_data[action]
-        if isinstance(action_data, dict) and "steps" in action_data:
-            return copy.deepcopy(action_data["steps"])
-        elif isinstance(action_data, list):
-            return copy.deepcopy(action_data)
+        with timed("deepcopy"):
+            if isinstance(action_data, dict) and "steps" in action_data:
+                return copy.deepcopy(action_data["steps"])
+            elif isinstance(action_data, list):
+                return copy.deepcopy(action_data)
     return []
 
 def generate_testcase(project: str, sentence: str, action: str, priority: str, 
-                     complexity: str, steps_data: dict, projects_data: dict):
-    """Generate a new test case"""
-    # Get project data
+                     complexity: str, steps_data: dict, projects_data, metadata: dict = None):
+    """
+    Generate and save a new test case, complexity None means automatic (by step count).
+    metadata is the action's precomputed metadata (derived from steps_data when None).
+    Returns (test_case, latest projects).
+    """
+    operations = []
     if project not in projects_data:
-        projects_data[project] = {
-            "next_id": 1,
-            "subject": "UAT2\\Antosova\\",
-            "scenarios": []
-        }
-    
-    # Get next ID
-    order = projects_data[project]["next_id"]
-    projects_data[project]["next_id"] += 1
-    
-    # Build test case
-    test_name = build_test_name(order, sentence)
-    segment = extract_segment(sentence)
-    channel = extract_channel(sentence)
-    
+        operations.append(storage.op_create_project(project, DEFAULT_SUBJECT, exist_ok=True))
+
+    if metadata is None and action in steps_data:
+        metadata = action_metadata(steps_data[action])
     test_case = {
-        "order_no": order,
-        "test_name": test_name,
+        "test_name": build_base_test_name(sentence),
         "akce": action,
-        "segment": segment,
-        "kanal": channel,
+        "segment": extract_segment(sentence),
+        "kanal": extract_channel(sentence),
         "priority": priority,
-        "complexity": complexity,
+        "complexity": complexity or automatic_complexity(metadata),
         "veta": sentence,
-        "kroky": get_steps_from_action(action, steps_data)
+        **scenario_step_fields(get_steps_from_action(action, steps_data), metadata),
     }
-    
-    # Add to project
-    projects_data[project]["scenarios"].append(test_case)
-    
-    # Save
-    save_json(PROJECTS_PATH, projects_data)
-    
-    return test_case
+    operations.append(storage.op_add_scenario(project, test_case))
+
+    # Save on top of the latest file (other writers may have added test cases)
+    latest, _ = storage.commit_project_operations(
+        PROJECTS_DIR, operations, storage.project_revisions(projects_data)
+    )
+    return latest[project]["scenarios"][-1], latest
 
 # ---------- ACTION MANAGEMENT ----------
+def load_catalogue(catalogue_dir=KROKY_DIR):
+    """Base actions {name: action} - only the index is read, each action on first access"""
+    return storage.load_catalogue(catalogue_dir)
+
+def save_catalogue_actions(changes: dict, catalogue_dir=KROKY_DIR):
+    """Safe catalogue saving - changes: {action: payload, None = delete}"""
+    try:
+        storage.write_catalogue_actions(catalogue_dir, changes)
+        return True
+    except Exception as e:
+        log.error("Error saving actions", path=str(catalogue_dir), error=str(e))
+        return False
+
 def add_new_action(action_name: str, description: str, steps: list):
-    """Add new action to kroky.json"""
-    steps_data = load_json(KROKY_PATH)
-    
-    steps_data[action_name] = {
-        "description": description,
-        "steps": steps
-    }
-    
-    return save_json(KROKY_PATH, steps_data)
+    """Add new action to the base catalogue"""
+    return save_catalogue_actions({action_name: {"description": description, "steps": steps}})
 
 def update_action(action_name: str, description: str, steps: list):
-    """Update existing action in kroky.json"""
-    steps_data = load_json(KROKY_PATH)
-    
-    if action_name in steps_data:
-        steps_data[action_name] = {
-            "description": description,
-            "steps": steps
-        }
-        return save_json(KROKY_PATH, steps_data)
-    
-    return False
+    """Update existing action in the base catalogue"""
+    if action_name not in load_catalogue():
+        return False
+    return save_catalogue_actions({action_name: {"description": description, "steps": steps}})
 
 def delete_action(action_name: str):
-    """Delete action from kroky.json"""
-    steps_data = load_json(KROKY_PATH)
-    
-    if action_name in steps_data:
-        del steps_data[action_name]
-        return save_json(KROKY_PATH, steps_data)
+    """Delete action from the base catalogue"""
+    if action_name not in load_catalogue():
+        return False
+    return save_catalogue_actions({action_name: None})
+
+# ---------- ACTION OVERRIDES ----------
+def normalize_action_payload(action_data):
+    """Return canonical action structure."""
+    if isinstance(action_data, dict):
+        return {
+            "description": action_data.get("description", "").strip(),
+            "steps": copy.deepcopy(action_data.get("steps", []))
+        }
+    elif isinstance(action_data, list):
+        return {
+            "description": "",
+            "steps": copy.deepcopy(action_data)
+        }
+    return {"description": "", "steps": []}
+
+def action_payload_equal(a, b):
+    return normalize_action_payload(a) == normalize_action_payload(b)
+
+def build_effective_steps(base_steps, overrides):
+    """
+    Apply overrides on base steps - untouched actions are shared, not copied.
+    On a catalogue (storage.CatalogueView) the result is a lazy overlay, so
+    untouched actions are not even loaded.
+    """
+    overrides = overrides if isinstance(overrides, dict) else {}
+    if isinstance(base_steps, storage.CatalogueView):
+        changes = {}
+        for action_name, override_data in overrides.items():
+            if not isinstance(override_data, dict):
+                continue
+            status = override_data.get("_status")
+            if status == "deleted":
+                changes[action_name] = None
+            elif status in ("added", "modified"):
+                changes[action_name] = {
+                    "description": override_data.get("description", "").strip(),
+                    "steps": override_data.get("steps", [])
+                }
+        return storage.ActionOverlay(base_steps, changes)
+
+    base_steps = base_steps if isinstance(base_steps, dict) else {}
+    effective = dict(base_steps)
+
+    for action_name, override_data in overrides.items():
+        if not isinstance(override_data, dict):
+            continue
+
+        status = override_data.get("_status")
+
+        if status == "deleted":
+            effective.pop(action_name, None)
+        elif status in ("added", "modified"):
+            effective[action_name] = {
+                "description": override_data.get("description", "").strip(),
+                "steps": override_data.get("steps", [])
+            }
+
+    return effective
+
+def build_overrides_from_effective(base_steps, effective_steps):
+    """
+    Compare current effective state with immutable base and produce override-only kroky_custom.json.
+    """
+    overrides = {}
+
+    all_action_names = sorted(set(base_steps.keys()) | set(effective_steps.keys()), key=str.lower)
+
+    for action_name in all_action_names:
+        in_base = action_name in base_steps
+        in_effective = action_name in effective_steps
+
+        if in_base and not in_effective:
+            overrides[action_name] = {"_status": "deleted"}
+            continue
+
+        if not in_base and in_effective:
+            payload = normalize_action_payload(effective_steps[action_name])
+            overrides[action_name] = {
+                "_status": "added",
+                "description": payload["description"],
+                "steps": payload["steps"]
+            }
+            continue
+
+        if in_base and in_effective:
+            # index checksums tell unchanged actions apart without loading them
+            if storage.summary_of(base_steps, action_name)["checksum"] == storage.summary_of(effective_steps, action_name)["checksum"]:
+                continue
+            base_payload = normalize_action_payload(base_steps[action_name])
+            eff_payload = normalize_action_payload(effective_steps[action_name])
+
+            if base_payload != eff_payload:
+                overrides[action_name] = {
+                    "_status": "modified",
+                    "description": eff_payload["description"],
+                    "steps": eff_payload["steps"]
+                }
+
+    return dict(sorted(overrides.items(), key=lambda kv: kv[0].lower()))
+
+def load_effective_steps(catalogue_dir=KROKY_DIR, custom_path=KROKY_CUSTOM_PATH):
+    """Base catalogue + overrides from kroky_custom.json"""
+    return build_effective_steps(load_catalogue(catalogue_dir), load_json(custom_path))
+
+# ---------- ACTION METADATA ----------
+def action_steps(action_data) -> list:
+    """Steps of an action in either stored format (dict with steps or plain list)"""
+    if isinstance(action_data, dict):
+        return action_data.get("steps", [])
+    if isinstance(action_data, list):
+        return action_data
+    return []
+
+def action_checksum(action_data) -> str:
+    """Short hash of the normalized action - changes whenever description or steps change"""
+    return storage.payload_checksum(normalize_action_payload(action_data))
+
+def metadata_from_summary(summary: dict) -> dict:
+    return {
+        "step_count": summary["step_count"],
+        "complexity": get_automatic_complexity(summary["step_count"]),
+        "checksum": summary["checksum"],
+    }
+
+def action_metadata(action_data) -> dict:
+    """Step count, automatic complexity and checksum of one action version"""
+    return metadata_from_summary(storage.action_summary(action_data))
+
+def build_action_metadata(steps_data) -> dict:
+    """{action: metadata} - from the index for catalogue actions, nothing is loaded"""
+    return {
+        action_name: metadata_from_summary(storage.summary_of(steps_data, action_name))
+        for action_name in steps_data
+    }
+
+def load_action_metadata(catalogue_dir=KROKY_DIR, custom_path=KROKY_CUSTOM_PATH) -> dict:
+    """
+    {action: metadata} of the effective actions, computed once per version of
+    the index and kroky_custom.json and shared (read-only) like load_json_cached results.
+    """
+    storage.ensure_catalogue(catalogue_dir)
+    return storage.cached_derivation(
+        "action_metadata",
+        [storage.catalogue_index_path(catalogue_dir), custom_path],
+        lambda index, custom: build_action_metadata(
+            build_effective_steps(storage.CatalogueView(catalogue_dir, index), custom)
+        ),
+    )
+
+def scenario_step_fields(steps: list, metadata: dict = None) -> dict:
+    """Fields stored with a scenario whenever its steps are (re)assigned"""
+    return {
+        "kroky": steps,
+        "step_count": len(steps),
+        "action_checksum": metadata["checksum"] if metadata else None,
+    }
+
+def scenario_step_count(scenario: dict) -> int:
+    """Stored step count, counted only for scenarios saved before it was stored"""
+    if "step_count" in scenario:
+        return scenario["step_count"]
+    return len(scenario.get("kroky", []))
+
+def update_scenarios_with_action_steps(projects_data: dict, steps_data: dict, action_name: str):
+    """
+    Update all scenarios that use a specific action with the latest steps from kroky.json
+    Propagates changes to all test cases that use this action
+    """
+    updated_count = 0
+    metadata = None
+    for project_key, project_data in projects_data.items():
+        if not isinstance(project_data, dict) or "scenarios" not in project_data:
+            continue
+        
+        for scenario in project_data.get("scenarios", []):
+            if scenario.get("akce") == action_name:
+                # Get updated steps from kroky.json
+                if action_name in steps_data:
+                    action_data = steps_data[action_name]
+                    if not isinstance(action_data, (dict, list)):
+                        continue
+                    if metadata is None:
+                        metadata = action_metadata(action_data)
+                    with timed("deepcopy"):
+                        steps = copy.deepcopy(action_steps(action_data))
+                    scenario.update(scenario_step_fields(steps, metadata))
+                    updated_count += 1
     
-    return False
+    return updated_count
 
 # ---------- EXPORT ----------
-def export_to_excel(project_name: str, projects_data: dict):
-    """Export project to Excel"""
-    if project_name not in projects_data:
-        return None
-    
-    project_data = projects_data[project_name]
-    subject = project_data.get("subject", "UAT2\\Antosova\\")
-    rows = []
-    
-    for tc in project_data.get("scenarios", []):
+EXPORT_COLUMNS = [
+    "Project", "Subject", "System/Application", "Description", "Type", "Test Phase",
+    "Test: Test Phase", "Test Priority", "Test Complexity", "Test Name",
+    "Step Name (Design Steps)", "Description (Design Steps)", "Expected (Design Steps)",
+]
+EXPORT_DESCRIPTION = "Segment: {segment}\nChannel: {kanal}\nAction: {akce}"
+
+def iter_export_rows(project_name: str, project_data: dict, text_filter=None,
+                     description: str = EXPORT_DESCRIPTION, default_subject: str = DEFAULT_SUBJECT,
+                     default_expected: str = "", progress=None):
+    """
+    Yield one HPQC row (list in EXPORT_COLUMNS order) per test step.
+    text_filter (e.g. remove_diacritics) is applied to the test name and step texts.
+    progress(scenarios_done, rows_done) is called after each scenario's rows;
+    an exception raised there (e.g. a cancelled job) stops the export.
+    """
+    subject = project_data.get("subject", default_subject)
+    keep = text_filter or (lambda text: text)
+    rows_done = 0
+
+    for position, tc in enumerate(project_data.get("scenarios", []), start=1):
+        test_name = keep(display_test_name(position, tc))
+        tc_description = description.format(
+            segment=tc.get("segment", ""), kanal=tc.get("kanal", ""), akce=tc.get("akce", "")
+        )
         for i, step in enumerate(tc.get("kroky", []), start=1):
-            desc = ""
-            exp = ""
-            
             if isinstance(step, dict):
                 desc = step.get("description", "")
-                exp = step.get("expected", "")
-            elif isinstance(step, str):
-                desc = step
-                exp = ""
-            
-            rows.append({
-                "Project": project_name,
-                "Subject": subject,
-                "System/Application": SYSTEM_APPLICATION,
-                "Description": f"Segment: {tc.get('segment', '')}\nChannel: {tc.get('kanal', '')}\nAction: {tc.get('akce', '')}",
-                "Type": TEST_TYPE,
-                "Test Phase": TEST_PHASE,
-                "Test: Test Phase": TEST_PHASE,
-                "Test Priority": tc.get("priority", ""),
-                "Test Complexity": tc.get("complexity", ""),
-                "Test Name": tc.get("test_name", ""),
-                "Step Name (Design Steps)": str(i),
-                "Description (Design Steps)": desc,
-                "Expected (Design Steps)": exp
-            })
-    
-    if not rows:
+                exp = step.get("expected", default_expected)
+            else:
+                desc = step if isinstance(step, str) else ""
+                exp = default_expected
+
+            yield [
+                project_name, subject, SYSTEM_APPLICATION, tc_description, TEST_TYPE,
+                TEST_PHASE, TEST_PHASE, tc.get("priority", ""), tc.get("complexity", ""),
+                test_name, str(i), keep(desc), keep(exp),
+            ]
+            rows_done += 1
+        if progress is not None:
+            progress(position, rows_done)
+
+@instrument("excel")
+def write_excel(rows, target, sheet_name: str = "Test Cases") -> int:
+    """
+    Stream rows into an .xlsx file or file object without building a DataFrame.
+    Returns the number of rows written; nothing is written when there are none.
+    """
+    from openpyxl import Workbook
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(EXPORT_COLUMNS)
+    sheet.append(first)
+    written = 1
+    try:
+        for row in rows:
+            sheet.append(row)
+            written += 1
+    except BaseException:
+        # abandoned mid-sheet (e.g. a cancelled job) - close and drop openpyxl's temp file
+        try:
+            sheet.close()
+            sheet._writer.cleanup()
+        except Exception:
+            pass
+        raise
+    workbook.save(target)
+    return written
+
+def export_workbook(project_name: str, projects_data: dict, sheet_name: str = "Test Cases",
+                    use_cache: bool = True, progress=None, **row_options):
+    """
+    Workbook bytes of a project export, None when there is nothing to export.
+    An unchanged project is served from export_cache instead of being regenerated.
+    progress goes to iter_export_rows (it is not part of the cache key).
+    """
+    project_data = projects_data.get(project_name)
+    if project_data is None:
         return None
-    
-    df = pd.DataFrame(rows)
-    
-    # Create output in memory
+
+    key = None
+    if use_cache:
+        layout = [EXPORT_COLUMNS, SYSTEM_APPLICATION, TEST_TYPE, TEST_PHASE]
+        key = export_cache.export_key(project_name, project_data, sheet_name=sheet_name, layout=layout, **row_options)
+        payload = export_cache.get(key)
+        if payload is not None:
+            return payload
+
     import io
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Test Cases')
-    
-    output.seek(0)
-    return output
+    rows = iter_export_rows(project_name, project_data, progress=progress, **row_options)
+    if not write_excel(rows, output, sheet_name):
+        return None
+    payload = output.getvalue()
+    if key is not None:
+        export_cache.put(key, payload)
+    return payload
+
+def export_to_excel(project_name: str, projects_data: dict, **options):
+    """Export project to Excel in memory (BytesIO), None when there is nothing to export"""
+    payload = export_workbook(project_name, projects_data, **options)
+    if payload is None:
+        return None
+
+    import io
+    return io.BytesIO(payload)
+
+# ---------- SCENARIO TABLE ----------
+# Columns of the Test Cases list; the table is columnar ({column: list}) so a
+# filter or sort only touches the columns it needs
+SCENARIO_TABLE_COLUMNS = ("Order", "Test Name", "Action", "Segment", "Channel", "Priority", "Complexity", "Steps")
+SCENARIO_FILTER_COLUMNS = ("Segment", "Channel", "Action", "Priority", "Complexity")
+
+@instrument("scenario_table.build")
+def build_scenario_table(project_data: dict) -> dict:
+    """
+    Columnar table of a project's scenarios plus a diacritics-free search text
+    per row and the overview counts. Built once per saved revision (see
+    app.scenario_table), read-only.
+    """
+    scenarios = project_data.get("scenarios", []) if isinstance(project_data, dict) else []
+    table = {column: [] for column in SCENARIO_TABLE_COLUMNS}
+    search = []
+    for position, tc in enumerate(scenarios, start=1):
+        test_name = display_test_name(position, tc)
+        row = (
+            position,
+            test_name,
+            tc.get("akce") or "",
+            tc.get("segment") or "",
+            tc.get("kanal") or "",
+            tc.get("priority") or "",
+            tc.get("complexity") or "",
+            scenario_step_count(tc),
+        )
+        for column, value in zip(SCENARIO_TABLE_COLUMNS, row):
+            table[column].append(value)
+        # fold_diacritics - one-off text, kept out of the step-text cache
+        search.append(fold_diacritics(f"{test_name} {tc.get('akce') or ''} {tc.get('veta') or ''}").casefold())
+    table["_search"] = search
+    table["_options"] = {column: sorted(set(table[column])) for column in SCENARIO_FILTER_COLUMNS}
+    # overview numbers of the build tab, computed with the table instead of on every rerun
+    table["_by_segment"] = analyze_scenarios(scenarios)
+    complexity_counts = {}
+    for tc in scenarios:
+        value = tc.get("complexity", "UNKNOWN")
+        complexity_counts[value] = complexity_counts.get(value, 0) + 1
+    table["_complexity_counts"] = complexity_counts
+    return table
+
+def filter_scenario_rows(table: dict, filters: dict, text: str = "", sort_by: str = "Order",
+                         descending: bool = False) -> list:
+    """
+    Row indexes matching every filter ({column: allowed values}, empty = any)
+    and every word of text, sorted by sort_by.
+    """
+    rows = range(len(table["Order"]))
+    for column, allowed in filters.items():
+        if allowed:
+            allowed = set(allowed)
+            values = table[column]
+            rows = [i for i in rows if values[i] in allowed]
+    words = fold_diacritics(text).casefold().split()
+    if words:
+        search = table["_search"]
+        rows = [i for i in rows if all(word in search[i] for word in words)]
+    rows = list(rows)
+    if sort_by != "Order" or descending:
+        rows.sort(key=table[sort_by].__getitem__, reverse=descending)
+    return rows
+
+def scenario_page_rows(rows: list, page: int, page_size: int) -> list:
+    """Row indexes on one page (page counts from 1)"""
+    return rows[(page - 1) * page_size:page * page_size]
+
+def scenario_table_page(table: dict, rows: list, page: int, page_size: int) -> dict:
+    """Columns of the rows on one page - the only part sent to the browser"""
+    page_rows = scenario_page_rows(rows, page, page_size)
+    return {column: [table[column][i] for i in page_rows] for column in SCENARIO_TABLE_COLUMNS}
 
 # ---------- DATA ANALYSIS ----------
 def analyze_scenarios(scenarios: list):
@@ -284,6 +635,10 @@ def analyze_scenarios(scenarios: list):
 
     return segment_data
 
+def automatic_complexity(metadata: dict) -> str:
+    """Complexity from action metadata, the default bucket when the action is unknown"""
+    return metadata["complexity"] if metadata else COMPLEXITY_MAP["4"]
+
 def get_automatic_complexity(step_count: int):
     """Get automatic complexity based on step count"""
     if step_count <= 5:
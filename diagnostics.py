@@ -0,0 +1,173 @@
+import functools
+import importlib.util
+import io
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+HISTORY_SIZE = 200
+
+# Process totals: stage -> [count, seconds], counter -> value
+_totals = {}
+_counters = {}
+_history = deque(maxlen=HISTORY_SIZE)
+_lock = threading.Lock()
+# Streamlit runs each session's script in its own thread
+_local = threading.local()
+
+
+# ---------- TIMING ----------
+@contextmanager
+def timed(stage: str):
+    """Add the time spent in the block to stage (per rerun and process totals)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(stage, time.perf_counter() - start)
+
+
+def instrument(stage: str):
+    """Decorator version of timed()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(counter: str, n: int = 1):
+    """Bump a plain counter (cache hits, rows, ...)"""
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + n
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record["counters"][counter] = record["counters"].get(counter, 0) + n
+
+
+def _record(stage: str, seconds: float):
+    with _lock:
+        total = _totals.setdefault(stage, [0, 0.0])
+        total[0] += 1
+        total[1] += seconds
+    record = getattr(_local, "record", None)
+    if record is not None:
+        stats = record["stages"].setdefault(stage, {"count": 0, "seconds": 0.0})
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        record["last_activity"] = time.perf_counter()
+
+
+# ---------- RERUNS ----------
+def start_rerun(session: str, profiler: str = None):
+    """
+    Begin recording a script run of session in the current thread.
+    A run ended by st.stop()/st.rerun() never reaches finish_rerun(), so it is
+    closed here at its last recorded activity. profiler: "cprofile" or "pyinstrument".
+    """
+    if getattr(_local, "record", None) is not None:
+        finish_rerun(complete=False)
+
+    _local.record = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "session": session,
+        "started": time.perf_counter(),
+        "last_activity": time.perf_counter(),
+        "stages": {},
+        "counters": {},
+    }
+    _local.profiler = None
+    # profilers are imported only when a capture is requested
+    if profiler == "pyinstrument" and "pyinstrument" in available_profilers():
+        from pyinstrument import Profiler
+
+        _local.profiler = ("pyinstrument", Profiler())
+        _local.profiler[1].start()
+    elif profiler:
+        import cProfile
+
+        _local.profiler = ("cprofile", cProfile.Profile())
+        _local.profiler[1].enable()
+
+
+def finish_rerun(complete: bool = True):
+    """Close the current run, keep it in history and return it (None when nothing runs)"""
+    record = getattr(_local, "record", None)
+    if record is None:
+        return None
+    _local.record = None
+
+    end = time.perf_counter() if complete else record["last_activity"]
+    entry = {
+        "ts": record["ts"],
+        "session": record["session"],
+        "total": end - record["started"],
+        "complete": complete,
+        "stages": record["stages"],
+        "counters": record["counters"],
+    }
+
+    profiler = getattr(_local, "profiler", None)
+    _local.profiler = None
+    if profiler is not None:
+        entry["profile"] = _profile_report(*profiler)
+
+    with _lock:
+        _history.append(entry)
+    return entry
+
+
+def _profile_report(kind: str, profiler) -> str:
+    if kind == "pyinstrument":
+        profiler.stop()
+        return profiler.output_text(unicode=True)
+    import pstats
+
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    return out.getvalue()
+
+
+def available_profilers() -> list:
+    # pyinstrument is optional - cProfile is always there
+    return ["cprofile"] + (["pyinstrument"] if importlib.util.find_spec("pyinstrument") else [])
+
+
+# ---------- REPORTS ----------
+def history(session: str = None) -> list:
+    """Finished runs, oldest first (only those of session when given)"""
+    with _lock:
+        entries = list(_history)
+    if session is not None:
+        entries = [entry for entry in entries if entry["session"] == session]
+    return entries
+
+
+def totals() -> dict:
+    """{stage: {"count", "seconds"}} and {counter: value} since process start"""
+    with _lock:
+        stages = {stage: {"count": c, "seconds": s} for stage, (c, s) in _totals.items()}
+        return {"stages": stages, "counters": dict(_counters)}
+
+
+def to_jsonl(entries) -> str:
+    return "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+
+
+def export_jsonl(filepath, session: str = None):
+    """Append the run history as JSON lines to filepath"""
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write(to_jsonl(history(session)))
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+        _counters.clear()
+        _history.clear()
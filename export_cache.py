@@ -0,0 +1,95 @@
+"""
+Content-addressed cache of generated export workbooks (exports/cache/).
+
+The key is a hash of everything the workbook is built from - project name,
+subject, scenarios and export settings - so an unchanged project is never
+generated twice, by the app or by the CLI. Entries are evicted least recently
+used first once the cache grows over MAX_BYTES (TESTOOL_EXPORT_CACHE_MB).
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import storage
+from diagnostics import count, timed
+
+CACHE_DIR = Path(__file__).resolve().parent / "exports" / "cache"
+MAX_BYTES = int(os.environ.get("TESTOOL_EXPORT_CACHE_MB", "100")) * 1024 * 1024
+SUFFIX = ".xlsx"
+# Bump when the workbook code changes in a way the key cannot see
+FORMAT_VERSION = 1
+
+
+def _describe(value):
+    # text_filter and other callables are keyed by name
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return str(value)
+
+
+def export_key(project_name: str, project_data: dict, **settings) -> str:
+    """sha256 of the project content and export settings (the project revision is left out)"""
+    payload = {
+        "format": FORMAT_VERSION,
+        "project": project_name,
+        "subject": project_data.get("subject"),
+        "scenarios": project_data.get("scenarios", []),
+        "settings": settings,
+    }
+    with timed("export_cache.key"):
+        text = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=_describe)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _path(key: str, cache_dir=None) -> Path:
+    return Path(cache_dir or CACHE_DIR) / f"{key}{SUFFIX}"
+
+
+def get(key: str, cache_dir=None):
+    """Cached workbook bytes, None on a miss. A hit counts as a use for LRU eviction."""
+    path = _path(key, cache_dir)
+    try:
+        payload = path.read_bytes()
+        os.utime(path)
+    except FileNotFoundError:
+        # not cached yet, or evicted by another process meanwhile
+        count("export_cache.miss")
+        return None
+    count("export_cache.hit")
+    return payload
+
+
+def put(key: str, payload: bytes, cache_dir=None, max_bytes: int = None):
+    storage.write_bytes_atomic(_path(key, cache_dir), payload)
+    evict(cache_dir, MAX_BYTES if max_bytes is None else max_bytes)
+
+
+def evict(cache_dir=None, max_bytes: int = MAX_BYTES) -> int:
+    """Delete least recently used entries until the cache fits into max_bytes, returns how many"""
+    entries = []
+    for path in Path(cache_dir or CACHE_DIR).glob(f"*{SUFFIX}"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        count("export_cache.evicted", removed)
+    return removed
+
+
+def clear(cache_dir=None) -> int:
+    return evict(cache_dir, max_bytes=0)
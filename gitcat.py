@@ -0,0 +1,194 @@
+"""
+Committed versions of data files through long-lived `git cat-file` processes.
+
+    gitcat.get_reader().read_json("HEAD", KROKY_CUSTOM_PATH)
+    gitcat.get_reader().read_json("HEAD~5", "data/kroky.json")
+
+`rev:path` is resolved to an object id by a `--batch-check` process and the
+content is read by a `--batch` process; parsed JSON is kept in an LRU by
+object id, so an unchanged file in HEAD is neither read nor parsed again.
+Both processes are started on first use and restarted when they die.
+"""
+import atexit
+import json
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import compress
+import logs
+from diagnostics import count, timed
+
+log = logs.get_logger("gitcat")
+
+REPO_DIR = Path(__file__).resolve().parent
+BLOB_CACHE_SIZE = 64
+# After git could not be started (not a repository, no git) don't retry for this long
+RESTART_COOLDOWN_SECONDS = 30.0
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+class GitError(Exception):
+    """git cat-file is not available or returned something unexpected"""
+
+
+class _BatchProcess:
+    """One `git cat-file --batch[-check]` process, one request at a time"""
+
+    def __init__(self, repo_dir: Path, mode: str):
+        self.repo_dir = repo_dir
+        self.mode = mode
+        self._proc = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._failed_at is not None and time.monotonic() - self._failed_at < RESTART_COOLDOWN_SECONDS:
+            raise GitError(f"git cat-file {self.mode} unavailable")
+        try:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", self.mode],
+                cwd=self.repo_dir,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            self._failed_at = time.monotonic()
+            raise GitError(str(e)) from e
+        count("gitcat.start")
+
+    def close(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def request(self, name: str):
+        """(object id, type, content or size) for name, None when it does not exist"""
+        if "\n" in name:
+            raise ValueError("object name must not contain a newline")
+        with self._lock:
+            for attempt in (1, 2):
+                if self._proc is None or self._proc.poll() is not None:
+                    self._proc = None
+                    self._start()
+                try:
+                    return self._exchange(name)
+                except (OSError, EOFError, ValueError) as e:
+                    # process died (or the repository went away) - restart once
+                    self.close()
+                    if attempt == 2:
+                        self._failed_at = time.monotonic()
+                        raise GitError(f"git cat-file {self.mode} failed: {e}") from e
+                    log.debug("Restarting git cat-file", mode=self.mode, error=str(e))
+
+    def _exchange(self, name: str):
+        stdin, stdout = self._proc.stdin, self._proc.stdout
+        stdin.write(name.encode("utf-8") + b"\n")
+        stdin.flush()
+        header = stdout.readline()
+        if not header:
+            raise EOFError("no response")
+        parts = header.split()
+        if parts[-1] in (b"missing", b"ambiguous"):
+            return None
+        oid, kind, size = parts[0].decode(), parts[1].decode(), int(parts[2])
+        if self.mode == "--batch-check":
+            return oid, kind, size
+        content = stdout.read(size)
+        stdout.read(1)  # newline after the content
+        if len(content) != size:
+            raise EOFError("truncated content")
+        return oid, kind, content
+
+
+class GitBlobReader:
+    """Committed file contents of one repository"""
+
+    def __init__(self, repo_dir=REPO_DIR, cache_size: int = BLOB_CACHE_SIZE):
+        self.repo_dir = Path(repo_dir).resolve()
+        self.cache_size = cache_size
+        self._check = _BatchProcess(self.repo_dir, "--batch-check")
+        self._contents = _BatchProcess(self.repo_dir, "--batch")
+        self._parsed = OrderedDict()
+        self._parsed_lock = threading.Lock()
+
+    def _name(self, rev: str, path) -> str:
+        path = Path(path)
+        if path.is_absolute():
+            path = path.resolve().relative_to(self.repo_dir)
+        # ./ makes git resolve the path from repo_dir, also when it is not the top level
+        return f"{rev}:./{path.as_posix()}"
+
+    def object_id(self, rev: str, path):
+        """Blob id of path in rev, None when the file (or rev) does not exist"""
+        with timed("git.cat_file"):
+            info = self._check.request(self._name(rev, path))
+        return info[0] if info and info[1] == "blob" else None
+
+    def read(self, rev: str, path):
+        """Raw bytes of path in rev, None when it does not exist"""
+        oid = self.object_id(rev, path)
+        return self._read_blob(oid) if oid else None
+
+    def _read_blob(self, oid: str) -> bytes:
+        with timed("git.cat_file"):
+            found = self._contents.request(oid)
+        if found is None:
+            raise GitError(f"object {oid} disappeared")
+        return found[2]
+
+    def read_json(self, rev: str, path):
+        """
+        Parsed JSON of path in rev, None when it does not exist. The result is
+        shared between callers (like storage.load_json_cached) - do not modify it.
+        """
+        oid = self.object_id(rev, path)
+        if oid is None:
+            return None
+        with self._parsed_lock:
+            if oid in self._parsed:
+                self._parsed.move_to_end(oid)
+                count("gitcat.hit")
+                return self._parsed[oid]
+        count("gitcat.miss")
+        content = self._read_blob(oid)
+        with timed("json.parse"):
+            data = json.loads(compress.decode(content).decode("utf-8"))
+        with self._parsed_lock:
+            self._parsed[oid] = data
+            while len(self._parsed) > self.cache_size:
+                self._parsed.popitem(last=False)
+        return data
+
+    def close(self):
+        self._check.close()
+        self._contents.close()
+
+
+def get_reader(repo_dir=REPO_DIR) -> GitBlobReader:
+    """One reader (and one pair of git processes) per repository and process"""
+    repo_dir = Path(repo_dir).resolve()
+    with _readers_lock:
+        reader = _readers.get(repo_dir)
+        if reader is None:
+            reader = _readers[repo_dir] = GitBlobReader(repo_dir)
+        return reader
+
+
+@atexit.register
+def close_all():
+    with _readers_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.close()
@@ -0,0 +1,329 @@
+"""
+Background git commit/push of export artifacts and action overrides.
+
+    gitqueue.enqueue(path, "Auto export CCCTR-1234")   # returns at once
+    python gitqueue.py drain | status
+
+Paths are queued in data/git_queue.json. A worker (a thread in the app, a
+detached process started by the CLI) commits everything queued so far as one
+commit, then pushes (rebasing onto new remote commits only on a clean working
+tree), retrying with exponential backoff.
+Only one worker drains at a time (lock file next to the queue); the queue
+file also records the last error and the draining worker's pid, so the CLI
+and the UI can show the state without touching the worker lock.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import logs
+import storage
+from diagnostics import timed
+
+try:
+    import fcntl
+except ImportError:  # Windows - no second worker check
+    fcntl = None
+
+log = logs.get_logger("gitqueue")
+
+REPO_DIR = Path(__file__).resolve().parent
+QUEUE_PATH = REPO_DIR / "data" / "git_queue.json"
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
+# The app worker retries a failed push this often even without new entries
+RETRY_SECONDS = 300
+# Data files the app saves under storage.file_lock - held while a rebase may rewrite the working tree
+DATA_LOCK_FILES = ("data/projects/manifest.json", "data/kroky/index.json", "data/kroky_custom.json")
+
+IDLE, RUNNING, RETRYING, FAILED = "idle", "running", "retrying", "failed"
+
+_wake = threading.Event()
+_worker_thread = None
+_worker_start_lock = threading.Lock()
+
+
+class GitError(Exception):
+    """A git command failed (message is its stderr)"""
+
+
+# ---------- QUEUE FILE ----------
+def _empty_state() -> dict:
+    return {"pending": [], "unpushed": False, "state": IDLE, "attempts": 0,
+            "last_error": None, "last_attempt": None, "last_push": None, "worker_pid": None}
+
+
+def _read(queue_path) -> dict:
+    queue_path = Path(queue_path)
+    if not queue_path.exists():
+        return _empty_state()
+    return {**_empty_state(), **storage.read_json(queue_path)}
+
+
+def _update(queue_path, change) -> dict:
+    """Read-modify-write of the queue file under its lock, change(state) edits in place"""
+    with storage.file_lock(queue_path):
+        state = _read(queue_path)
+        change(state)
+        storage.write_json_atomic(queue_path, state)
+    return state
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def enqueue(path, message: str, queue_path=QUEUE_PATH, repo_dir=REPO_DIR):
+    """
+    Queue path (an export or data file) for the next commit. A path already
+    waiting is not queued twice - its message is updated instead.
+    """
+    rel_path = str(Path(path).resolve().relative_to(Path(repo_dir).resolve()))
+
+    def add(state):
+        state["pending"] = [entry for entry in state["pending"] if entry["path"] != rel_path]
+        state["pending"].append({"path": rel_path, "message": message, "queued": _now()})
+
+    _update(queue_path, add)
+    _wake.set()
+    log.debug("Queued for git", path=rel_path)
+
+
+def status(queue_path=QUEUE_PATH) -> dict:
+    """Pending entries, unpushed flag, state, last error/push and whether a worker is active"""
+    state = _read(queue_path)
+    state["worker_active"] = _worker_active(state)
+    return state
+
+
+# ---------- GIT ----------
+def _git(repo_dir, *args) -> str:
+    with timed("git"):
+        result = subprocess.run(["git", *args], cwd=repo_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise GitError((result.stderr or result.stdout).strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def commit_message(entries: list) -> str:
+    """Several exports waiting at once become one commit"""
+    if len(entries) == 1:
+        return entries[0]["message"]
+    return f"Auto export ({len(entries)} files)\n\n" + "\n".join(f"- {entry['message']}" for entry in entries)
+
+
+def commit_entries(entries: list, repo_dir=REPO_DIR) -> bool:
+    """Commit just the queued paths (whatever else is staged stays staged), False when nothing changed"""
+    paths = [entry["path"] for entry in entries]
+    _git(repo_dir, "add", "-A", "--", *paths)
+    changed = subprocess.run(
+        ["git", "diff", "--cached", "--quiet", "--", *paths], cwd=repo_dir
+    ).returncode != 0
+    if changed:
+        _git(repo_dir, "commit", "-m", commit_message(entries), "--", *paths)
+    return changed
+
+
+@contextmanager
+def _data_locks(repo_dir):
+    """The locks app saves take, in a fixed order - no save can run while they are held"""
+    with ExitStack() as stack:
+        for rel_path in DATA_LOCK_FILES:
+            path = Path(repo_dir) / rel_path
+            if path.parent.exists():
+                stack.enter_context(storage.file_lock(path))
+        yield
+
+
+def push(repo_dir=REPO_DIR):
+    """
+    Push the committed exports. New remote commits are rebased onto first,
+    but only on a clean working tree and under the data locks - files the
+    app writes are never stashed or rewritten; a dirty tree is retried later.
+    """
+    _git(repo_dir, "fetch")
+    behind = int(_git(repo_dir, "rev-list", "--count", "HEAD..@{upstream}").strip() or 0)
+    if behind:
+        with _data_locks(repo_dir):
+            if _git(repo_dir, "status", "--porcelain", "--untracked-files=no").strip():
+                raise GitError("Working tree dirty - uncommitted data files, rebase onto the remote postponed")
+            try:
+                _git(repo_dir, "rebase", "@{upstream}")
+            except GitError:
+                subprocess.run(["git", "rebase", "--abort"], cwd=repo_dir, capture_output=True)
+                raise
+    _git(repo_dir, "push")
+
+
+# ---------- WORKER ----------
+@contextmanager
+def _worker_lock(queue_path):
+    """Non-blocking: yields False when another worker is already draining"""
+    if fcntl is None:
+        yield True
+        return
+    lock_path = Path(queue_path).with_name(Path(queue_path).name + ".worker")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _worker_active(state: dict) -> bool:
+    """
+    The draining worker records its pid in the queue file - status() must not
+    probe the worker lock, a drain starting at that moment would give up
+    """
+    pid = state.get("worker_pid")
+    if not pid:
+        return False
+    if os.name == "nt":
+        return True  # os.kill would terminate the process there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False  # the worker died without clearing its pid
+    except PermissionError:
+        pass
+    return True
+
+
+def drain(queue_path=QUEUE_PATH, repo_dir=REPO_DIR, max_attempts: int = MAX_ATTEMPTS,
+          backoff: float = BACKOFF_SECONDS, sleep=time.sleep):
+    """
+    Commit and push everything queued, until the queue stays empty.
+    Returns True when all is pushed, False after max_attempts failed pushes
+    (or a failed commit), None when another worker is already draining.
+    """
+    with _worker_lock(queue_path) as acquired:
+        if not acquired:
+            return None
+        _update(queue_path, lambda state: state.update(worker_pid=os.getpid()))
+        try:
+            return _drain_queue(queue_path, repo_dir, max_attempts, backoff, sleep)
+        finally:
+            _update(queue_path, lambda state: state.update(worker_pid=None))
+
+
+def _drain_queue(queue_path, repo_dir, max_attempts, backoff, sleep) -> bool:
+    while True:
+        taken = []
+
+        def take(state):
+            taken.extend(state["pending"])
+            state["pending"] = []
+            state["state"] = RUNNING
+
+        state = _update(queue_path, take)
+        if taken:
+            try:
+                committed = commit_entries(taken, repo_dir)
+            except GitError as e:
+                error = str(e)
+                log.error("Git commit failed", error=error, paths=[entry["path"] for entry in taken])
+
+                def give_back(state):
+                    state["pending"] = taken + state["pending"]
+                    state.update(state=FAILED, last_error=error, last_attempt=_now())
+
+                _update(queue_path, give_back)
+                return False
+            if committed:
+                state = _update(queue_path, lambda state: state.update(unpushed=True))
+
+        if not state["unpushed"]:
+            _update(queue_path, lambda state: state.update(state=IDLE, attempts=0))
+            return True
+
+        if not _push_with_retries(queue_path, repo_dir, max_attempts, backoff, sleep):
+            return False
+        # loop - something may have been queued while pushing
+
+
+def _push_with_retries(queue_path, repo_dir, max_attempts, backoff, sleep) -> bool:
+    for attempt in range(1, max_attempts + 1):
+        try:
+            push(repo_dir)
+        except GitError as e:
+            error = str(e)
+            final = attempt == max_attempts
+            log.warning("Git push failed", attempt=attempt, error=error)
+            _update(queue_path, lambda state: state.update(
+                state=FAILED if final else RETRYING, attempts=attempt, last_error=error, last_attempt=_now()
+            ))
+            if final:
+                return False
+            sleep(min(backoff * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS))
+            continue
+        _update(queue_path, lambda state: state.update(
+            unpushed=False, attempts=0, last_error=None, last_attempt=_now(), last_push=_now()
+        ))
+        return True
+    return False
+
+
+def start_worker(queue_path=QUEUE_PATH, repo_dir=REPO_DIR):
+    """Background thread draining the queue whenever something is enqueued (once per process)"""
+    global _worker_thread
+    with _worker_start_lock:
+        if _worker_thread is not None:
+            return
+
+        def loop():
+            while True:
+                _wake.wait(timeout=RETRY_SECONDS)
+                _wake.clear()
+                state = _read(queue_path)
+                if state["pending"] or state["unpushed"]:
+                    try:
+                        drain(queue_path, repo_dir)
+                    except Exception as e:
+                        log.error("Git worker failed", error=str(e), exc_info=True)
+
+        _worker_thread = threading.Thread(target=loop, name="gitqueue", daemon=True)
+        _worker_thread.start()
+    _wake.set()
+
+
+def spawn_worker(queue_path=QUEUE_PATH):
+    """Drain in a detached process, so a short-lived CLI call does not wait for git"""
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "drain", "--queue", str(queue_path)],
+        cwd=REPO_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Commit and push queued exports")
+    parser.add_argument("command", choices=["drain", "status"])
+    parser.add_argument("--queue", default=str(QUEUE_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        print(json.dumps(status(args.queue), ensure_ascii=False, indent=2))
+        return 0
+    return 0 if drain(args.queue) is not False else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
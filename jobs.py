@@ -0,0 +1,172 @@
+"""
+Background export jobs.
+
+Exports run in a small thread pool shared by all sessions of the process, so
+a large project does not block the rerun that asked for it, and a browser
+refresh only loses the job id (the app keeps it in the URL). Finished jobs
+keep their workbook bytes for KEEP_SECONDS for a later download.
+"""
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import core
+import logs
+from diagnostics import timed
+
+log = logs.get_logger("jobs")
+
+MAX_WORKERS = 2
+KEEP_SECONDS = 3600
+MAX_FINISHED = 50
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = None
+_sequence = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    """Raised from the progress callback once a job has been cancelled"""
+
+
+class ExportJob:
+    def __init__(self, project_name: str, scenarios_total: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.seq = next(_sequence)
+        self.project_name = project_name
+        self.status = QUEUED
+        self.scenarios_total = scenarios_total
+        self.scenarios_done = 0
+        self.rows_written = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def snapshot(self) -> dict:
+        """Plain dict for the UI (no result bytes)"""
+        return {
+            "id": self.id,
+            "project": self.project_name,
+            "status": self.status,
+            "scenarios_done": self.scenarios_done,
+            "scenarios_total": self.scenarios_total,
+            "rows_written": self.rows_written,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "has_result": self.result is not None,
+        }
+
+    def _progress(self, scenarios_done: int, rows_done: int):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        self.scenarios_done = scenarios_done
+        self.rows_written = rows_done
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="export")
+        return _executor
+
+
+def _run(job: ExportJob, project_data: dict, options: dict):
+    if job.cancel_event.is_set():
+        _finish(job, CANCELLED)
+        return
+    job.status = RUNNING
+    start = time.perf_counter()
+    try:
+        with timed("export_job"):
+            job.result = core.export_workbook(
+                job.project_name, {job.project_name: project_data}, progress=job._progress, **options
+            )
+    except JobCancelled:
+        _finish(job, CANCELLED)
+    except Exception as e:
+        log.error("Export job failed", job=job.id, project=job.project_name, error=str(e), exc_info=True)
+        job.error = str(e)
+        _finish(job, FAILED)
+    else:
+        # a cache hit skips the row callbacks
+        job.scenarios_done = job.scenarios_total
+        _finish(job, DONE)
+        log.debug("Export job done", job=job.id, project=job.project_name, rows=job.rows_written,
+                  duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+def _finish(job: ExportJob, status: str):
+    job.status = status
+    job.finished = time.time()
+    _prune()
+
+
+def _prune():
+    """Forget finished jobs older than KEEP_SECONDS and all but the newest MAX_FINISHED"""
+    now = time.time()
+    with _lock:
+        finished = sorted(
+            (job for job in _jobs.values() if job.status in FINISHED),
+            key=lambda job: job.seq,
+            reverse=True,
+        )
+        for idx, job in enumerate(finished):
+            if idx >= MAX_FINISHED or now - job.finished > KEEP_SECONDS:
+                del _jobs[job.id]
+
+
+# ---------- API ----------
+def submit_export(project_name: str, projects_data: dict, **options) -> str:
+    """
+    Queue an export of project_name and return the job id. The project is
+    the shared read-only snapshot (edits are saved as a new one), so it is
+    passed as is - nothing proportional to its size runs on the rerun.
+    options go to core.export_workbook.
+    """
+    project_data = projects_data[project_name]
+    job = ExportJob(project_name, len(project_data.get("scenarios", [])))
+    with _lock:
+        _jobs[job.id] = job
+    _get_executor().submit(_run, job, project_data, options)
+    return job.id
+
+
+def status(job_id: str):
+    """Snapshot of the job, None for an unknown (or already forgotten) id"""
+    with _lock:
+        job = _jobs.get(job_id)
+    return job.snapshot() if job else None
+
+
+def result(job_id: str):
+    """Workbook bytes of a finished job, None while running or when there is nothing to export"""
+    with _lock:
+        job = _jobs.get(job_id)
+    return job.result if job and job.status == DONE else None
+
+
+def cancel(job_id: str) -> bool:
+    """Ask a queued or running job to stop; False when it has already finished"""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None or job.status in FINISHED:
+        return False
+    job.cancel_event.set()
+    return True
+
+
+def list_jobs(project_name: str = None) -> list:
+    """Snapshots, newest first"""
+    with _lock:
+        jobs = sorted(_jobs.values(), key=lambda job: job.seq, reverse=True)
+    return [job.snapshot() for job in jobs if project_name is None or job.project_name == project_name]
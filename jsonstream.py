@@ -0,0 +1,235 @@
+"""
+Streaming reads of large JSON data files - one item in memory at a time.
+
+    for name, project in jsonstream.iter_items("archive/projects.json"):
+        ...
+    for scenario in jsonstream.iter_array(shard_path, ["scenarios"]):
+        ...
+    names = list(jsonstream.iter_keys("data/kroky.json"))
+
+path is a list of object keys leading to the container (empty = the top
+level). Only the yielded item is parsed; siblings on the way are skipped
+without being built. Uses ijson when installed, otherwise a pure-Python
+reader on top of json.JSONDecoder.raw_decode. Compressed files (gzip, zstd)
+are decompressed while reading.
+"""
+import io
+import json
+import re
+
+import compress
+
+try:
+    import ijson
+except ImportError:  # ijson is optional - fall back to the pure-Python reader
+    ijson = None
+
+BACKEND = "ijson" if ijson is not None else "python"
+# Read size of the pure-Python reader; an item larger than this grows the buffer
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE_RE = re.compile(r'["{}\[\]]')
+_STRING_END_RE = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+# what is left of the buffer after a value could still be part of a number
+_NUMBER_TAIL_RE = re.compile(r"[0-9.eE+\-]*\Z")
+_decoder = json.JSONDecoder()
+
+
+def _open(filepath):
+    # gzip / zstd archives are decompressed on the fly
+    return compress.open_read(filepath)
+
+
+def _use_ijson(path) -> bool:
+    # ijson prefixes are dot-joined keys, a key containing a dot cannot be addressed
+    return ijson is not None and not any("." in key for key in path)
+
+
+# ---------- PURE-PYTHON READER ----------
+class _Reader:
+    """Sliding text buffer over a file; positions are only valid until the next _fill"""
+
+    def __init__(self, text_file, chunk_size: int = CHUNK_SIZE):
+        self.file = text_file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = None) -> bool:
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message: str):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def peek(self) -> str:
+        """Next non-whitespace character (not consumed)"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise self._error("Unexpected end of file")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def _container_end(self, keep: bool) -> int:
+        """
+        End of the object/array starting at pos, found without building it.
+        keep=False drops the part already scanned from the buffer.
+        """
+        depth = 0
+        idx = self.pos
+        while True:
+            match = _STRUCTURE_RE.search(self.buf, idx)
+            if match is not None and match.group() == '"':
+                end = _STRING_END_RE.match(self.buf, match.end())
+                if end is not None:
+                    idx = end.end()
+                    continue
+                resume = match.start()  # the string continues in the next chunk
+            elif match is not None:
+                idx = match.end()
+                depth += 1 if match.group() in "{[" else -1
+                if depth == 0:
+                    return idx
+                continue
+            else:
+                resume = len(self.buf)
+            if not keep:
+                self.pos = resume
+            shift = self.pos
+            if not self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                raise self._error("Unexpected end of file")
+            idx = resume - shift
+
+    def value(self):
+        """Parse the next value - the buffer grows until the whole value is in it"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # incomplete (or broken - known only at the end of the file);
+                # the buffer doubles, so a large value is parsed at most ~twice
+                if self.eof or not self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if not self.eof and _NUMBER_TAIL_RE.match(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        """Move past the next value without building it"""
+        if self.peek() in "{[":
+            self.pos = self._container_end(keep=False)
+        else:
+            self.value()
+
+    def descend(self, path) -> bool:
+        """Position the reader inside the container at path, False when a key is missing"""
+        for wanted in path:
+            for key in self.keys():
+                if key == wanted:
+                    break
+                self.skip_value()
+            else:
+                return False
+        return True
+
+    def keys(self):
+        """Keys of the object at the reader; after each key the caller reads or skips its value"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def elements(self):
+        """Elements of the array at the reader, parsed one at a time"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+
+def _python_reader(binary_file) -> _Reader:
+    return _Reader(io.TextIOWrapper(binary_file, encoding="utf-8"))
+
+
+# ---------- API ----------
+def iter_items(filepath, path=()):
+    """(key, value) of the object at path, one parsed value at a time; nothing when path is missing"""
+    path = list(path)
+    with _open(filepath) as f:
+        if _use_ijson(path):
+            yield from ijson.kvitems(f, ".".join(path), use_float=True)
+            return
+        reader = _python_reader(f)
+        if not reader.descend(path):
+            return
+        for key in reader.keys():
+            yield key, reader.value()
+
+
+def iter_array(filepath, path=()):
+    """Elements of the array at path, one at a time; nothing when path is missing"""
+    path = list(path)
+    with _open(filepath) as f:
+        if _use_ijson(path):
+            yield from ijson.items(f, ".".join(path + ["item"]), use_float=True)
+            return
+        reader = _python_reader(f)
+        if not reader.descend(path):
+            return
+        yield from reader.elements()
+
+
+def iter_keys(filepath, path=()):
+    """Keys of the object at path - the values are skipped, not parsed"""
+    path = list(path)
+    with _open(filepath) as f:
+        if _use_ijson(path):
+            prefix = ".".join(path)
+            for event_prefix, event, value in ijson.parse(f):
+                if event == "map_key" and event_prefix == prefix:
+                    yield value
+            return
+        reader = _python_reader(f)
+        if not reader.descend(path):
+            return
+        for key in reader.keys():
+            yield key
+            reader.skip_value()
+
@@ -0,0 +1,150 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+LOG_DIR = Path(__file__).resolve().parent / "logs"
+ROOT_LOGGER = "testool"
+
+# Off by default - TESTOOL_LOG_LEVEL=DEBUG turns the debug output on
+DEFAULT_LEVEL = "WARNING"
+RATE_LIMIT_PER_MINUTE = 30
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class StructuredAdapter(logging.LoggerAdapter):
+    """
+    Logger with bound fields (session, project, ...). Extra keyword arguments
+    of a log call become fields of that record:
+        log.debug("Action saved", action=name, duration_ms=12.5)
+    """
+
+    _LOG_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+    def process(self, msg, kwargs):
+        fields = dict(self.extra)
+        for key in list(kwargs):
+            if key not in self._LOG_KWARGS:
+                fields[key] = kwargs.pop(key)
+        kwargs.setdefault("extra", {})["fields"] = fields
+        return msg, kwargs
+
+    def bind(self, **fields) -> "StructuredAdapter":
+        return StructuredAdapter(self.logger, {**self.extra, **fields})
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes at most `limit` records per message template and minute. The number
+    of dropped records is added to the next record that gets through.
+    """
+
+    def __init__(self, limit: int = RATE_LIMIT_PER_MINUTE, period: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            start, passed, dropped = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.period:
+                start, passed = now, 0
+            if passed >= self.limit:
+                self._windows[key] = (start, passed, dropped + 1)
+                return False
+            self._windows[key] = (start, passed + 1, 0)
+        if dropped:
+            fields = getattr(record, "fields", None) or {}
+            record.fields = {**fields, "suppressed": dropped}
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """`time level logger message key=value ...` or one JSON object per line"""
+
+    def __init__(self, as_json: bool = False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record) -> str:
+        fields = getattr(record, "fields", None) or {}
+        timestamp = self.formatTime(record, "%Y-%m-%d %H:%M:%S")
+        message = record.getMessage()
+        if self.as_json:
+            payload = {"ts": timestamp, "level": record.levelname, "logger": record.name, "msg": message, **fields}
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+
+        text = f"{timestamp} {record.levelname:<7} {record.name} {message}"
+        if fields:
+            text += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def setup_logging(level: str = None, log_file=None, as_json: bool = None):
+    """
+    Configure the testool loggers once per process.
+
+    Records go through a QueueHandler, so callers never wait for stderr or the
+    disk; a QueueListener thread writes them to stderr and, when log_file (or
+    TESTOOL_LOG_FILE) is set, to a rotating file.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.environ.get("TESTOOL_LOG_LEVEL") or DEFAULT_LEVEL).upper()
+        log_file = log_file or os.environ.get("TESTOOL_LOG_FILE")
+        if as_json is None:
+            as_json = os.environ.get("TESTOOL_LOG_FORMAT") == "json"
+
+        formatter = StructuredFormatter(as_json)
+        handlers = [logging.StreamHandler(sys.stderr)]
+        if log_file:
+            log_path = Path(log_file)
+            if not log_path.is_absolute():
+                log_path = LOG_DIR / log_path
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(getattr(logging, level, logging.WARNING))
+        root.addHandler(queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str, **fields) -> StructuredAdapter:
+    """testool.<name> logger with fields bound to every record"""
+    setup_logging()
+    return StructuredAdapter(logging.getLogger(f"{ROOT_LOGGER}.{name}"), fields)
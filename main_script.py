@@ -1,139 +1,84 @@
-import json
-import re
-import subprocess
+import argparse
+import csv
+import sys
 from pathlib import Path
-import pandas as pd
-import time
-import unicodedata
 import copy
 
-# --- Cesty ---
-BASE_DIR = Path(__file__).resolve().parent
-EXPORTS_DIR = BASE_DIR / "exports"
-KROKY_PATH = BASE_DIR / "kroky.json"
-PROJEKTY_PATH = BASE_DIR / "projekty.json"
+import compress
+import core
+import jsonstream
+import pipeline
+import storage
+from core import (
+    COMPLEXITY_MAP,
+    PRIORITY_MAP,
+    action_metadata,
+    detect_action,
+)
+from core import display_test_name as zobraz_nazev
+
+# --- Cesty (stejná data jako Streamlit aplikace) ---
+EXPORTS_DIR = core.EXPORTS_DIR
+KROKY_DIR = core.KROKY_DIR
+KROKY_PATH = core.KROKY_PATH
+KROKY_CUSTOM_PATH = core.KROKY_CUSTOM_PATH
+PROJEKTY_DIR = core.PROJECTS_DIR
 
 # --- Globální proměnné ---
 AKTUALNI_PROJEKT = None
 projekty_data = {}
 
 # --- Statické hodnoty ---
-SYSTEM_APPLICATION = "Siebel_CZ"
-TYPE = "Manual"
-TEST_PHASE = "4-User Acceptance"
-TEST_TEST_PHASE = "4-User Acceptance"
-PRIORITY_MAP = {"1": "1-High", "2": "2-Medium", "3": "3-Low"}
-COMPLEXITY_MAP = {"1": "1-Giant", "2": "2-Huge", "3": "3-Big", "4": "4-Medium", "5": "5-Low"}
+DEFAULT_SUBJECT = core.DEFAULT_SUBJECT
+EXPORT_DESCRIPTION = "Segment: {segment}\nKanal: {kanal}\nAkce: {akce}"
 
 
 # --- Pomocné funkce ---
 def safe_print(text):
-    print(text, flush=True)
-    time.sleep(0.05)
+    # bez flush a bez pauzy - input() si výstup vyprázdní sám před výzvou
+    print(text)
+
+
+def vypis_radky(radky):
+    """Vypíše celý seznam jedním zápisem (rychlé i pro tisíce řádků)"""
+    radky = list(radky)
+    if radky:
+        sys.stdout.write("\n".join(radky) + "\n")
 
 
 def nacti_projekty():
-    if PROJEKTY_PATH.exists():
-        with open(PROJEKTY_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    """Projekty z data/projects/ - načte se jen manifest, projekt až při prvním použití"""
+    return core.load_projects(PROJEKTY_DIR)
 
 
-def uloz_projekty():
-    with open(PROJEKTY_PATH, "w", encoding="utf-8") as f:
-        json.dump(projekty_data, f, ensure_ascii=False, indent=2)
+def uloz_operace(*operace):
+    """Uloží změny nad aktuálním obsahem (nepřepíše změny z aplikace), přepíše jen dotčené projekty"""
+    global projekty_data
+    projekty_data, _ = storage.commit_project_operations(PROJEKTY_DIR, operace)
 
 
 def nacti_kroky():
-    if not KROKY_PATH.exists():
-        safe_print("⚠️ Soubor kroky.json nebyl nalezen! Vytvořím prázdný.")
-        return {}
-    with open(KROKY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def normalize_text(text):
-    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
-    return text.replace(" ", "_").replace("__", "_")
-
-
-def extract_kanal(text: str) -> str:
-    t = text.lower()
-    if "shop" in t:
-        return "SHOP"
-    if "il" in t:
-        return "IL"
-    return "UNKNOWN"
-
-
-def extract_segment(text: str) -> str:
-    t = text.lower()
-    if "b2c" in t:
-        return "B2C"
-    if "b2b" in t:
-        return "B2B"
-    return "UNKNOWN"
-
-
-def extract_service(text: str) -> str:
-    t = text.lower()
-    if "hlas" in t or "voice" in t:
-        return "HLAS"
-    if "fwa" in t and "bisi" in t:
-        return "FWA_BISI"
-    if "fwa" in t and re.search(r"\bbi\b", t):
-        return "FWA_BI"
-    for key in ["dsl", "fiber", "cable"]:
-        if key in t:
-            return key.upper()
-    if "fwa" in t:
-        return "FWA"
-    return "UNKNOWN"
-
-
-def build_test_name(poradi: int, veta: str) -> str:
-    kanal = extract_kanal(veta)
-    segment = extract_segment(veta)
-    service = extract_service(veta)
-
-    # Neupravujeme text věty – zůstává kompletní a nezměněná
-    prefix = f"{poradi:03d}_{kanal}_{segment}_{service}"
-    return f"{prefix}_{veta.strip().capitalize()}"
-
-
-def detect_action(text: str, kroky_data: dict) -> str | None:
-    t = text.lower()
-    for akce in kroky_data.keys():
-        if akce.lower() in t:
-            return akce
-    return None
-
-
-def generuj_testcase(veta, kroky_data, akce, priority, complexity):
-    poradi = projekty_data[AKTUALNI_PROJEKT]["next_id"]
-    projekty_data[AKTUALNI_PROJEKT]["next_id"] += 1
-
-    test_name = build_test_name(poradi, veta)
-    segment = extract_segment(veta)
-    kanal = extract_kanal(veta)
-
-    # DŮLEŽITÉ: Použij deepcopy pro kroky
-    kroky_pro_akci = copy.deepcopy(kroky_data.get(akce, []))
-
-    tc = {
-        "order_no": poradi,
-        "test_name": test_name,
-        "akce": akce,
-        "segment": segment,
-        "kanal": kanal,
-        "priority": priority,
-        "complexity": complexity,
-        "veta": veta,
-        "kroky": kroky_pro_akci,  # Tady používáme hlubokou kopii
-    }
-
-    projekty_data[AKTUALNI_PROJEKT]["scenarios"].append(tc)
-    uloz_projekty()
+    """Akce z katalogu data/kroky včetně úprav z aplikace (kroky_custom.json)"""
+    if not KROKY_DIR.exists() and not KROKY_PATH.exists():
+        safe_print("⚠️ Katalog akcí nebyl nalezen! Vytvořím prázdný.")
+    return core.load_effective_steps(KROKY_DIR, KROKY_CUSTOM_PATH)
+
+
+def metadata_akce(akce, kroky_data):
+    """Předpočítaná metadata akce (počet kroků, komplexita, checksum)"""
+    metadata = core.load_action_metadata(KROKY_DIR, KROKY_CUSTOM_PATH).get(akce)
+    if metadata is None and akce in kroky_data:
+        metadata = action_metadata(kroky_data[akce])
+    return metadata
+
+
+def generuj_testcase(veta, kroky_data, akce, priority, complexity=None):
+    """Uloží nový scénář do aktuálního projektu, complexity None = automaticky podle počtu kroků akce"""
+    global projekty_data
+    tc, projekty_data = core.generate_testcase(
+        AKTUALNI_PROJEKT, veta, akce, priority, complexity, kroky_data, projekty_data,
+        metadata=metadata_akce(akce, kroky_data),
+    )
     return tc
 
 
@@ -143,7 +88,7 @@ def debug_kroky():
     
     print("\n=== DEBUG KROKY ===")
     for akce in kroky_data.keys():
-        kroky = kroky_data[akce]
+        kroky = kroky_data[akce].get("steps", []) if isinstance(kroky_data[akce], dict) else kroky_data[akce]
         print(f"Akce: {akce}")
         print(f"  Počet kroků: {len(kroky)}")
         if kroky:
@@ -180,9 +125,8 @@ def vyber_projekt():
             safe_print(f"🔹 Načten projekt: {AKTUALNI_PROJEKT}")
             return
     else:
-        subject = input("Zadej Subject (Enter = default UAT2\\Antosova\\): ").strip() or "UAT2\\Antosova\\"
-        projekty_data[volba] = {"next_id": 1, "subject": subject, "scenarios": []}
-        uloz_projekty()
+        subject = input(f"Zadej Subject (Enter = default {DEFAULT_SUBJECT}): ").strip() or DEFAULT_SUBJECT
+        uloz_operace(storage.op_create_project(volba, subject, exist_ok=True))
         AKTUALNI_PROJEKT = volba
         safe_print(f"✅ Nový projekt {volba} vytvořen.")
 
@@ -203,7 +147,6 @@ def uprav_projekt():
         return
 
     nazev = list(projekty_data.keys())[idx]
-    projekt = projekty_data[nazev]
 
     safe_print(f"\n--- Úprava projektu {nazev} ---")
     safe_print("1. Změnit název")
@@ -213,20 +156,19 @@ def uprav_projekt():
     if vyber == "1":
         novy = input("Zadej nový název: ").strip()
         if novy:
-            projekty_data[novy] = projekty_data.pop(nazev)
+            uloz_operace(storage.op_rename_project(nazev, novy))
             global AKTUALNI_PROJEKT
             if AKTUALNI_PROJEKT == nazev:
                 AKTUALNI_PROJEKT = novy
             safe_print(f"✅ Projekt přejmenován na {novy}")
     elif vyber == "2":
-        novy_subject = input(f"Zadej nový Subject (aktuální: {projekt.get('subject','None')}): ").strip()
+        aktualni = projekty_data.summary(nazev).get("subject") or "None"
+        novy_subject = input(f"Zadej nový Subject (aktuální: {aktualni}): ").strip()
         if not novy_subject:
-            novy_subject = "UAT2\\Antosova\\"
-        projekt["subject"] = novy_subject
+            novy_subject = DEFAULT_SUBJECT
+        uloz_operace(storage.op_update_project(nazev, lambda projekt: projekt.update(subject=novy_subject)))
         safe_print(f"✅ Subject změněn na: {novy_subject}")
 
-    uloz_projekty()
-
 
 def smaz_projekt():
     if not projekty_data:
@@ -241,8 +183,7 @@ def smaz_projekt():
             nazev = list(projekty_data.keys())[idx]
             potvrdit = input(f"Opravdu smazat {nazev}? (ano/ne): ").strip().lower()
             if potvrdit == "ano":
-                projekty_data.pop(nazev)
-                uloz_projekty()
+                uloz_operace(storage.op_delete_project(nazev))
                 safe_print("✅ Projekt smazán.")
 
 
@@ -254,7 +195,7 @@ def uprav_scenar():
         return
 
     for idx, tc in enumerate(sc, start=1):
-        safe_print(f"{idx}. {tc['test_name']}")
+        safe_print(f"{idx}. {zobraz_nazev(idx, tc)}")
 
     volba = input("Zadej číslo scénáře: ").strip()
     if not volba.isdigit():
@@ -264,27 +205,30 @@ def uprav_scenar():
         return
 
     tc = sc[idx]
-    safe_print(f"\n--- Úprava scénáře {tc['test_name']} ---")
+    safe_print(f"\n--- Úprava scénáře {zobraz_nazev(idx + 1, tc)} ---")
     safe_print("1. Změnit název")
     safe_print("2. Změnit prioritu")
     safe_print("3. Změnit komplexitu")
     vyber = input("Zvol: ").strip()
 
+    zmeny = {}
     if vyber == "1":
-        novy = input("Zadej nový název: ").strip()
+        novy = input("Zadej nový název (bez čísla): ").strip()
         if novy:
-            tc["test_name"] = novy
+            zmeny["test_name"] = novy
             safe_print("✅ Název změněn.")
     elif vyber == "2":
         p = input("Nová priorita (1=High,2=Medium,3=Low): ").strip()
-        tc["priority"] = PRIORITY_MAP.get(p, tc["priority"])
+        zmeny["priority"] = PRIORITY_MAP.get(p, tc["priority"])
         safe_print("✅ Priorita změněna.")
     elif vyber == "3":
         c = input("Nová komplexita (1–5): ").strip()
-        tc["complexity"] = COMPLEXITY_MAP.get(c, tc["complexity"])
+        zmeny["complexity"] = COMPLEXITY_MAP.get(c, tc["complexity"])
         safe_print("✅ Komplexita změněna.")
 
-    uloz_projekty()
+    if zmeny:
+        # název bez čísla - op_update_scenario zahodí i starší order_no
+        uloz_operace(storage.op_update_scenario(AKTUALNI_PROJEKT, tc, zmeny, idx + 1))
 
 
 def smaz_scenar():
@@ -294,83 +238,93 @@ def smaz_scenar():
         return
 
     for idx, tc in enumerate(sc, start=1):
-        safe_print(f"{idx}. {tc['test_name']}")
+        safe_print(f"{idx}. {zobraz_nazev(idx, tc)}")
     volba = input("Zadej číslo scénáře k odstranění: ").strip()
     if volba.isdigit():
         idx = int(volba) - 1
         if 0 <= idx < len(sc):
             potvrdit = input("Opravdu smazat? (ano/ne): ").strip().lower()
             if potvrdit == "ano":
-                sc.pop(idx)
-                # 🧩 Přepočet pořadí po smazání
-                for i, t in enumerate(sc, start=1):
-                    t["order_no"] = i
-                uloz_projekty()
-                safe_print("✅ Scénář smazán a pořadí přepočítáno.")
-
-
-# --- Export s přečíslováním ---
-def exportuj_excel():
+                # Pořadí je pozice v seznamu – ostatní scénáře se nemění
+                uloz_operace(storage.op_delete_scenario(AKTUALNI_PROJEKT, sc[idx], idx + 1))
+                safe_print("✅ Scénář smazán.")
+
+
+# --- Přečíslování ---
+def precisluj_projekt(projekt: dict) -> int:
+    """
+    Čísla se odvozují z pozice, přečíslování tedy jen převede starší scénáře
+    (order_no + číslo v test_name) na uložený název bez čísla.
+    Vrací počet upravených scénářů.
+    """
+    upraveno = 0
+    for tc in projekt.get("scenarios", []):
+        if "order_no" in tc:
+            tc["test_name"] = core.stored_test_name(tc)
+            tc.pop("order_no")
+            upraveno += 1
+    projekt.pop("next_id", None)
+    return upraveno
+
+
+def potrebuje_precislovani(projekt: dict) -> bool:
+    """Má projekt něco, co precisluj_projekt změní (order_no, next_id)?"""
+    return "next_id" in projekt or any("order_no" in tc for tc in projekt.get("scenarios", []))
+
+
+# --- Export (čísla podle pozice) ---
+def exportuj_excel(git_push=True, podrobne=True):
     EXPORTS_DIR.mkdir(exist_ok=True)
     safe_name = AKTUALNI_PROJEKT.replace(" ", "_")
     output_path = EXPORTS_DIR / f"testcases_{safe_name}.xlsx"
-    subject = projekty_data[AKTUALNI_PROJEKT].get("subject", "UAT2\\Antosova\\")
-    rows = []
-
-    # Přepočítáme pořadí podle skutečného pořadí v seznamu (ne order_no)
-    scenarios = projekty_data[AKTUALNI_PROJEKT]["scenarios"]
-    for new_order, tc in enumerate(scenarios, start=1):
-
-        veta = tc.get("veta", tc["test_name"])  # Fallback pro starší data
-        new_test_name = build_test_name(new_order, veta)
-        
-        # Debug info
-        safe_print(f"Scénář {new_order}: Akce='{tc['akce']}', Počet kroků={len(tc['kroky'])}")
-        
-        for i, krok in enumerate(tc["kroky"], start=1):
-            desc = krok.get("description", "")
-            expected = krok.get("expected", "TODO: doplnit očekávání")
-            rows.append({
-                "_order_no": new_order,
-                "Project": AKTUALNI_PROJEKT,
-                "System/Application": SYSTEM_APPLICATION,
-                "Subject": subject,
-                "Description": f"Segment: {tc['segment']}\nKanal: {tc['kanal']}\nAkce: {tc['akce']}",
-                "Type": TYPE,
-                "Test Phase": TEST_PHASE,
-                "Test: Test Phase": TEST_TEST_PHASE,
-                "Test Priority": tc["priority"],
-                "Test Complexity": tc["complexity"],
-                "Test Name": new_test_name,
-                "Step Name (Design Steps)": str(i),
-                "Description (Design Steps)": desc,
-                "Expected (Design Steps)": expected
-            })
-
-    if not rows:
+    projekt = projekty_data[AKTUALNI_PROJEKT]
+
+    # Pořadí = skutečné pořadí v seznamu
+    if podrobne:
+        for poradi, tc in enumerate(projekt["scenarios"], start=1):
+            safe_print(f"Scénář {poradi}: Akce='{tc['akce']}', Počet kroků={core.scenario_step_count(tc)}")
+
+    # stejná cache jako v aplikaci - nezměněný projekt se negeneruje znovu
+    obsah = core.export_workbook(
+        AKTUALNI_PROJEKT,
+        projekty_data,
+        sheet_name="Sheet1",
+        description=EXPORT_DESCRIPTION,
+        default_expected="TODO: doplnit očekávání",
+    )
+    if obsah is None:
         safe_print("⚠️ Žádné scénáře k exportu.")
-        return
+        return None
 
-    df = pd.DataFrame(rows)
-    df = df.sort_values(by="_order_no").drop(columns=["_order_no"])
-    df.to_excel(output_path, index=False)
+    if output_path.exists() and output_path.read_bytes() == obsah:
+        safe_print(f"✅ Beze změny od posledního exportu: {output_path}")
+        return output_path
+    storage.write_bytes_atomic(output_path, obsah)
     safe_print(f"✅ Exportováno do: {output_path}")
 
-    # 🔹 Automatický commit & push na GitHub s rebase ochranou
-    try:
-        subprocess.run(["git", "add", str(output_path)], check=True)
-        subprocess.run(["git", "commit", "-m", f"Auto export {AKTUALNI_PROJEKT}"], check=True)
+    if not git_push:
+        return output_path
+
+    # 🔹 commit & push na GitHub obstará na pozadí gitqueue (víc exportů = jeden commit);
+    # import až tady - start CLI nepotřebuje subprocess ani git
+    import gitqueue
 
-        # 🧩 Nejprve zkus pull s rebase, aby se vyřešily kolize
-        subprocess.run(["git", "pull", "--rebase"], check=True)
-        subprocess.run(["git", "push"], check=True)
+    gitqueue.enqueue(output_path, f"Auto export {AKTUALNI_PROJEKT}")
+    gitqueue.spawn_worker()
+    safe_print("📤 Zařazeno k nahrání do GitHub repozitáře (stav: main_script.py git-status).")
+    return output_path
 
-        safe_print("✅ Soubor úspěšně nahrán do GitHub repozitáře.")
-    except subprocess.CalledProcessError as e:
-        safe_print(f"⚠️ Git operace selhala: {e}")
+
+def vypis_stav_gitu(stav):
+    safe_print(f"Stav: {stav['state']}{' (pracuje)' if stav['worker_active'] else ''}")
+    vypis_radky(f"⏳ {zaznam['path']} – {zaznam['message']}" for zaznam in stav["pending"])
+    if stav["unpushed"]:
+        safe_print("⚠️ Commit čeká na push.")
+    if stav["last_error"]:
+        safe_print(f"⚠️ Poslední chyba ({stav['last_attempt']}): {stav['last_error']}")
         safe_print("ℹ️ Zkus ručně spustit v terminálu: git pull --rebase && git push")
-    except Exception as e:
-        safe_print(f"⚠️ Nepodařilo se nahrát soubor: {e}")
+    if stav["last_push"]:
+        safe_print(f"✅ Poslední push: {stav['last_push']}")
 
 
 # --- Menu ---
@@ -402,12 +356,15 @@ def menu():
                 idx = int(input("Číslo akce: ")) - 1
                 akce = list(kroky_data.keys())[idx]
             p = input("Priorita (1=High,2=Medium,3=Low): ")
-            c = input("Komplexita (1–5): ")
-            tc = generuj_testcase(veta, kroky_data, akce, PRIORITY_MAP.get(p,"2-Medium"), COMPLEXITY_MAP.get(c,"4-Medium"))
-            safe_print(f"✅ Vygenerován test: {tc['test_name']}")
+            c = input("Komplexita (1–5, Enter = podle počtu kroků): ")
+            tc = generuj_testcase(veta, kroky_data, akce, PRIORITY_MAP.get(p,"2-Medium"), COMPLEXITY_MAP.get(c.strip()))
+            poradi = len(projekty_data[AKTUALNI_PROJEKT]["scenarios"])
+            safe_print(f"✅ Vygenerován test: {zobraz_nazev(poradi, tc)}")
         elif volba == "3":
-            for tc in projekty_data[AKTUALNI_PROJEKT]["scenarios"]:
-                safe_print(f"- {tc['test_name']} ({tc['priority']} | {tc['complexity']})")
+            vypis_radky(
+                f"- {zobraz_nazev(poradi, tc)} ({tc['priority']} | {tc['complexity']})"
+                for poradi, tc in enumerate(projekty_data[AKTUALNI_PROJEKT]["scenarios"], start=1)
+            )
         elif volba == "4":
             uprav_scenar()
         elif volba == "5":
@@ -427,12 +384,310 @@ def menu():
             safe_print("⚠️ Neplatná volba.")
 
 
-if __name__ == "__main__":
-    safe_print("✅ Program spuštěn, připraven k práci...")
+# --- Dávkový režim (bez input) ---
+def nacti_vety(soubor: Path):
+    """
+    Scénáře ze souboru: .csv s hlavičkou veta[,akce,priority,complexity]
+    nebo prostý text s jednou větou na řádek (prázdné řádky a # se přeskočí).
+    Čte se průběžně, soubor se nenačítá do paměti celý.
+    """
+    with open(soubor, "r", encoding="utf-8-sig", newline="") as f:
+        if soubor.suffix.lower() == ".csv":
+            for radek in csv.DictReader(f):
+                if (radek.get("veta") or "").strip():
+                    yield radek
+            return
+        for radek in f:
+            if radek.strip() and not radek.lstrip().startswith("#"):
+                yield {"veta": radek.strip()}
+
+
+def vyzaduj_projekt(nazev):
+    global AKTUALNI_PROJEKT
+    if nazev not in projekty_data:
+        raise SystemExit(f"⚠️ Projekt '{nazev}' neexistuje.")
+    AKTUALNI_PROJEKT = nazev
+
+
+def cmd_create_project(args):
+    if args.name in projekty_data:
+        if not args.exist_ok:
+            raise SystemExit(f"⚠️ Projekt '{args.name}' už existuje.")
+        safe_print(f"🔹 Projekt {args.name} už existuje.")
+        return
+    uloz_operace(storage.op_create_project(args.name, args.subject, exist_ok=args.exist_ok))
+    safe_print(f"✅ Nový projekt {args.name} vytvořen.")
+
+
+def cmd_add_scenarios(args):
+    vyzaduj_projekt(args.project)
+    kroky_data = nacti_kroky()
+    pridano, preskoceno = [], []
+
+    # priority/komplexita z CSV jsou kódy 1–5, prázdné = výchozí z parametrů
+    zaznamy = (
+        {
+            **zaznam,
+            "akce": (zaznam.get("akce") or "").strip(),
+            "priority": PRIORITY_MAP.get((zaznam.get("priority") or "").strip()),
+            "complexity": COMPLEXITY_MAP.get((zaznam.get("complexity") or "").strip()),
+        }
+        for zaznam in nacti_vety(Path(args.file))
+    )
+    for zaznam, tc in pipeline.iter_scenarios(
+        zaznamy,
+        kroky_data,
+        priority=args.priority,
+        complexity=args.complexity,
+        default_action=args.action,
+        action_metadata=core.load_action_metadata(KROKY_DIR, KROKY_CUSTOM_PATH),
+        mode=args.mode,
+        workers=args.workers,
+    ):
+        if tc is None:
+            preskoceno.append(f"⚠️ Nenalezena akce, přeskočeno: {zaznam['veta']}")
+        else:
+            pridano.append(tc)
+
+    # jeden zápis na konci místo uložení po každém scénáři
+    if pridano:
+        uloz_operace(*(storage.op_add_scenario(AKTUALNI_PROJEKT, tc) for tc in pridano))
+    pocet = len(projekty_data[AKTUALNI_PROJEKT]["scenarios"])
+    prvni = pocet - len(pridano) + 1
+    vypis_radky(f"✅ {zobraz_nazev(prvni + idx, tc)}" for idx, tc in enumerate(pridano))
+    vypis_radky(preskoceno)
+    safe_print(f"Přidáno {len(pridano)}, přeskočeno {len(preskoceno)}.")
+    return 1 if preskoceno and args.strict else 0
+
+
+def cmd_list(args):
+    if args.actions:
+        vypis_radky(nacti_kroky().keys())
+    elif args.project:
+        vyzaduj_projekt(args.project)
+        vypis_radky(
+            f"{zobraz_nazev(poradi, tc)} ({tc['priority']} | {tc['complexity']})"
+            for poradi, tc in enumerate(projekty_data[AKTUALNI_PROJEKT]["scenarios"], start=1)
+        )
+    elif args.archived or args.search:
+        # jen malý index archivu - archivované projekty se nečtou
+        vypis_radky(
+            f"{nazev} ({zaznam.get('scenario_count', 0)} scénářů, archivováno {zaznam.get('archived', '?')})"
+            for nazev, zaznam in storage.search_archive(PROJEKTY_DIR, args.search or "")
+        )
+    else:
+        # počty z manifestu - projekty se kvůli výpisu nenačítají
+        vypis_radky(
+            f"{nazev} ({projekty_data.summary(nazev)['scenario_count']} scénářů)"
+            for nazev in projekty_data
+        )
+
+
+def cmd_archive_projects(args):
+    """Přesune vybrané nebo dlouho neměněné projekty do komprimovaného archivu"""
+    nazvy = list(args.names)
+    if args.stale is not None:
+        nazvy += [nazev for nazev in storage.stale_projects(projekty_data, args.stale) if nazev not in nazvy]
+    if not nazvy:
+        safe_print("ℹ️ Žádné projekty k archivaci.")
+        return 0
+    for nazev in nazvy:
+        vyzaduj_projekt(nazev)
+    if args.dry_run:
+        vypis_radky(nazvy)
+        safe_print(f"Archivovalo by se {len(nazvy)} projektů.")
+        return 0
+    uloz_operace(*(storage.op_archive_project(PROJEKTY_DIR, nazev) for nazev in nazvy))
+    safe_print(f"✅ Archivováno {len(nazvy)} projektů do {storage.archive_dir(PROJEKTY_DIR)}.")
+    return 0
+
+
+def cmd_restore_project(args):
+    global projekty_data
+    archiv = storage.load_archive_index(PROJEKTY_DIR)
+    chybi = [nazev for nazev in args.names if nazev not in archiv]
+    if chybi:
+        raise SystemExit(f"⚠️ V archivu není: {', '.join(chybi)}")
+    projekty_data, _ = storage.restore_projects(PROJEKTY_DIR, args.names)
+    safe_print(f"✅ Obnoveno {len(args.names)} projektů.")
+    return 0
+
+
+def cmd_renumber(args):
+    projekty = [args.project] if args.project else list(projekty_data)
+    for nazev in projekty:
+        vyzaduj_projekt(nazev)
+    # jen projekty se staršími scénáři - ostatní se nepřepisují (revize, git)
+    projekty = [nazev for nazev in projekty if potrebuje_precislovani(projekty_data[nazev])]
+    upraveno = []
+    if projekty:
+        uloz_operace(*(
+            storage.op_update_project(nazev, lambda projekt: upraveno.append(precisluj_projekt(projekt)))
+            for nazev in projekty
+        ))
+    celkem = sum(upraveno)
+    safe_print(f"✅ Přečíslováno, upraveno {celkem} starších scénářů.")
+
+
+def cmd_git_status(args):
+    import gitqueue
+
+    vypis_stav_gitu(gitqueue.status())
+
+
+def cmd_git_sync(args):
+    """Dožene frontu hned (bez čekání na pracovní proces na pozadí)"""
+    import gitqueue
+
+    vysledek = gitqueue.drain()
+    if vysledek is None:
+        safe_print("ℹ️ Frontu už zpracovává jiný proces.")
+    vypis_stav_gitu(gitqueue.status())
+    return 1 if vysledek is False else 0
+
+
+def cmd_export(args):
+    vyzaduj_projekt(args.project)
+    return 0 if exportuj_excel(git_push=not args.no_push, podrobne=args.verbose) else 1
+
+
+def cmd_export_archive(args):
+    """
+    Archiv projektů (soubor ve formátu projects.json, i .gz / .zst) se čte proudově -
+    v paměti je vždy jen jeden projekt, takže zvládne i archivy o stovkách MB.
+    """
+    archiv = Path(args.file)
+    if not archiv.exists():
+        raise SystemExit(f"⚠️ Soubor {archiv} neexistuje.")
+
+    if args.compress:
+        puvodni = archiv.stat().st_size
+        archiv = compress.compress_file(archiv, compress.configured(args.compress))
+        safe_print(f"✅ Zkomprimováno do: {archiv} ({puvodni // 1024} KB → {archiv.stat().st_size // 1024} KB)")
+        return 0
+
+    if not args.project:
+        celkem = 0
+        radky = []
+        for nazev, projekt in jsonstream.iter_items(archiv):
+            pocet = len(projekt.get("scenarios", [])) if isinstance(projekt, dict) else 0
+            celkem += pocet
+            radky.append(f"{nazev} ({pocet} scénářů)")
+        vypis_radky(radky)
+        safe_print(f"Celkem {len(radky)} projektů, {celkem} scénářů.")
+        return 0
+
+    projekt = dict(jsonstream.iter_items(archiv, [args.project]))
+    if not projekt:
+        raise SystemExit(f"⚠️ Projekt '{args.project}' v archivu není.")
+    if not args.export:
+        vypis_radky(
+            f"{zobraz_nazev(poradi, tc)} ({tc.get('priority')} | {tc.get('complexity')})"
+            for poradi, tc in enumerate(projekt.get("scenarios", []), start=1)
+        )
+        return 0
+
+    obsah = core.export_workbook(
+        args.project,
+        {args.project: projekt},
+        sheet_name="Sheet1",
+        description=EXPORT_DESCRIPTION,
+        default_expected="TODO: doplnit očekávání",
+    )
+    if obsah is None:
+        safe_print("⚠️ Žádné scénáře k exportu.")
+        return 1
+    output_path = EXPORTS_DIR / f"archive_{args.project.replace(' ', '_')}.xlsx"
+    storage.write_bytes_atomic(output_path, obsah)
+    safe_print(f"✅ Exportováno do: {output_path}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Generátor test casů pro HPQC. Bez příkazu se spustí interaktivní menu."
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("create-project", help="vytvoří projekt")
+    p.add_argument("name")
+    p.add_argument("--subject", default="UAT2\\Antosova\\")
+    p.add_argument("--exist-ok", action="store_true", help="existující projekt není chyba")
+    p.set_defaults(func=cmd_create_project)
+
+    p = sub.add_parser("add-scenarios", help="přidá scénáře ze souboru (.txt věta na řádek nebo .csv)")
+    p.add_argument("project")
+    p.add_argument("file")
+    p.add_argument("--action", help="akce pro věty, ve kterých se žádná nenajde")
+    p.add_argument("--priority", default="2-Medium", choices=list(PRIORITY_MAP.values()))
+    p.add_argument("--complexity", choices=list(COMPLEXITY_MAP.values()),
+                   help="výchozí komplexita, bez ní se určí podle počtu kroků akce")
+    p.add_argument("--strict", action="store_true", help="návratový kód 1, pokud se něco přeskočilo")
+    p.add_argument("--mode", default="auto", choices=pipeline.MODES,
+                   help="zpracování vět: auto = více procesů jen pro velké soubory")
+    p.add_argument("--workers", type=int, help="počet procesů pro --mode process (výchozí počet CPU)")
+    p.set_defaults(func=cmd_add_scenarios)
+
+    p = sub.add_parser("list", help="vypíše projekty, scénáře projektu nebo akce")
+    p.add_argument("--project")
+    p.add_argument("--actions", action="store_true")
+    p.add_argument("--archived", action="store_true", help="archivované projekty")
+    p.add_argument("--search", help="hledá v archivu podle názvu a subjectu")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("archive-projects", help="přesune projekty do komprimovaného archivu (nenačítají se při startu)")
+    p.add_argument("names", nargs="*")
+    p.add_argument("--stale", type=int, metavar="DNY", help="i projekty neměněné posledních DNY dní")
+    p.add_argument("--dry-run", action="store_true", help="jen vypíše, co by se archivovalo")
+    p.set_defaults(func=cmd_archive_projects)
+
+    p = sub.add_parser("restore-project", help="vrátí projekty z archivu")
+    p.add_argument("names", nargs="+")
+    p.set_defaults(func=cmd_restore_project)
+
+    p = sub.add_parser("renumber", help="převede starší scénáře na číslování podle pozice")
+    p.add_argument("--project")
+    p.set_defaults(func=cmd_renumber)
+
+    p = sub.add_parser("export", help="export projektu do Excelu")
+    p.add_argument("project")
+    p.add_argument("--no-push", action="store_true", help="bez git commit/push")
+    p.add_argument("--verbose", action="store_true", help="vypíše každý scénář")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("export-archive", help="projekty ze souboru archivu (formát projects.json), čte se proudově")
+    p.add_argument("file")
+    p.add_argument("--project", help="vypíše scénáře jednoho projektu")
+    p.add_argument("--export", action="store_true", help="s --project: export projektu do Excelu (bez git)")
+    p.add_argument("--compress", choices=[compress.GZIP, compress.ZSTD],
+                   help="nahradí archiv jeho zkomprimovanou kopií (.gz / .zst)")
+    p.set_defaults(func=cmd_export_archive)
+
+    p = sub.add_parser("git-status", help="fronta exportů čekajících na git commit/push")
+    p.set_defaults(func=cmd_git_status)
+
+    p = sub.add_parser("git-sync", help="hned provede commit a push všeho ve frontě")
+    p.set_defaults(func=cmd_git_sync)
+    return parser
+
+
+def main(argv=None):
+    global projekty_data
+    args = build_parser().parse_args(argv)
     projekty_data = nacti_projekty()
-    
-    # Spust debug
-    debug_kroky()
-    
+
+    if args.command:
+        try:
+            return args.func(args) or 0
+        except storage.ConflictError as e:
+            raise SystemExit(f"⚠️ {e}")
+
+    safe_print("✅ Program spuštěn, připraven k práci...")
+
     vyber_projekt()
-    menu()
\ No newline at end of file
+    menu()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,42 @@
+import sys
+
+
+def deep_sizeof(obj, seen: set) -> int:
+    """Approximate size in bytes of obj and everything it references, skipping ids in seen"""
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    return total
+
+
+def session_footprint(session_items, shared_objects=()):
+    """
+    Memory held by one session.
+    Objects reachable from shared_objects (the process-level snapshot) are
+    counted once in shared_bytes and not charged to the session keys.
+    Returns (shared_bytes, [(key, bytes)] sorted by size).
+    """
+    seen = set()
+    shared_bytes = sum(deep_sizeof(obj, seen) for obj in shared_objects)
+    rows = [(str(key), deep_sizeof(value, seen)) for key, value in session_items]
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return shared_bytes, rows
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,195 @@
+"""
+Streaming bulk classification of requirement sentences.
+
+    for record, scenario in pipeline.iter_scenarios(sentences, steps_data, priority="2-Medium"):
+        ...
+
+Input is any iterable of sentences (str) or records (dict with "veta" and
+optional "akce", "priority", "complexity"). It is read in chunks, so a large
+file is never materialized; every chunk is classified in this process or in a
+process pool, and records are yielded in input order as soon as their chunk
+is done.
+
+Chunks are classified with the same helpers the app and the CLI use for a
+single sentence. Those are plain substring checks (a few microseconds per
+sentence); pandas string operations measured no faster on them, so large
+inputs are spread over processes instead.
+"""
+import os
+from collections import deque
+from itertools import islice
+
+import core
+import logs
+import textnorm
+from diagnostics import count, timed
+
+log = logs.get_logger("pipeline")
+
+CHUNK_SIZE = 1000
+# "auto" starts a process pool only for inputs of at least this many sentences
+PROCESS_MIN = 50_000
+# Chunks in flight per worker - the input is not read further ahead than this
+PENDING_PER_WORKER = 2
+
+MODES = ("auto", "serial", "process")
+
+# Action names in the worker processes (set by _init_worker)
+_worker_actions = ()
+
+
+# ---------- CLASSIFICATION ----------
+def _as_record(item) -> dict:
+    if isinstance(item, dict):
+        record = dict(item)
+        record["veta"] = str(record.get("veta") or "").strip()
+        return record
+    return {"veta": str(item).strip()}
+
+
+def classify_record(record: dict, action_names) -> dict:
+    """Fill segment, channel, technology, names and action (unless given) of one record"""
+    veta = record["veta"]
+    record["segment"] = core.extract_segment(veta)
+    record["kanal"] = core.extract_channel(veta)
+    record["technologie"] = core.extract_technology(veta)
+    record["test_name"] = core.build_base_test_name(veta)
+    # imported sentences are one-off - keep them out of the step-text cache
+    record["veta_ascii"] = textnorm.fold_diacritics(veta)
+    record["slug"] = textnorm.normalize_text(veta)
+    if not record.get("akce"):
+        record["akce"] = core.detect_action(veta, action_names)
+    return record
+
+
+def classify_chunk(records: list, action_names) -> list:
+    """Row by row - the same functions the app and the CLI use for a single sentence"""
+    return [classify_record(record, action_names) for record in records]
+
+
+def _init_worker(action_names):
+    global _worker_actions
+    _worker_actions = action_names
+
+
+def _classify_in_worker(records: list) -> list:
+    return classify_chunk(records, _worker_actions)
+
+
+# ---------- STREAMING ----------
+def iter_chunks(items, chunk_size: int = CHUNK_SIZE):
+    """Lists of at most chunk_size records, read lazily from items"""
+    iterator = iter(items)
+    while True:
+        chunk = [_as_record(item) for item in islice(iterator, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_process(chunks, action_names, workers: int):
+    from concurrent.futures import ProcessPoolExecutor
+
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(action_names,))
+    try:
+        for chunk in chunks:
+            # back-pressure: wait for the oldest chunk before reading further
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_classify_in_worker, chunk))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # also when the consumer stops early - queued chunks are dropped
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_classified(items, action_names, mode: str = "auto", chunk_size: int = CHUNK_SIZE,
+                    workers: int = None):
+    """
+    Classified records in input order, chunk by chunk.
+
+    mode: "serial" (in this process), "process" (chunks in a pool of
+    `workers` processes) or "auto", which uses processes only for inputs of
+    at least PROCESS_MIN sentences on a machine with more than one CPU.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown pipeline mode: {mode}")
+    action_names = tuple(action_names)
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_chunks(items, chunk_size)
+
+    if mode == "auto":
+        # look ahead just far enough to know whether a pool pays off
+        buffered = []
+        for chunk in chunks:
+            buffered.append(chunk)
+            if len(buffered) * chunk_size >= PROCESS_MIN:
+                break
+        large = len(buffered) * chunk_size >= PROCESS_MIN and workers > 1
+        mode = "process" if large else "serial"
+        chunks = _chain(buffered, chunks)
+
+    log.debug("Classifying sentences", mode=mode, chunk_size=chunk_size, workers=workers)
+    if mode == "process":
+        results = _iter_process(chunks, action_names, workers)
+        for record in results:
+            count("pipeline.records")
+            yield record
+        return
+
+    for chunk in chunks:
+        with timed("pipeline.classify"):
+            records = classify_chunk(chunk, action_names)
+        count("pipeline.records", len(records))
+        yield from records
+
+
+def _chain(buffered, rest):
+    yield from buffered
+    yield from rest
+
+
+# ---------- SCENARIOS ----------
+def build_scenario(record: dict, steps_data: dict, priority: str, complexity: str = None,
+                   metadata: dict = None) -> dict:
+    """Scenario for a classified record (as core.generate_testcase stores it)"""
+    action = record["akce"]
+    if metadata is None and action in steps_data:
+        metadata = core.action_metadata(steps_data[action])
+    return {
+        "test_name": record["test_name"],
+        "akce": action,
+        "segment": record["segment"],
+        "kanal": record["kanal"],
+        "priority": priority,
+        "complexity": complexity or core.automatic_complexity(metadata),
+        "veta": record["veta"],
+        **core.scenario_step_fields(core.get_steps_from_action(action, steps_data), metadata),
+    }
+
+
+def iter_scenarios(items, steps_data: dict, priority: str = "2-Medium", complexity: str = None,
+                   default_action: str = None, action_metadata: dict = None, **options):
+    """
+    (record, scenario) pairs in input order; scenario is None when no known
+    action was given or detected. A record's own "priority"/"complexity"
+    win over the defaults. options go to iter_classified.
+    """
+    if action_metadata is None:
+        action_metadata = core.build_action_metadata(steps_data)
+    for record in iter_classified(items, steps_data.keys(), **options):
+        action = record["akce"] or default_action
+        if action not in steps_data:
+            yield record, None
+            continue
+        record["akce"] = action
+        scenario = build_scenario(
+            record,
+            steps_data,
+            record.get("priority") or priority,
+            record.get("complexity") or complexity,
+            action_metadata.get(action),
+        )
+        yield record, scenario
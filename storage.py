@@ -0,0 +1,994 @@
+import copy
+import hashlib
+import json
+import marshal
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import compress
+import jsonstream
+import textnorm
+from diagnostics import count, timed
+
+try:
+    import fcntl
+except ImportError:  # Windows - atomic replace still protects readers
+    fcntl = None
+
+
+class ConflictError(Exception):
+    """Raised when a pending operation no longer applies to the data on disk"""
+
+
+# Parsed JSON shared by every session of the process: path -> (stamp, data)
+_json_cache = {}
+# Values computed from cached files: name -> (source objects, result)
+_derived_cache = {}
+_json_cache_lock = threading.Lock()
+# Paths kept fresh by a DataWatcher (see watcher.py) - no stat() needed on read
+_watched_paths = set()
+
+
+# ---------- FILE ACCESS ----------
+@contextmanager
+def file_lock(filepath):
+    """
+    Exclusive advisory lock for a read-modify-write of filepath.
+    Readers never take it, writers hold it only while merging and renaming.
+    """
+    filepath = Path(filepath)
+    if fcntl is None:
+        yield
+        return
+
+    filepath.parent.mkdir(exist_ok=True)
+    lock_path = filepath.with_name(filepath.name + ".lock")
+    with open(lock_path, "a") as lock_file:
+        with timed("file.lock_wait"):
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_json(filepath):
+    """Load JSON file (plain, gzip or zstd - see compress.py), missing file means {}"""
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return {}
+    with timed("file.read"):
+        raw = filepath.read_bytes()
+    count("file.reads")
+    return _parse_json(raw)
+
+
+def _parse_json(raw: bytes):
+    if compress.detect(raw[:4]) != compress.NONE:
+        with timed("file.decompress"):
+            raw = compress.decode(raw)
+    with timed("json.parse"):
+        return json.loads(raw.decode("utf-8"))
+
+
+def file_stamp(filepath):
+    """(mtime_ns, size) of filepath, None when missing"""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_json_cached(filepath):
+    """
+    Parsed content of filepath, shared by all sessions of this process.
+    The result must be treated as read-only - copy it before changing it.
+    """
+    filepath = Path(filepath)
+    with _json_cache_lock:
+        cached = _json_cache.get(filepath)
+        watched = filepath in _watched_paths
+
+    if cached is not None and (watched or cached[0] == file_stamp(filepath)):
+        count("json_cache.hit")
+        return cached[1]
+
+    count("json_cache.miss")
+    stamp = file_stamp(filepath)
+    data = read_json_snapshot(filepath, stamp)
+    # do not cache a version that was replaced while we were parsing it
+    if stamp == file_stamp(filepath):
+        with _json_cache_lock:
+            _json_cache[filepath] = (stamp, data)
+    return data
+
+
+def invalidate_cache(filepath=None, stamp=None):
+    """
+    Drop the parsed copy of filepath (of everything when None).
+    With stamp, a copy that already matches that file version is kept.
+    """
+    with _json_cache_lock:
+        if filepath is None:
+            _json_cache.clear()
+            _derived_cache.clear()
+            return
+        cached = _json_cache.get(Path(filepath))
+        if cached is not None and (stamp is None or cached[0] != stamp):
+            del _json_cache[Path(filepath)]
+
+
+def _prime_cache(filepath, data):
+    """Share data we have just written instead of parsing it again"""
+    with _json_cache_lock:
+        _json_cache[Path(filepath)] = (file_stamp(filepath), data)
+
+
+def cached_derivation(name: str, filepaths, build):
+    """
+    build(*parsed_files) computed once per version of the source files and
+    shared like load_json_cached results (read-only).
+    """
+    sources = tuple(load_json_cached(filepath) for filepath in filepaths)
+    with _json_cache_lock:
+        cached = _derived_cache.get(name)
+    if cached is not None and all(a is b for a, b in zip(cached[0], sources)):
+        return cached[1]
+
+    with timed(f"derive.{name}"):
+        result = build(*sources)
+    with _json_cache_lock:
+        _derived_cache[name] = (sources, result)
+    return result
+
+
+def shared_objects() -> list:
+    """Everything currently held in the process-level caches"""
+    with _json_cache_lock:
+        return [data for _, data in _json_cache.values()] + [result for _, result in _derived_cache.values()]
+
+
+def set_watched(filepath, watched=True):
+    with _json_cache_lock:
+        if watched:
+            _watched_paths.add(Path(filepath))
+        else:
+            _watched_paths.discard(Path(filepath))
+
+
+def write_json_atomic(filepath, data, compression: str = compress.NONE):
+    """
+    Write to a temp file and rename it over filepath, so nobody reads a half-written file.
+    A compressed file is written compact (not indented).
+    """
+    with timed("json.serialize"):
+        if compression == compress.NONE:
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        else:
+            payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if compression != compress.NONE:
+        with timed("file.compress"):
+            payload = compress.encode(payload, compression)
+    write_bytes_atomic(filepath, payload)
+
+
+def write_bytes_atomic(filepath, payload: bytes):
+    """write_json_atomic for content that is already bytes (export workbooks, ...)"""
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with timed("file.write"):
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_name, filepath)
+        invalidate_cache(filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def delete_data_file(filepath):
+    """Remove a data file together with its snapshot (missing is fine)"""
+    for path in (Path(filepath), snapshot_path(filepath)):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ---------- WARM-START SNAPSHOT ----------
+# A cold process (CLI run, new app process) loads a large data file from a
+# marshal copy in .snapshot/ next to it instead of parsing the JSON again.
+# The copy is valid for the file's (mtime, size); after a touch without a
+# change (git checkout) the content hash still matches and it is reused.
+SNAPSHOT_ENABLED = os.environ.get("TESTOOL_SNAPSHOT", "1") != "0"
+SNAPSHOT_DIR_NAME = ".snapshot"
+# below this the JSON parses faster than a second file is opened
+SNAPSHOT_MIN_BYTES = 64 * 1024
+# marshal's format belongs to the Python version
+_SNAPSHOT_FORMAT = (1, *sys.version_info[:2])
+
+
+def snapshot_path(filepath) -> Path:
+    filepath = Path(filepath)
+    return filepath.parent / SNAPSHOT_DIR_NAME / f"{filepath.name}.marshal"
+
+
+def _read_snapshot(filepath):
+    try:
+        snapshot = marshal.loads(snapshot_path(filepath).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snapshot, tuple) or len(snapshot) != 4 or snapshot[0] != _SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def _write_snapshot(filepath, stamp, digest, data):
+    try:
+        with timed("snapshot.write"):
+            write_bytes_atomic(snapshot_path(filepath), marshal.dumps((_SNAPSHOT_FORMAT, stamp, digest, data)))
+    except (OSError, ValueError):
+        # read-only data directory - the JSON is simply parsed next time as well
+        count("snapshot.write_failed")
+
+
+def read_json_snapshot(filepath, stamp):
+    """read_json of the file version stamp (file_stamp), served from its snapshot when fresh"""
+    if not SNAPSHOT_ENABLED or stamp is None or stamp[1] < SNAPSHOT_MIN_BYTES:
+        return read_json(filepath)
+    with timed("snapshot.read"):
+        snapshot = _read_snapshot(filepath)
+    if snapshot is not None and snapshot[1] == stamp:
+        count("file.reads")
+        count("snapshot.hit")
+        return snapshot[3]
+
+    with timed("file.read"):
+        raw = Path(filepath).read_bytes()
+    count("file.reads")
+    digest = hashlib.sha1(raw).hexdigest()
+    if snapshot is not None and snapshot[2] == digest:
+        count("snapshot.rehash")
+        data = snapshot[3]
+    else:
+        count("snapshot.miss")
+        data = _parse_json(raw)
+    _write_snapshot(filepath, stamp, digest, data)
+    return data
+
+
+# ---------- PROJECT STORE ----------
+# data/projects/manifest.json lists the projects (file, subject, scenario
+# count, revision, last change) in their order; every project lives in its
+# own shard file
+MANIFEST_NAME = "manifest.json"
+STORE_VERSION = 1
+_SHARD_NAME_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+def manifest_path(store_dir) -> Path:
+    return Path(store_dir) / MANIFEST_NAME
+
+
+def legacy_projects_path(store_dir) -> Path:
+    """data/projects -> data/projects.json (the single-file format before shards)"""
+    return Path(store_dir).with_suffix(".json")
+
+
+def shard_name(name: str, fallback: str = "project") -> str:
+    """Readable and unique file name of a project shard (or catalogue action)"""
+    slug = _SHARD_NAME_RE.sub("_", name).strip("_")[:40] or fallback
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}.json"
+
+
+def shard_file_name(project_name: str) -> str:
+    """shard_name with the suffix of the configured compression (.json.gz, .json.zst)"""
+    return shard_name(project_name) + compress.SUFFIXES[compress.DATA_COMPRESSION]
+
+
+def retire_legacy_file(legacy: Path) -> Path:
+    """Keep a migrated single-file store as <name>.migrated, compressed when compression is configured"""
+    target = legacy.with_name(legacy.name + ".migrated")
+    if compress.DATA_COMPRESSION == compress.NONE:
+        os.replace(legacy, target)
+        return target
+    with timed("file.compress"):
+        return compress.compress_file(
+            legacy, compress.DATA_COMPRESSION, target.with_name(target.name + compress.SUFFIXES[compress.DATA_COMPRESSION])
+        )
+
+
+def manifest_entry(project: dict, filename: str) -> dict:
+    return {
+        "file": filename,
+        "subject": project.get("subject", ""),
+        "scenario_count": len(project.get("scenarios", [])),
+        "revision": project.get("revision", 0),
+        "modified": project.get("modified", ""),
+    }
+
+
+class ProjectsView(Mapping):
+    """
+    Read-only {name: project} of a project store. Names, subjects and counts
+    come from the manifest; a project is loaded (and shared like any
+    load_json_cached result) only when it is accessed.
+    """
+
+    def __init__(self, store_dir, manifest: dict):
+        self.store_dir = Path(store_dir)
+        self.manifest = manifest
+
+    @property
+    def entries(self) -> dict:
+        return self.manifest.get("projects", {})
+
+    def __getitem__(self, name):
+        path = self.shard_path(name)
+        with timed("project.load"):
+            project = load_json_cached(path)
+        if not project and not path.exists():
+            # the manifest this view was made from is stale - refresh the view
+            raise ConflictError(f"Project '{name}' was deleted or renamed by another session.")
+        return project
+
+    def shard_path(self, name) -> Path:
+        return self.store_dir / self.entries[name]["file"]
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self, name) -> dict:
+        """Manifest entry (subject, scenario_count, revision, modified) without loading the project"""
+        return self.entries[name]
+
+    def revisions(self) -> dict:
+        return {name: entry.get("revision", 0) for name, entry in self.entries.items()}
+
+
+class _ProjectShards(MutableMapping):
+    """Working copy used by commit_project_operations - reads shards from disk as operations touch them"""
+
+    def __init__(self, store_dir, manifest: dict):
+        self.store_dir = Path(store_dir)
+        self.entries = dict(manifest.get("projects", {}))
+        self.order = list(self.entries)
+        self.loaded = {}
+        self.removed = set()
+
+    def __getitem__(self, name):
+        if name not in self.loaded:
+            if name not in self.entries:
+                raise KeyError(name)
+            path = self.store_dir / self.entries[name]["file"]
+            if not path.exists():
+                raise ConflictError(f"The file of project '{name}' is missing from {self.store_dir}.")
+            self.loaded[name] = read_json(path)
+        return self.loaded[name]
+
+    def __setitem__(self, name, project):
+        if name not in self.order:
+            self.order.append(name)
+        self.loaded[name] = project
+        self.removed.discard(name)
+
+    def __delitem__(self, name):
+        if name not in self.order:
+            raise KeyError(name)
+        self.order.remove(name)
+        self.loaded.pop(name, None)
+        self.removed.add(name)
+
+    def __contains__(self, name):
+        return name in self.order
+
+    def __iter__(self):
+        return iter(list(self.order))
+
+    def __len__(self):
+        return len(self.order)
+
+
+def _iter_legacy(filepath):
+    """(name, value) of a single-file store, one at a time (nothing when it is missing)"""
+    if Path(filepath).exists():
+        yield from jsonstream.iter_items(filepath)
+
+
+def ensure_project_store(store_dir) -> bool:
+    """
+    Create the project store, migrating the single projects.json when it
+    exists (kept as projects.json.migrated). Returns True when it migrated.
+    """
+    store_dir = Path(store_dir)
+    manifest_file = manifest_path(store_dir)
+    if manifest_file.exists():
+        return False
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with file_lock(manifest_file):
+        if manifest_file.exists():
+            return False
+        legacy = legacy_projects_path(store_dir)
+        entries = {}
+        with timed("project.migrate"):
+            # streamed - a large projects.json is never in memory as a whole
+            for name, project in _iter_legacy(legacy):
+                if not isinstance(project, dict):
+                    continue
+                filename = shard_file_name(name)
+                write_json_atomic(store_dir / filename, project, compress.DATA_COMPRESSION)
+                entries[name] = manifest_entry(project, filename)
+            write_json_atomic(manifest_file, {"version": STORE_VERSION, "projects": entries})
+        if legacy.exists():
+            retire_legacy_file(legacy)
+            return True
+    return False
+
+
+def load_projects(store_dir) -> ProjectsView:
+    """Projects of the store (migrated on first use); only the manifest is read here"""
+    ensure_project_store(store_dir)
+    return ProjectsView(store_dir, load_json_cached(manifest_path(store_dir)))
+
+
+# ---------- PROJECT REVISIONS ----------
+def project_revisions(projects) -> dict:
+    """Revision number of every project (0 for projects saved before revisions existed)"""
+    if isinstance(projects, ProjectsView):
+        return projects.revisions()
+    return {
+        name: project.get("revision", 0)
+        for name, project in projects.items()
+        if isinstance(project, dict)
+    }
+
+
+def commit_project_operations(store_dir, operations, base_revisions=None):
+    """
+    Optimistic save of the project store.
+
+    Every operation is a callable(projects) that mutates the dict and returns
+    the names of the projects it changed. The operations are always replayed on
+    top of the latest content, so changes saved meanwhile by other sessions
+    are kept. Only the shards of changed projects (and the manifest) are
+    rewritten, each changed project gets its revision bumped.
+
+    Returns (projects, merged) - projects is a fresh ProjectsView, merged is
+    True when another writer changed one of the touched projects after
+    base_revisions was taken. The written projects become the shared cached
+    copies, so they must not be changed afterwards.
+    """
+    base_revisions = base_revisions or {}
+    store_dir = Path(store_dir)
+    ensure_project_store(store_dir)
+    manifest_file = manifest_path(store_dir)
+
+    with file_lock(manifest_file):
+        manifest = read_json(manifest_file)
+        projects = _ProjectShards(store_dir, manifest)
+        disk_revisions = {name: entry.get("revision", 0) for name, entry in projects.entries.items()}
+
+        touched = []
+        for operation in operations:
+            for name in operation(projects) or ():
+                if name not in touched:
+                    touched.append(name)
+
+        merged = any(
+            name in base_revisions and disk_revisions.get(name) != base_revisions[name]
+            for name in touched
+        )
+
+        if touched:
+            entries = {}
+            for name in projects.order:
+                if name in touched and isinstance(projects.get(name), dict):
+                    project = projects[name]
+                    project["revision"] = project.get("revision", 0) + 1
+                    project["modified"] = datetime.now().isoformat(timespec="seconds")
+                    filename = shard_file_name(name)
+                    write_json_atomic(store_dir / filename, project, compress.DATA_COMPRESSION)
+                    _prime_cache(store_dir / filename, project)
+                    entries[name] = manifest_entry(project, filename)
+                else:
+                    entries[name] = projects.entries[name]
+            manifest = {"version": STORE_VERSION, "projects": entries}
+            write_json_atomic(manifest_file, manifest)
+            _prime_cache(manifest_file, manifest)
+
+            # shards of deleted or renamed projects (or written with another compression)
+            live = {entry["file"] for entry in entries.values()}
+            for name in projects.removed.union(touched):
+                old = projects.entries.get(name)
+                if old and old["file"] not in live:
+                    delete_data_file(store_dir / old["file"])
+        else:
+            manifest = load_json_cached(manifest_file)
+
+    return ProjectsView(store_dir, manifest), merged
+
+
+# ---------- OPERATIONS ----------
+SCENARIO_IDENTITY_FIELDS = ("veta", "akce", "segment", "kanal", "priority", "complexity")
+
+
+def scenario_identity(scenario: dict) -> tuple:
+    """Fields that a renumbering never changes - used to find a scenario after a merge"""
+    return tuple(scenario.get(field) for field in SCENARIO_IDENTITY_FIELDS)
+
+
+def require_project(projects: dict, project_name: str) -> dict:
+    project = projects.get(project_name)
+    if not isinstance(project, dict):
+        raise ConflictError(f"Project '{project_name}' was deleted or renamed by another session.")
+    project.setdefault("scenarios", [])
+    return project
+
+
+def find_scenario_index(project: dict, scenario: dict, position: int = 0) -> int:
+    """
+    Index of scenario in project, preferring its last known position (1-based).
+    Raises ConflictError when another session deleted or edited it.
+    """
+    scenarios = project.get("scenarios", [])
+    identity = scenario_identity(scenario)
+
+    hint = position - 1
+    if 0 <= hint < len(scenarios) and scenario_identity(scenarios[hint]) == identity:
+        return hint
+
+    for idx, candidate in enumerate(scenarios):
+        if scenario_identity(candidate) == identity:
+            return idx
+
+    raise ConflictError(
+        f"Test case '{scenario.get('test_name', '')}' was changed or deleted by another session."
+    )
+
+
+def op_create_project(project_name: str, subject: str, exist_ok: bool = False):
+    def apply(projects):
+        if project_name in projects:
+            if exist_ok:
+                return []
+            raise ConflictError(f"Project '{project_name}' already exists.")
+        projects[project_name] = {"subject": subject, "scenarios": []}
+        return [project_name]
+    return apply
+
+
+def op_rename_project(old_name: str, new_name: str):
+    def apply(projects):
+        if new_name in projects:
+            raise ConflictError(f"A project named '{new_name}' already exists.")
+        projects[new_name] = require_project(projects, old_name)
+        del projects[old_name]
+        return [new_name]
+    return apply
+
+
+def op_delete_project(project_name: str):
+    def apply(projects):
+        projects.pop(project_name, None)
+        return [project_name]
+    return apply
+
+
+def op_update_project(project_name: str, update):
+    """update(project) mutates one project in place"""
+    def apply(projects):
+        update(require_project(projects, project_name))
+        return [project_name]
+    return apply
+
+
+def op_add_scenario(project_name: str, scenario: dict):
+    """Append at the end - the order number is the position, derived when displayed"""
+    def apply(projects):
+        project = require_project(projects, project_name)
+        project["scenarios"].append(copy.deepcopy(scenario))
+        return [project_name]
+    return apply
+
+
+def op_update_scenario(project_name: str, original: dict, changes: dict, position: int = 0):
+    def apply(projects):
+        project = require_project(projects, project_name)
+        idx = find_scenario_index(project, original, position)
+        scenario = project["scenarios"][idx]
+        scenario.update(copy.deepcopy(changes))
+        if "test_name" in changes:
+            # new name comes without order prefix, drop the legacy order number
+            scenario.pop("order_no", None)
+        return [project_name]
+    return apply
+
+
+def op_delete_scenario(project_name: str, original: dict, position: int = 0):
+    """Only the deleted scenario changes - the others keep their stored fields"""
+    def apply(projects):
+        project = require_project(projects, project_name)
+        idx = find_scenario_index(project, original, position)
+        project["scenarios"].pop(idx)
+        return [project_name]
+    return apply
+
+
+def op_update_scenarios_by_action(action_name: str, update):
+    """update(scenario) for every scenario of every project that uses action_name"""
+    def apply(projects):
+        touched = []
+        for project_name, project in projects.items():
+            if not isinstance(project, dict):
+                continue
+            for scenario in project.get("scenarios", []):
+                if scenario.get("akce") == action_name:
+                    update(scenario)
+                    if project_name not in touched:
+                        touched.append(project_name)
+        return touched
+    return apply
+
+
+# ---------- PROJECT ARCHIVE ----------
+# Inactive projects move to data/projects/archive/ - one compressed shard each
+# and index.json (subject, scenario count, dates) to find them. They are not in
+# the manifest, so startup, listings and saves never read or rewrite them.
+ARCHIVE_DIR_NAME = "archive"
+ARCHIVE_INDEX_NAME = "index.json"
+# archives are always compressed - gzip unless the data files use zstd
+ARCHIVE_COMPRESSION = compress.DATA_COMPRESSION if compress.DATA_COMPRESSION != compress.NONE else compress.GZIP
+
+
+def archive_dir(store_dir) -> Path:
+    return Path(store_dir) / ARCHIVE_DIR_NAME
+
+
+def archive_index_path(store_dir) -> Path:
+    return archive_dir(store_dir) / ARCHIVE_INDEX_NAME
+
+
+def load_archive_index(store_dir) -> dict:
+    """{name: entry} of the archived projects - only the small index is read"""
+    index_file = archive_index_path(store_dir)
+    if not index_file.exists():
+        return {}
+    return load_json_cached(index_file).get("projects", {})
+
+
+def search_archive(store_dir, query: str = "") -> list:
+    """(name, entry) of archived projects whose name or subject contains every word of query"""
+    words = textnorm.fold_diacritics(query).casefold().split()
+    found = []
+    for name, entry in load_archive_index(store_dir).items():
+        text = textnorm.fold_diacritics(f"{name} {entry.get('subject', '')}").casefold()
+        if all(word in text for word in words):
+            found.append((name, entry))
+    return found
+
+
+def project_modified(store_dir, entry: dict) -> datetime:
+    """Last change of a project - the shard's mtime for projects saved before it was recorded"""
+    if entry.get("modified"):
+        return datetime.fromisoformat(entry["modified"])
+    try:
+        return datetime.fromtimestamp((Path(store_dir) / entry["file"]).stat().st_mtime)
+    except OSError:
+        return datetime.now()
+
+
+def stale_projects(projects: ProjectsView, days: int) -> list:
+    """Names of the projects not changed in the last days - candidates for the archive"""
+    cutoff = datetime.now() - timedelta(days=days)
+    return [
+        name for name, entry in projects.entries.items()
+        if project_modified(projects.store_dir, entry) < cutoff
+    ]
+
+
+def _write_archive_index(index_file: Path, entries: dict):
+    index = {"version": STORE_VERSION, "projects": entries}
+    write_json_atomic(index_file, index)
+    _prime_cache(index_file, index)
+
+
+def op_archive_project(store_dir, project_name: str):
+    """
+    Move a project to the archive. The compressed copy is written before the
+    project leaves the store, so an interrupted save can only leave it in both.
+    An archived project of the same name is never replaced - unless it is this
+    very copy (left behind by an interrupted archive).
+    """
+    def apply(projects):
+        project = require_project(projects, project_name)
+        index_file = archive_index_path(store_dir)
+        with timed("project.archive"), file_lock(index_file):
+            entries = dict(read_json(index_file).get("projects", {})) if index_file.exists() else {}
+            archived = entries.get(project_name)
+            if archived is None:
+                filename = shard_name(project_name) + compress.SUFFIXES[ARCHIVE_COMPRESSION]
+                write_json_atomic(index_file.parent / filename, project, ARCHIVE_COMPRESSION)
+                entry = manifest_entry(project, filename)
+                entry["archived"] = datetime.now().isoformat(timespec="seconds")
+                entries[project_name] = entry
+                _write_archive_index(index_file, entries)
+            elif read_json(index_file.parent / archived["file"]) != project:
+                raise ConflictError(
+                    f"Project '{project_name}' is already in the archive - restore or rename it first."
+                )
+        del projects[project_name]
+        return [project_name]
+    return apply
+
+
+def op_restore_project(store_dir, project_name: str):
+    """Bring an archived project back to the store (it stays in the archive until drop_archived)"""
+    def apply(projects):
+        entry = load_archive_index(store_dir).get(project_name)
+        if entry is None:
+            raise ConflictError(f"Project '{project_name}' is not in the archive.")
+        if project_name in projects:
+            raise ConflictError(f"A project named '{project_name}' already exists.")
+        with timed("project.restore"):
+            projects[project_name] = read_json(archive_dir(store_dir) / entry["file"])
+        return [project_name]
+    return apply
+
+
+def drop_archived(store_dir, names):
+    """Remove restored projects from the archive (index entry and file)"""
+    index_file = archive_index_path(store_dir)
+    if not index_file.exists():
+        return
+    with file_lock(index_file):
+        entries = dict(read_json(index_file).get("projects", {}))
+        dropped = [entries.pop(name) for name in names if name in entries]
+        if not dropped:
+            return
+        _write_archive_index(index_file, entries)
+        for entry in dropped:
+            delete_data_file(index_file.parent / entry["file"])
+
+
+def restore_projects(store_dir, names, base_revisions=None):
+    """commit_project_operations of op_restore_project, then drop_archived - returns (projects, merged)"""
+    result = commit_project_operations(
+        store_dir, [op_restore_project(store_dir, name) for name in names], base_revisions
+    )
+    drop_archived(store_dir, names)
+    return result
+
+
+# ---------- ACTION CATALOGUE ----------
+# data/kroky/index.json lists the base actions (file, description, step count,
+# checksum) in their order; every action lives in its own file
+CATALOGUE_INDEX_NAME = "index.json"
+CATALOGUE_VERSION = 1
+
+
+def catalogue_index_path(catalogue_dir) -> Path:
+    return Path(catalogue_dir) / CATALOGUE_INDEX_NAME
+
+
+def legacy_catalogue_path(catalogue_dir) -> Path:
+    """data/kroky -> data/kroky.json (the single-file catalogue before the index)"""
+    return Path(catalogue_dir).with_suffix(".json")
+
+
+def action_payload(action_data) -> dict:
+    """{description, steps} of an action stored as a dict or as a plain list of steps"""
+    if isinstance(action_data, dict):
+        return {
+            "description": (action_data.get("description") or "").strip(),
+            "steps": action_data.get("steps", []),
+        }
+    if isinstance(action_data, list):
+        return {"description": "", "steps": action_data}
+    return {"description": "", "steps": []}
+
+
+def payload_checksum(payload: dict) -> str:
+    """Short hash of an action payload (see action_payload)"""
+    text = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def action_summary(action_data) -> dict:
+    """Index fields of an action: description, step count and checksum"""
+    payload = action_payload(action_data)
+    return {
+        "description": payload["description"],
+        "step_count": len(payload["steps"]),
+        "checksum": payload_checksum(payload),
+    }
+
+
+class CatalogueView(Mapping):
+    """
+    Read-only {action: {description, steps}} of a catalogue. Names and
+    summaries come from the index; an action file is loaded (and shared like
+    any load_json_cached result) only when the action is accessed.
+    """
+
+    def __init__(self, catalogue_dir, index: dict):
+        self.catalogue_dir = Path(catalogue_dir)
+        self.index = index
+
+    @property
+    def entries(self) -> dict:
+        return self.index.get("actions", {})
+
+    def __getitem__(self, name):
+        entry = self.entries[name]
+        with timed("action.load"):
+            return load_json_cached(self.catalogue_dir / entry["file"])
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self, name) -> dict:
+        """Index entry (description, step_count, checksum) without loading the action"""
+        return self.entries[name]
+
+
+class ActionOverlay(Mapping):
+    """
+    Actions of base with changes {action: payload, or None when deleted} laid
+    over them. Untouched actions stay in base - neither copied nor loaded.
+    """
+
+    def __init__(self, base: Mapping, changes: dict):
+        self.base = base
+        self.changes = changes
+        self._names = [name for name in base if name not in changes or changes[name] is not None]
+        self._names += [name for name, payload in changes.items() if payload is not None and name not in base]
+        self._name_set = set(self._names)
+        self._summaries = {}
+
+    def __getitem__(self, name):
+        if name not in self._name_set:
+            raise KeyError(name)
+        if name in self.changes:
+            return self.changes[name]
+        return self.base[name]
+
+    def __contains__(self, name):
+        return name in self._name_set
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def summary(self, name) -> dict:
+        if name not in self._name_set:
+            raise KeyError(name)
+        if name not in self.changes:
+            return summary_of(self.base, name)
+        if name not in self._summaries:
+            self._summaries[name] = action_summary(self.changes[name])
+        return self._summaries[name]
+
+
+def summary_of(actions: Mapping, name) -> dict:
+    """Summary of one action - from the index when actions is a catalogue (or an overlay of one)"""
+    if isinstance(actions, (CatalogueView, ActionOverlay)):
+        return actions.summary(name)
+    return action_summary(actions[name])
+
+
+def ensure_catalogue(catalogue_dir) -> bool:
+    """
+    Create the action catalogue, migrating the single kroky.json when it
+    exists (kept as kroky.json.migrated). Returns True when it migrated.
+    """
+    catalogue_dir = Path(catalogue_dir)
+    index_file = catalogue_index_path(catalogue_dir)
+    if index_file.exists():
+        return False
+
+    catalogue_dir.mkdir(parents=True, exist_ok=True)
+    with file_lock(index_file):
+        if index_file.exists():
+            return False
+        legacy = legacy_catalogue_path(catalogue_dir)
+        entries = {}
+        with timed("catalogue.migrate"):
+            for name, action_data in _iter_legacy(legacy):
+                payload = action_payload(action_data)
+                filename = shard_name(name, "action")
+                write_json_atomic(catalogue_dir / filename, payload)
+                entries[name] = {"file": filename, **action_summary(payload)}
+            write_json_atomic(index_file, {"version": CATALOGUE_VERSION, "actions": entries})
+        if legacy.exists():
+            retire_legacy_file(legacy)
+            return True
+    return False
+
+
+def load_catalogue(catalogue_dir) -> CatalogueView:
+    """Base actions (migrated on first use); only the index is read here"""
+    ensure_catalogue(catalogue_dir)
+    return CatalogueView(catalogue_dir, load_json_cached(catalogue_index_path(catalogue_dir)))
+
+
+def write_catalogue_actions(catalogue_dir, changes: dict) -> CatalogueView:
+    """
+    Save changes {action: payload, or None to delete} to the catalogue: only
+    the changed action files and the index are rewritten. Returns the new view.
+    """
+    catalogue_dir = Path(catalogue_dir)
+    ensure_catalogue(catalogue_dir)
+    index_file = catalogue_index_path(catalogue_dir)
+
+    with file_lock(index_file):
+        index = read_json(index_file)
+        entries = dict(index.get("actions", {}))
+        stale = []
+        for name, action_data in changes.items():
+            old = entries.pop(name, None) if action_data is None else entries.get(name)
+            if action_data is not None:
+                payload = action_payload(action_data)
+                filename = shard_name(name, "action")
+                write_json_atomic(catalogue_dir / filename, payload)
+                _prime_cache(catalogue_dir / filename, payload)
+                entries[name] = {"file": filename, **action_summary(payload)}
+            if old and old["file"] != entries.get(name, {}).get("file"):
+                stale.append(old["file"])
+        index = {"version": CATALOGUE_VERSION, "actions": entries}
+        write_json_atomic(index_file, index)
+        _prime_cache(index_file, index)
+
+        live = {entry["file"] for entry in entries.values()}
+        for filename in stale:
+            if filename not in live:
+                delete_data_file(catalogue_dir / filename)
+
+    return CatalogueView(catalogue_dir, index)
+
+
+# ---------- ACTION OVERRIDES ----------
+def apply_action_changes(effective, action_changes: dict):
+    """
+    Overlay pending edits {action: payload, or None when deleted} on a shared
+    effective action set without copying the untouched actions.
+    """
+    if not action_changes:
+        return effective
+    if not isinstance(effective, dict):
+        return ActionOverlay(effective, action_changes)
+    merged = dict(effective)
+    for action_name, payload in action_changes.items():
+        if payload is None:
+            merged.pop(action_name, None)
+        else:
+            merged[action_name] = payload
+    return merged
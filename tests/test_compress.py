@@ -0,0 +1,45 @@
+"""gzip / zstd data files (compress.py) read through the storage layer"""
+import pytest
+
+import compress
+import storage
+
+DATA = {"Zřízení": {"scenarios": [{"veta": "aktivace služby", "kroky": list(range(50))}]}}
+
+
+@pytest.mark.parametrize("codec", compress.available())
+def test_encode_decode_round_trip(codec):
+    payload = "žluťoučký kůň".encode("utf-8") * 100
+    encoded = compress.encode(payload, codec)
+
+    assert compress.detect(encoded[:4]) == codec
+    assert compress.decode(encoded) == payload
+
+
+@pytest.mark.parametrize("codec", compress.available())
+def test_compressed_json_reads_like_plain_json(tmp_path, codec):
+    path = tmp_path / "data.json"
+    storage.write_json_atomic(path, DATA, codec)
+
+    assert storage.read_json(path) == DATA
+    with compress.open_read(path) as f:
+        assert f.read() == compress.decode(path.read_bytes())
+
+
+def test_compress_file_replaces_the_source(tmp_path):
+    source = tmp_path / "old.json"
+    storage.write_json_atomic(source, DATA)
+    plain = source.read_bytes()
+
+    target = compress.compress_file(source, compress.GZIP)
+
+    assert target.name == "old.json.gz" and not source.exists()
+    assert compress.decode(target.read_bytes()) == plain
+
+
+def test_zstd_without_a_module_falls_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(compress, "zstd_available", lambda: False)
+
+    assert compress.configured("zstd") == compress.GZIP
+    with pytest.raises(ValueError):
+        compress.configured("brotli")
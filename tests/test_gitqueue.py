@@ -0,0 +1,142 @@
+"""gitqueue against a local bare repository (needs the git executable)"""
+import shutil
+import subprocess
+
+import pytest
+
+import gitqueue
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def clone(remote, target):
+    git(remote.parent, "clone", "-q", str(remote), str(target))
+    git(target, "config", "user.email", "test@example.com")
+    git(target, "config", "user.name", "Test")
+    return target
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Working clone with one pushed commit and a tracking branch"""
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    work = tmp_path / "work"
+    work.mkdir()
+    git(work, "init", "-q")
+    git(work, "config", "user.email", "test@example.com")
+    git(work, "config", "user.name", "Test")
+    (work / "data.json").write_text("{}\n")
+    git(work, "add", "data.json")
+    git(work, "commit", "-q", "-m", "initial")
+    git(work, "remote", "add", "origin", str(remote))
+    git(work, "push", "-q", "-u", "origin", "HEAD")
+    return work
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return tmp_path / "queue" / "git_queue.json"
+
+
+def remote_messages(repo) -> list:
+    return git(repo, "log", "--format=%s", "@{upstream}").splitlines()
+
+
+def export(repo, name, content="x"):
+    path = repo / "exports" / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def test_enqueue_keeps_one_entry_per_path(repo, queue):
+    path = export(repo, "a.xlsx")
+    gitqueue.enqueue(path, "first", queue, repo)
+    gitqueue.enqueue(path, "second", queue, repo)
+
+    pending = gitqueue.status(queue)["pending"]
+    assert [(entry["path"], entry["message"]) for entry in pending] == [("exports/a.xlsx", "second")]
+
+
+def test_drain_commits_queued_paths_as_one_commit_and_pushes(repo, queue):
+    gitqueue.enqueue(export(repo, "a.xlsx"), "Auto export A", queue, repo)
+    gitqueue.enqueue(export(repo, "b.xlsx"), "Auto export B", queue, repo)
+
+    assert gitqueue.drain(queue, repo, sleep=lambda seconds: None) is True
+
+    git(repo, "fetch", "-q")
+    assert remote_messages(repo)[0] == "Auto export (2 files)"
+    state = gitqueue.status(queue)
+    assert state["pending"] == [] and state["unpushed"] is False and state["state"] == gitqueue.IDLE
+
+
+def test_failed_push_is_retried_with_backoff_and_later_succeeds(repo, queue):
+    remote_url = git(repo, "remote", "get-url", "origin").strip()
+    git(repo, "remote", "set-url", "origin", str(repo.parent / "missing.git"))
+    gitqueue.enqueue(export(repo, "a.xlsx"), "Auto export A", queue, repo)
+    sleeps = []
+
+    assert gitqueue.drain(queue, repo, max_attempts=3, backoff=1.0, sleep=sleeps.append) is False
+
+    state = gitqueue.status(queue)
+    assert sleeps == [1.0, 2.0]
+    assert state["state"] == gitqueue.FAILED and state["attempts"] == 3
+    assert state["unpushed"] is True and state["last_error"]
+
+    git(repo, "remote", "set-url", "origin", remote_url)
+    assert gitqueue.drain(queue, repo, sleep=sleeps.append) is True
+    assert remote_messages(repo)[0] == "Auto export A"
+    assert gitqueue.status(queue)["last_error"] is None
+
+
+def test_push_rebases_onto_new_remote_commits(repo, queue, tmp_path):
+    other = clone(repo.parent / "remote.git", tmp_path / "other")
+    (other / "other.txt").write_text("other")
+    git(other, "add", "other.txt")
+    git(other, "commit", "-q", "-m", "from another clone")
+    git(other, "push", "-q")
+    gitqueue.enqueue(export(repo, "a.xlsx"), "Auto export A", queue, repo)
+
+    assert gitqueue.drain(queue, repo, sleep=lambda seconds: None) is True
+    assert remote_messages(repo)[:2] == ["Auto export A", "from another clone"]
+
+
+def test_dirty_data_files_postpone_the_rebase_and_stay_untouched(repo, queue, tmp_path):
+    other = clone(repo.parent / "remote.git", tmp_path / "other")
+    (other / "data.json").write_text('{"remote": true}\n')
+    git(other, "commit", "-q", "-am", "remote data change")
+    git(other, "push", "-q")
+    (repo / "data.json").write_text('{"saved by the app": true}\n')
+    gitqueue.enqueue(export(repo, "a.xlsx"), "Auto export A", queue, repo)
+
+    assert gitqueue.drain(queue, repo, max_attempts=1, sleep=lambda seconds: None) is False
+
+    assert "dirty" in gitqueue.status(queue)["last_error"]
+    assert (repo / "data.json").read_text() == '{"saved by the app": true}\n'
+    assert git(repo, "stash", "list") == ""
+
+
+def test_status_reports_the_draining_worker_without_taking_its_lock(repo, queue):
+    remote_url = git(repo, "remote", "get-url", "origin").strip()
+    git(repo, "remote", "set-url", "origin", str(repo.parent / "missing.git"))
+    gitqueue.enqueue(export(repo, "a.xlsx"), "Auto export A", queue, repo)
+    seen = []
+
+    def sleep(seconds):
+        # runs inside drain: a status probe here must neither block nor break the drain
+        seen.append(gitqueue.status(queue)["worker_active"])
+        git(repo, "remote", "set-url", "origin", remote_url)
+
+    assert gitqueue.drain(queue, repo, sleep=sleep) is True
+    assert seen == [True]
+    assert gitqueue.status(queue)["worker_active"] is False
+
+
+def test_worker_pid_of_a_dead_process_is_not_active(repo, queue):
+    gitqueue._update(queue, lambda state: state.update(worker_pid=2 ** 22 + 12345))
+    assert gitqueue.status(queue)["worker_active"] is False
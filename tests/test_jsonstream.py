@@ -0,0 +1,65 @@
+"""Streaming JSON reads - the pure-Python reader and ijson (when installed) must agree"""
+import json
+
+import pytest
+
+import compress
+import jsonstream
+
+DATA = {
+    "meta": {"version": 1, "note": "a \"quoted\" ] } string"},
+    "projects": {
+        "Zřízení": {"scenarios": [{"veta": "á" * 50, "steps": [1, 2.5, -3e2]}, {"veta": None}]},
+        "Empty": {"scenarios": []},
+        "dotted.name": {"scenarios": [True, False]},
+    },
+    "numbers": [0, 12345678901234567890, 1.5e-3],
+}
+
+BACKENDS = ["python"] + (["ijson"] if jsonstream.ijson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(jsonstream, "ijson", None)
+        # a tiny read size makes every value cross chunk boundaries
+        monkeypatch.setattr(jsonstream, "CHUNK_SIZE", 7)
+    return request.param
+
+
+@pytest.fixture(params=[compress.NONE, compress.GZIP])
+def data_file(request, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(compress.encode(json.dumps(DATA, ensure_ascii=False, indent=2).encode("utf-8"), request.param))
+    return path
+
+
+def test_iter_items_yields_the_top_level_and_nested_objects(backend, data_file):
+    assert dict(jsonstream.iter_items(data_file)) == DATA
+    assert dict(jsonstream.iter_items(data_file, ["projects"])) == DATA["projects"]
+
+
+def test_iter_array_yields_the_elements_at_a_path(backend, data_file):
+    assert list(jsonstream.iter_array(data_file, ["projects", "Zřízení", "scenarios"])) == DATA["projects"]["Zřízení"]["scenarios"]
+    assert list(jsonstream.iter_array(data_file, ["projects", "dotted.name", "scenarios"])) == [True, False]
+    assert list(jsonstream.iter_array(data_file, ["numbers"])) == DATA["numbers"]
+
+
+def test_iter_keys_skips_the_values(backend, data_file):
+    assert list(jsonstream.iter_keys(data_file)) == ["meta", "projects", "numbers"]
+    assert list(jsonstream.iter_keys(data_file, ["projects"])) == list(DATA["projects"])
+
+
+def test_missing_path_yields_nothing(backend, data_file):
+    assert list(jsonstream.iter_items(data_file, ["missing"])) == []
+    assert list(jsonstream.iter_array(data_file, ["projects", "Empty", "scenarios"])) == []
+
+
+def test_python_reader_rejects_truncated_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsonstream, "ijson", None)
+    path = tmp_path / "broken.json"
+    path.write_text('{"a": [1, 2', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(jsonstream.iter_array(path, ["a"]))
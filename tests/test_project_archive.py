@@ -0,0 +1,67 @@
+"""Cold archive of the project store (storage.op_archive_project / restore_projects)"""
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    store_dir = tmp_path / "projects"
+    storage.ensure_project_store(store_dir)
+    return store_dir
+
+
+def create(store, name, sentences=()):
+    storage.commit_project_operations(store, [storage.op_create_project(name, "UAT2\\")])
+    for sentence in sentences:
+        storage.commit_project_operations(store, [storage.op_add_scenario(name, {"veta": sentence})])
+
+
+def archive(store, name):
+    return storage.commit_project_operations(store, [storage.op_archive_project(store, name)])
+
+
+def test_archive_and_restore_round_trip(store):
+    create(store, "P1", ["a", "b"])
+
+    projects, _ = archive(store, "P1")
+    assert "P1" not in projects
+    assert storage.load_archive_index(store)["P1"]["scenario_count"] == 2
+    assert [name for name, _ in storage.search_archive(store, "p1")] == ["P1"]
+
+    projects, _ = storage.restore_projects(store, ["P1"])
+    assert [tc["veta"] for tc in projects["P1"]["scenarios"]] == ["a", "b"]
+    assert storage.load_archive_index(store) == {}
+    assert list(storage.archive_dir(store).glob("P1-*")) == []
+
+
+def test_archiving_a_name_already_in_the_archive_keeps_the_archived_copy(store):
+    create(store, "P2", ["old"])
+    archive(store, "P2")
+    create(store, "P2", ["new"])
+
+    with pytest.raises(storage.ConflictError):
+        archive(store, "P2")
+
+    assert "P2" in storage.load_projects(store)
+    entry = storage.load_archive_index(store)["P2"]
+    archived = storage.read_json(storage.archive_dir(store) / entry["file"])
+    assert [tc["veta"] for tc in archived["scenarios"]] == ["old"]
+
+
+def test_interrupted_archive_can_be_finished(store):
+    create(store, "P3", ["a"])
+    # the archive copy is written first - a failure after it leaves the project in both
+    project = storage.load_projects(store)["P3"]
+
+    def fail(projects):
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        storage.commit_project_operations(store, [storage.op_archive_project(store, "P3"), fail])
+    assert "P3" in storage.load_projects(store) and "P3" in storage.load_archive_index(store)
+
+    projects, _ = archive(store, "P3")
+    assert "P3" not in projects
+    entry = storage.load_archive_index(store)["P3"]
+    assert storage.read_json(storage.archive_dir(store) / entry["file"]) == project
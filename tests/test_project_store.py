@@ -0,0 +1,87 @@
+"""Sharded project store: migration, manifest and merged concurrent saves"""
+import json
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    store_dir = tmp_path / "projects"
+    storage.ensure_project_store(store_dir)
+    return store_dir
+
+
+def create(store, name, sentences=()):
+    storage.commit_project_operations(store, [storage.op_create_project(name, "UAT2\\")])
+    for sentence in sentences:
+        storage.commit_project_operations(store, [storage.op_add_scenario(name, {"veta": sentence})])
+
+
+def sentences(store, name) -> list:
+    return [tc["veta"] for tc in storage.load_projects(store)[name]["scenarios"]]
+
+
+def test_migration_splits_projects_json_into_shards(tmp_path):
+    legacy = tmp_path / "projects.json"
+    legacy.write_text(json.dumps({
+        "B": {"subject": "S2", "scenarios": [{"veta": "b"}]},
+        "A": {"subject": "S1", "scenarios": [{"veta": "a1"}, {"veta": "a2"}]},
+    }), encoding="utf-8")
+    store_dir = tmp_path / "projects"
+
+    assert storage.ensure_project_store(store_dir) is True
+    assert storage.ensure_project_store(store_dir) is False
+
+    manifest = storage.read_json(storage.manifest_path(store_dir))
+    assert list(manifest["projects"]) == ["B", "A"]
+    assert manifest["projects"]["A"]["scenario_count"] == 2
+    assert storage.read_json(store_dir / manifest["projects"]["A"]["file"])["subject"] == "S1"
+    assert not legacy.exists() and (tmp_path / "projects.json.migrated").exists()
+    assert [tc["veta"] for tc in storage.load_projects(store_dir)["A"]["scenarios"]] == ["a1", "a2"]
+
+
+def test_commit_rewrites_only_the_touched_shard(store):
+    create(store, "P1", ["a"])
+    create(store, "P2", ["b"])
+    untouched = storage.load_projects(store).shard_path("P2")
+    before = untouched.stat().st_mtime_ns
+
+    storage.commit_project_operations(store, [storage.op_add_scenario("P1", {"veta": "c"})])
+
+    assert untouched.stat().st_mtime_ns == before
+    projects = storage.load_projects(store)
+    assert projects.revisions()["P1"] > projects.revisions()["P2"]
+    assert storage.read_json(storage.manifest_path(store))["projects"]["P1"]["scenario_count"] == 2
+
+
+def test_concurrent_saves_are_merged(store):
+    create(store, "P1", ["a"])
+    base = storage.project_revisions(storage.load_projects(store))
+    # another session saves first
+    storage.commit_project_operations(store, [storage.op_add_scenario("P1", {"veta": "other"})])
+
+    _, merged = storage.commit_project_operations(store, [storage.op_add_scenario("P1", {"veta": "mine"})], base)
+
+    assert merged is True
+    assert sentences(store, "P1") == ["a", "other", "mine"]
+
+
+def test_editing_a_test_case_deleted_meanwhile_raises_conflict(store):
+    create(store, "P1", ["a", "b"])
+    seen = storage.load_projects(store)["P1"]["scenarios"][1]
+    storage.commit_project_operations(store, [storage.op_delete_scenario("P1", seen, 2)])
+
+    with pytest.raises(storage.ConflictError):
+        storage.commit_project_operations(store, [storage.op_update_scenario("P1", seen, {"priority": "1-High"}, 2)])
+    assert sentences(store, "P1") == ["a"]
+
+
+def test_missing_shard_raises_conflict(store):
+    create(store, "P1", ["a"])
+    projects = storage.load_projects(store)
+    projects.shard_path("P1").unlink()
+
+    with pytest.raises(storage.ConflictError):
+        storage.load_projects(store)["P1"]
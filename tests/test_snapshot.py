@@ -0,0 +1,45 @@
+"""Warm-start snapshots of large data files (storage.read_json_snapshot)"""
+import pytest
+
+import diagnostics
+import storage
+
+DATA = {"Zřízení": {"scenarios": [{"veta": "aktivace služby", "kroky": list(range(50))}]}}
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    monkeypatch.setattr(storage, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(storage, "SNAPSHOT_MIN_BYTES", 0)
+    diagnostics.reset()
+
+
+def snapshot_counters() -> dict:
+    counters = diagnostics.totals()["counters"]
+    return {name: counters.get(f"snapshot.{name}", 0) for name in ("hit", "miss", "rehash")}
+
+
+def test_snapshot_is_reused_until_the_file_changes(tmp_path, snapshots):
+    path = tmp_path / "data.json"
+    storage.write_json_atomic(path, DATA)
+
+    assert storage.read_json_snapshot(path, storage.file_stamp(path)) == DATA
+    assert storage.snapshot_path(path).exists()
+    assert storage.read_json_snapshot(path, storage.file_stamp(path)) == DATA
+    assert snapshot_counters() == {"hit": 1, "miss": 1, "rehash": 0}
+
+    changed = {"other": {"scenarios": []}}
+    storage.write_json_atomic(path, changed)
+    assert storage.read_json_snapshot(path, storage.file_stamp(path)) == changed
+    assert snapshot_counters()["miss"] == 2
+
+
+def test_touched_file_with_the_same_content_reuses_the_snapshot(tmp_path, snapshots):
+    path = tmp_path / "data.json"
+    storage.write_json_atomic(path, DATA)
+    storage.read_json_snapshot(path, storage.file_stamp(path))
+
+    path.write_bytes(path.read_bytes())  # new mtime, same bytes (e.g. git checkout)
+
+    assert storage.read_json_snapshot(path, storage.file_stamp(path)) == DATA
+    assert snapshot_counters() == {"hit": 0, "miss": 1, "rehash": 1}
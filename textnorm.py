@@ -0,0 +1,60 @@
+"""
+Text normalization shared by core, the app and the CLI.
+
+Step descriptions and expected results repeat across every scenario using an
+action, so remove_diacritics is memoized; letters of the Czech (and Slovak)
+alphabet are folded with a translate table and only text with other non-ASCII
+characters goes through NFKD.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Roughly the distinct step texts of a large catalogue (actions x steps x 2)
+TEXT_CACHE_SIZE = 32768
+
+_FOLD_TABLE = str.maketrans(
+    "áäčďéěíĺľňóôŕřšťúůýžÁÄČĎÉĚÍĹĽŇÓÔŔŘŠŤÚŮÝŽ",
+    "aacdeeillnoorrstuuyzAACDEEILLNOORRSTUUYZ",
+)
+_REPEATED_UNDERSCORE_RE = re.compile(r"_{2,}")
+
+
+def fold_diacritics(text: str) -> str:
+    """remove_diacritics without the cache - for one-off text such as imported sentences"""
+    folded = text.translate(_FOLD_TABLE)
+    if folded.isascii():
+        return folded
+    normalized = unicodedata.normalize("NFKD", folded)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+_fold_cached = lru_cache(maxsize=TEXT_CACHE_SIZE)(fold_diacritics)
+
+
+def remove_diacritics(text):
+    """Remove diacritics from text"""
+    if not text:
+        return text
+    return _fold_cached(text)
+
+
+def normalize_text(text):
+    """Normalize text for filenames (ASCII only, underscores instead of spaces)"""
+    folded = text.translate(_FOLD_TABLE)
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded).encode("ascii", "ignore").decode("ascii")
+    return _REPEATED_UNDERSCORE_RE.sub("_", folded.replace(" ", "_"))
+
+
+def clean_tc_name(name: str) -> str:
+    """Drop 'UNKNOWN' parts from a test case name and collapse repeated underscores"""
+    if not name or not isinstance(name, str):
+        return name
+    result = "_".join(p for p in name.split("_") if p != "UNKNOWN")
+    return _REPEATED_UNDERSCORE_RE.sub("_", result).strip("_")
+
+
+def cache_info():
+    """lru_cache statistics of remove_diacritics"""
+    return _fold_cached.cache_info()
@@ -0,0 +1,136 @@
+import threading
+from pathlib import Path
+
+import logs
+import storage
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional - fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+POLL_INTERVAL = 1.0
+
+log = logs.get_logger("watcher")
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # atomic saves arrive as a move of the temp file onto the watched path
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                self.watcher.check(Path(path))
+
+
+class DataWatcher:
+    """
+    Watches data files for changes made outside this process (git pull,
+    scripts, other app instances). On a change the shared parsed cache
+    of the file is dropped once and its version number is bumped, sessions
+    compare versions on their next rerun and refresh only what changed.
+    Uses watchdog when installed, otherwise a stdlib stat() poller.
+    """
+
+    def __init__(self, paths, interval: float = POLL_INTERVAL):
+        self.paths = [Path(p).resolve() for p in paths]
+        self.interval = interval
+        self._stamps = {path: storage.file_stamp(path) for path in self.paths}
+        self._versions = {path: 0 for path in self.paths}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    @property
+    def backend(self) -> str:
+        return "watchdog" if self._observer is not None else "polling"
+
+    def start(self):
+        for path in self.paths:
+            storage.set_watched(path)
+
+        if Observer is not None:
+            try:
+                observer = Observer()
+                handler = _EventHandler(self)
+                for directory in {path.parent for path in self.paths}:
+                    directory.mkdir(exist_ok=True)
+                    observer.schedule(handler, str(directory), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except Exception as e:
+                log.warning("watchdog unavailable, polling instead", error=str(e))
+                self._observer = None
+
+        # the poller also runs next to watchdog as a safety net, just much less often
+        interval = self.interval if self._observer is None else self.interval * 10
+        self._thread = threading.Thread(target=self._poll, args=(interval,), name="data-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+        for path in self.paths:
+            storage.set_watched(path, False)
+
+    def _poll(self, interval):
+        while not self._stop.wait(interval):
+            for path in self.paths:
+                self.check(path)
+
+    def check(self, path: Path):
+        """Compare the file stamp with the last seen one and publish a change once"""
+        path = path.resolve()
+        if path not in self._stamps:
+            return
+
+        stamp = storage.file_stamp(path)
+        with self._lock:
+            if stamp == self._stamps[path]:
+                return
+            self._stamps[path] = stamp
+            self._versions[path] += 1
+            listeners = list(self._listeners)
+
+        storage.invalidate_cache(path, stamp)
+        for listener in listeners:
+            try:
+                listener(path)
+            except Exception:
+                log.exception("File watcher listener failed", path=str(path))
+
+    def add_listener(self, callback):
+        """callback(path) is called from the watcher thread after every change"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def versions(self) -> dict:
+        """Snapshot of {path: version} - cheap to store per session and compare"""
+        with self._lock:
+            return {str(path): version for path, version in self._versions.items()}
+
+    def changed_since(self, versions: dict) -> list:
+        """Paths whose version differs from an earlier versions() snapshot"""
+        current = self.versions()
+        return [Path(path) for path, version in current.items() if versions.get(path) != version]
+
+
+def get_watcher(paths, interval: float = POLL_INTERVAL) -> DataWatcher:
+    """Process-wide watcher, started on first use"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DataWatcher(paths, interval).start()
+        return _watcher